@@ -0,0 +1,186 @@
+"""Avatar sprites for the chart renderers, cached in memory and on disk.
+
+``AvatarService.sprites`` turns members or users into circular RGBA sprites
+at the sizes the charts draw (36 px for bar charts, 64 px for the connection
+chart), along with the avatar's average colour for the bars. It checks two
+cache tiers before the network:
+
+* an in-memory LRU of decoded, pre-masked sprites keyed by user ID, avatar
+  hash and size (``AVATAR_CACHE_SPRITES`` entries);
+* a disk cache of the downloaded 128 px PNGs under ``AVATAR_CACHE_DIR``
+  (default ``DATA_DIR/avatars``), named by the avatar hash, which changes
+  whenever the picture does, so a file never needs revalidating.
+
+Concurrent requests for the same avatar share one download and one decode.
+Files unused for ``AVATAR_CACHE_DAYS`` are removed by the retention job.
+"""
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import aiohttp
+
+from metrics import cache_counter
+
+AVATAR_CACHE_DIR = os.getenv("AVATAR_CACHE_DIR") or os.path.join(os.getenv("DATA_DIR", "."), "avatars")
+AVATAR_CACHE_SPRITES = int(os.getenv("AVATAR_CACHE_SPRITES", 512))
+AVATAR_CACHE_DAYS = int(os.getenv("AVATAR_CACHE_DAYS", 30))
+
+# Downloaded once at this size and scaled down for every sprite size
+SOURCE_SIZE = 128
+BAR_SPRITE = 36
+NODE_SPRITE = 64
+
+SPRITE_CACHE = cache_counter("avatar_sprites")
+DISK_CACHE = cache_counter("avatar_files")
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+class Sprite(NamedTuple):
+    image: object  # PIL.Image.Image in RGBA, transparent outside the circle
+    color: tuple  # average RGB of the avatar
+
+    @property
+    def hex(self) -> str:
+        return "#{:02x}{:02x}{:02x}".format(*self.color)
+
+    @property
+    def rgba(self) -> tuple:
+        """(size, raw RGBA bytes): the sprite as plain data for the render workers."""
+        return self.image.size[0], self.image.tobytes()
+
+
+def _avatar_asset(user):
+    # Same choice as the charts always made: the user's own avatar, else the guild or default one
+    return (user.avatar or user.display_avatar).with_static_format("png").with_size(SOURCE_SIZE)
+
+
+def _make_sprite(data: bytes, size: int) -> Sprite:
+    """Decode ``data``, scale it to ``size`` and cut it into a circle (runs on a worker thread)."""
+    from io import BytesIO
+
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    avatar = Image.open(BytesIO(data)).convert("RGBA").resize((size, size), Image.Resampling.LANCZOS)
+    color = tuple(int(c) for c in np.array(avatar)[..., :3].mean(axis=(0, 1)))
+    mask = Image.new("L", avatar.size, 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
+    avatar.putalpha(mask)
+    return Sprite(avatar, color)
+
+
+class AvatarService:
+    """Two-tier avatar cache shared by every chart; available as ``bot.avatars``."""
+
+    def __init__(self, http_client, directory: str = AVATAR_CACHE_DIR, max_sprites: int = AVATAR_CACHE_SPRITES):
+        self.http_client = http_client
+        self.directory = directory
+        self.max_sprites = max_sprites
+        self.downloads = 0
+        self._sprites = OrderedDict()  # (user_id, avatar key, size) -> Sprite
+        self._pending = {}  # in-flight download or decode -> task
+
+    def path_for(self, asset) -> str:
+        return os.path.join(self.directory, _UNSAFE.sub("_", asset.key) + ".png")
+
+    async def sprites(self, users, size: int = BAR_SPRITE) -> list:
+        """Return one Sprite (or None when unavailable) per user, in order."""
+        return await asyncio.gather(*(self.sprite(user, size) for user in users))
+
+    async def sprite(self, user, size: int = BAR_SPRITE) -> Optional[Sprite]:
+        if user is None:
+            return None
+        asset = _avatar_asset(user)
+        key = (user.id, asset.key, size)
+        sprite = self._sprites.get(key)
+        SPRITE_CACHE.record(sprite is not None)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            return sprite
+        try:
+            sprite = await self._shared(("sprite",) + key, lambda: self._build(asset, size))
+        except Exception as e:
+            print(f"[Avatars] Could not load avatar for user {user.id}: {e}")
+            return None
+        if sprite is not None:
+            self._sprites[key] = sprite
+            while len(self._sprites) > self.max_sprites:
+                self._sprites.popitem(last=False)
+        return sprite
+
+    async def _shared(self, key, factory):
+        """Run ``factory()`` once for all concurrent callers asking for ``key``."""
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _build(self, asset, size: int) -> Optional[Sprite]:
+        data = await self._shared(("source", asset.key), lambda: self._source(asset))
+        if data is None:
+            return None
+        return await asyncio.to_thread(_make_sprite, data, size)
+
+    async def _source(self, asset) -> Optional[bytes]:
+        """The avatar PNG from disk, downloading and storing it on a miss."""
+        path = self.path_for(asset)
+        data = await asyncio.to_thread(_read_touch, path)
+        DISK_CACHE.record(data is not None)
+        if data is not None:
+            return data
+        try:
+            resp = await self.http_client.get(str(asset.url), timeout=10)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+        if resp.status != 200 or not resp.body:
+            return None
+        self.downloads += 1
+        await asyncio.to_thread(_write_atomic, path, resp.body)
+        return resp.body
+
+    async def prune(self, max_age_days: int = AVATAR_CACHE_DAYS) -> int:
+        """Delete cached files not used for ``max_age_days``; returns how many were removed."""
+        if max_age_days <= 0:
+            return 0
+        return await asyncio.to_thread(_prune_directory, self.directory, time.time() - max_age_days * 86400)
+
+
+def _read_touch(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read()
+    except FileNotFoundError:
+        return None
+    # Modification time doubles as "last used" for pruning
+    os.utime(path)
+    return data
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp_path, path)
+
+
+def _prune_directory(directory: str, cutoff: float) -> int:
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
@@ -0,0 +1,102 @@
+"""Compare JSON and packed int32 storage for Server Wrapped hourly histograms.
+
+Fills one guild/year with member metric rows in both formats and times what
+/server_wrapped does with them: fetch every row's active_hours and reduce them
+to 24 guild-wide totals (json.loads + Python loop before, one NumPy reduction
+over the packed blobs after).
+
+    python benchmarks/bench_active_hours.py [--members 50000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Point the database at a throwaway directory before it is imported
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="danbot-bench-")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import DatabaseManager  # noqa: E402
+from repositories import WrappedMetric, WrappedRepository, sum_active_hours  # noqa: E402
+from schema import pack_active_hours  # noqa: E402
+
+GUILD_ID = 1
+YEAR = 2024
+
+
+def sum_json_hours(values) -> list:
+    """The pre-migration reduction from /server_wrapped."""
+    active_hours = [0] * 24
+    for value in values:
+        if value:
+            hours_arr = json.loads(value)
+            for h in range(24):
+                active_hours[h] += hours_arr[h]
+    return active_hours
+
+
+async def fetch_column(sql: str) -> list:
+    async with await DatabaseManager.get_connection(readonly=True) as conn:
+        async with conn.execute(sql, (GUILD_ID, YEAR)) as cursor:
+            return [row[0] for row in await cursor.fetchall()]
+
+
+async def main(members: int, repeat: int):
+    await DatabaseManager.initialize()
+    rng = random.Random(0)
+    histograms = [[rng.randrange(500) for _ in range(24)] for _ in range(members)]
+
+    await WrappedRepository.replace_year(
+        GUILD_ID, YEAR,
+        [WrappedMetric(uid, 1, 1, pack_active_hours(h), 0) for uid, h in enumerate(histograms)],
+        [], [], [],
+    )
+    # The old layout, side by side in the same database
+    async with await DatabaseManager.get_connection() as conn:
+        await conn.execute("CREATE TABLE legacy_metrics (guild_id INTEGER, year INTEGER, active_hours TEXT);")
+        await conn.executemany(
+            "INSERT INTO legacy_metrics VALUES (?, ?, ?);",
+            [(GUILD_ID, YEAR, json.dumps(h)) for h in histograms],
+        )
+        await conn.commit()
+
+    cases = {
+        "json text": (
+            "SELECT active_hours FROM legacy_metrics WHERE guild_id = ? AND year = ?;",
+            sum_json_hours,
+        ),
+        "packed int32 blob": (
+            "SELECT active_hours FROM server_wrapped_metrics WHERE guild_id = ? AND year = ?;",
+            sum_active_hours,
+        ),
+    }
+
+    expected = [sum(col) for col in zip(*histograms)]
+    print(f"\n{members} member rows, best of {repeat}")
+    print(f"{'format':<20}{'fetch (ms)':>12}{'decode+sum (ms)':>18}{'total (ms)':>12}")
+    for label, (sql, reduce) in cases.items():
+        best_fetch = best_reduce = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            values = await fetch_column(sql)
+            fetched = time.perf_counter()
+            totals = reduce(values)
+            done = time.perf_counter()
+            assert totals == expected
+            best_fetch = min(best_fetch, fetched - start)
+            best_reduce = min(best_reduce, done - fetched)
+        total = best_fetch + best_reduce
+        print(f"{label:<20}{best_fetch * 1000:>12.1f}{best_reduce * 1000:>18.1f}{total * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.members, args.repeat))
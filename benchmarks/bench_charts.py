@@ -0,0 +1,134 @@
+"""Time each avatar bar chart with the BarChart renderer against the old pyplot code.
+
+For every style in charts.BAR_STYLES (15 bars for "wrapped", 10 for the
+leaderboards, three in four with avatars) this renders --runs charts with
+``charts.bar_chart`` and with ``legacy_bar_chart``, a copy of the pyplot
+renderers it replaced: pyplot figures, per-call avatar rings, tight_layout
+and bbox_inches="tight". Both run in this process after one warm-up render,
+so imports and font loading are not counted.
+
+    python benchmarks/bench_charts.py [--runs 20]
+"""
+import argparse
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import charts  # noqa: E402
+from startup import pyplot  # noqa: E402
+
+BARS = {"wrapped": 15, "leaderboard": 10, "workout": 10}
+
+
+def sprite(i: int) -> tuple:
+    import numpy as np
+
+    size = 36
+    image = np.zeros((size, size, 4), dtype=np.uint8)
+    yy, xx = np.mgrid[:size, :size]
+    inside = (xx - size / 2 + 0.5) ** 2 + (yy - size / 2 + 0.5) ** 2 <= (size / 2) ** 2
+    image[inside] = ((i * 40) % 256, 120, 200, 255)
+    return size, image.tobytes()
+
+
+def chart_data(style: str) -> tuple:
+    count = BARS[style]
+    names = [f"Member Name {i}" for i in range(count)]
+    values = [1000 + 731 * i for i in range(count)]
+    if charts.BAR_STYLES[style].top_down:
+        values.reverse()
+    avatars = [sprite(i) if i % 4 else None for i in range(count)]
+    colors = [f"#{(i * 40) % 256:02x}78c8" if i % 4 else None for i in range(count)]
+    return names, values, avatars, colors, "Message Counts by User", "Messages"
+
+
+def legacy_bar_chart(style: str, names, values, avatars, colors, title, x_label, default_color="#10B981") -> bytes:
+    """The pyplot renderers as they were before BarChart, for comparison."""
+    plt = pyplot()
+    import numpy as np
+    from matplotlib.offsetbox import AnnotationBbox, OffsetImage
+    from PIL import Image, ImageDraw
+
+    wrapped = style == "wrapped"
+    num = len(names)
+    min_height = {"wrapped": 6, "leaderboard": 3, "workout": 4}[style]
+    fig, ax = plt.subplots(figsize=(10, max(min_height, num * 0.6)))
+    fig.patch.set_facecolor("#2C2F33")
+    ax.set_facecolor("#2C2F33")
+
+    bar_colors, processed = [], []
+    for avatar, color in zip(avatars, colors):
+        color = color or default_color
+        image = None
+        if avatar is not None:
+            image = Image.frombytes("RGBA", (avatar[0], avatar[0]), avatar[1])
+            if wrapped:
+                ring = Image.new("RGBA", image.size, (0, 0, 0, 0))
+                ImageDraw.Draw(ring).ellipse((0, 0, image.size[0] - 1, image.size[1] - 1), outline=color, width=2)
+                image = Image.alpha_composite(image, ring)
+        bar_colors.append(color)
+        processed.append(image)
+
+    y = np.arange(num)
+    bars = ax.barh(y, values, color=bar_colors, height=0.5 if wrapped else 0.6, edgecolor="none")
+    ax.set_title(title, color="#FFFFFF", fontsize=18 if wrapped else 16, pad=15)
+    ax.set_xlabel(x_label, color="#FFFFFF", fontsize=14 if wrapped else 12)
+    if wrapped:
+        ax.set_ylabel("Users", color="#FFFFFF", fontsize=14)
+    ax.set_yticks(y)
+    ax.set_yticklabels(names, color="#FFFFFF", fontsize=12)
+    if not wrapped:
+        ax.invert_yaxis()
+    ax.tick_params(axis="x", colors="#FFFFFF", labelsize=12 if wrapped else 10)
+
+    max_val = max(values) if values else 1
+    for i, b in enumerate(bars):
+        y_pos = b.get_y() + b.get_height() / 2
+        if processed[i] is not None:
+            anchor = values[i] + max_val * (0.02 if wrapped else 0.03)
+            box = OffsetImage(processed[i], zoom=0.7 if wrapped else 1)
+            ax.add_artist(AnnotationBbox(box, (anchor, y_pos), frameon=False, xycoords="data",
+                                         box_alignment=(0, 0.5) if wrapped else (0.5, 0.5)))
+            text_x = values[i] + max_val * 0.08
+        else:
+            text_x = values[i] + max_val * 0.02
+        ax.text(text_x, y_pos, str(values[i]), va="center", color="#FFFFFF", fontsize=12)
+    if wrapped:
+        ax.set_xlim(0, max_val * 1.15)
+        ax.set_ylim(-0.5, num - 0.5)
+
+    plt.tight_layout()
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=150 if style == "workout" else None, bbox_inches="tight", facecolor=fig.get_facecolor())
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def median_ms(render, style: str, data: tuple, runs: int) -> float:
+    render(style, *data)
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        render(style, *data)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+def main(runs: int):
+    print(f"Median render time over {runs} run(s):")
+    print(f"{'chart':<14}{'bars':>6}{'pyplot (ms)':>14}{'BarChart (ms)':>16}{'speedup':>10}")
+    for style in charts.BAR_STYLES:
+        data = chart_data(style)
+        legacy = median_ms(legacy_bar_chart, style, data, runs)
+        current = median_ms(charts.bar_chart, style, data, runs)
+        print(f"{style:<14}{BARS[style]:>6}{legacy:>14.1f}{current:>16.1f}{legacy / current:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    main(parser.parse_args().runs)
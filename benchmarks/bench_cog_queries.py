@@ -0,0 +1,81 @@
+"""Time the repository calls behind the cogs' commands against generated fixtures.
+
+Loads ``fixtures.load_fixtures`` into a shared-cache in-memory database (or a
+throwaway file with --disk) and reports per-call latency for the queries
+/workout, the weekly workout check, the birthday announcer, /connectionchart
+and /server_wrapped run, without a Discord connection.
+
+    python benchmarks/bench_cog_queries.py [--guilds 3] [--users 200] [--years 2] [--repeat 20] [--disk]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="danbot-bench-"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import DatabaseManager  # noqa: E402
+from fixtures import fixture_guild_id, fixture_user_id, load_fixtures  # noqa: E402
+from repositories import (BirthdayRepository, ConnectionRepository, WorkoutRepository,  # noqa: E402
+                          WrappedRepository, sum_active_hours)
+
+
+async def time_call(label: str, make_call, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await make_call()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"  {label:<38}{statistics.median(samples):>9.3f} ms p50 {p95:>9.3f} ms p95")
+
+
+async def main(args):
+    if not args.disk:
+        DatabaseManager.configure(memory=True)
+    await DatabaseManager.open_pool()
+    await DatabaseManager.initialize()
+
+    started = time.perf_counter()
+    counts = await load_fixtures(args.guilds, args.users, args.years)
+    print(f"Loaded {sum(counts.values())} fixture rows in {time.perf_counter() - started:.2f}s "
+          f"({counts['workout_history']} workouts)\n")
+
+    guild_id = fixture_guild_id(0)
+    user_id = fixture_user_id(0, 0)
+    now = datetime.now()
+    week_start = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    year = now.year
+
+    async def wrapped_summary():
+        metrics = await WrappedRepository.metrics(guild_id, year)
+        sum_active_hours(m.active_hours for m in metrics)
+
+    print(f"Per call over {args.repeat} runs (guild with {args.users} members):")
+    await time_call("goals_and_weekly_counts (weekly check)", lambda: WorkoutRepository.goals_and_weekly_counts(guild_id=guild_id), args.repeat)
+    await time_call("weekly_counts (/workout streaks)", lambda: WorkoutRepository.weekly_counts(user_id, guild_id=guild_id), args.repeat)
+    await time_call("count_in_range (this week)", lambda: WorkoutRepository.count_in_range(user_id, week_start, now, guild_id=guild_id), args.repeat)
+    await time_call("counts_in_range (this week, all)", lambda: WorkoutRepository.counts_in_range(week_start, now, guild_id=guild_id), args.repeat)
+    await time_call("birthdays_on (announcer)", lambda: BirthdayRepository.birthdays_on("03-14", "03-15", guild_id=guild_id), args.repeat)
+    await time_call("list_all (/connectionchart)", lambda: ConnectionRepository.list_all(guild_id=guild_id), args.repeat)
+    await time_call("metrics + sum_active_hours (wrapped)", wrapped_summary, args.repeat)
+    await time_call("top_words (wrapped)", lambda: WrappedRepository.top_words(guild_id, year), args.repeat)
+
+    await DatabaseManager.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--guilds", type=int, default=3)
+    parser.add_argument("--users", type=int, default=200, help="members per guild")
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--disk", action="store_true", help="use a throwaway file instead of the in-memory database")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,79 @@
+"""Measure cold start to ready and fail when it exceeds a time budget.
+
+Each run starts a fresh interpreter that imports bot.py and runs everything
+setup_hook does before talking to Discord (database pool, schema, legacy
+migrations, every enabled cog) against a throwaway DATA_DIR, then prints the
+startup profile. The median time to ready over all runs is compared with
+the budget and the script exits with status 1 when it is over, so it can gate
+CI or a deploy.
+
+    python benchmarks/bench_cold_start.py [--runs 3] [--budget 2.5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", 2.5))
+
+CHILD = """
+import asyncio, json, sys
+from startup import STARTUP
+import bot
+
+async def main():
+    async with bot.bot as client:
+        await client.prepare()
+        STARTUP.mark_ready()
+    # Cog loops were cancelled on close; report on a line of its own after the bot's logs
+    print("STARTUP_PROFILE " + json.dumps(STARTUP.report()))
+
+asyncio.run(main())
+"""
+
+
+def run_once() -> dict:
+    env = dict(os.environ, DATA_DIR=tempfile.mkdtemp(prefix="danbot-bench-"), DISCORD_TOKEN="benchmark")
+    # Scheduled jobs would only wait for a gateway connection that never comes
+    env.setdefault("DB_BACKUP_INTERVAL_HOURS", "0")
+    env.setdefault("DB_RETENTION_INTERVAL_HOURS", "0")
+    proc = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP_PROFILE "):
+            return json.loads(line.split(" ", 1)[1])
+    raise RuntimeError(f"Cold start run failed (exit {proc.returncode}):\n{proc.stdout[-2000:]}\n{proc.stderr[-2000:]}")
+
+
+def main(runs: int, budget: float) -> int:
+    reports = [run_once() for _ in range(runs)]
+    ready = [r["ready_s"] for r in reports]
+
+    # Median per phase across runs, slowest first
+    phases = {}
+    for report in reports:
+        for phase in report["phases"]:
+            phases.setdefault(phase["name"], []).append(phase["seconds"])
+    print(f"{'phase':<28}{'median':>10}")
+    for name, samples in sorted(phases.items(), key=lambda p: statistics.median(p[1]), reverse=True):
+        print(f"{name:<28}{statistics.median(samples) * 1000:>8.0f}ms")
+
+    median = statistics.median(ready)
+    print(f"\nCold start to ready: median {median:.2f}s over {runs} run(s) (min {min(ready):.2f}s, max {max(ready):.2f}s)")
+    if median > budget:
+        print(f"FAIL: over the {budget:.2f}s startup budget")
+        return 1
+    print(f"OK: within the {budget:.2f}s startup budget")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS, help="seconds (default STARTUP_BUDGET_SECONDS or 2.5)")
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.budget))
@@ -0,0 +1,66 @@
+"""Compare per-call SQLite connections against the pooled DatabaseManager.
+
+Runs a burst of goal lookups (the query behind WorkoutTracker.get_goal) both
+sequentially and concurrently, once with the pool closed and once with it open.
+
+    python benchmarks/bench_db_pool.py [--lookups 1000] [--users 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Point the database at a throwaway directory before it is imported
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="danbot-bench-")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import DatabaseManager  # noqa: E402
+
+
+async def get_goal(user_id: int) -> int:
+    async with await DatabaseManager.get_connection(readonly=True) as conn:
+        async with conn.execute("SELECT goal FROM workout_goals WHERE user_id = ?;", (user_id,)) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else 0
+
+
+async def run_burst(lookups: int, users: int, concurrent: bool) -> float:
+    start = time.perf_counter()
+    if concurrent:
+        await asyncio.gather(*(get_goal(i % users) for i in range(lookups)))
+    else:
+        for i in range(lookups):
+            await get_goal(i % users)
+    return time.perf_counter() - start
+
+
+async def main(lookups: int, users: int):
+    await DatabaseManager.initialize()
+    async with await DatabaseManager.get_connection() as conn:
+        await conn.executemany(
+            "INSERT OR REPLACE INTO workout_goals (user_id, goal) VALUES (?, ?);",
+            [(uid, 1 + uid % 7) for uid in range(users)],
+        )
+        await conn.commit()
+
+    print(f"\n{lookups} goal lookups over {users} users")
+    print(f"{'mode':<24}{'total (s)':>12}{'per lookup (ms)':>18}")
+    for pooled in (False, True):
+        if pooled:
+            await DatabaseManager.open_pool()
+        for concurrent in (False, True):
+            elapsed = await run_burst(lookups, users, concurrent)
+            label = f"{'pooled' if pooled else 'per-call'} {'burst' if concurrent else 'sequential'}"
+            print(f"{label:<24}{elapsed:>12.3f}{elapsed / lookups * 1000:>18.3f}")
+    await DatabaseManager.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.lookups, args.users))
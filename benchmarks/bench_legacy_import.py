@@ -0,0 +1,74 @@
+"""Import time and peak RSS of the streaming legacy JSON importer.
+
+Writes a synthetic workout_data.json (1M workout rows by default) into a
+throwaway DATA_DIR and runs DatabaseManager.run_migrations over it.
+
+    python benchmarks/bench_legacy_import.py [--rows 1000000] [--users 1000]
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="danbot-bench-")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import DatabaseManager  # noqa: E402
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def write_legacy_file(path: str, rows: int, users: int):
+    """Stream a legacy workout_data.json with ``rows`` workouts spread across ``users``."""
+    per_user = rows // users
+    origin = datetime(2015, 1, 1, 7, 30)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write('{"user_goals": {')
+        fh.write(", ".join(f'"{100000 + uid}": {1 + uid % 5}' for uid in range(users)))
+        fh.write('}, "user_workouts": {')
+        for uid in range(users):
+            if uid:
+                fh.write(", ")
+            stamps = (origin + timedelta(hours=6 * i, seconds=uid) for i in range(per_user))
+            fh.write(f'"{100000 + uid}": [' + ", ".join(f'"{ts.isoformat()}"' for ts in stamps) + "]")
+        fh.write('}, "pending_reactions": {}}')
+
+
+async def main(rows: int, users: int):
+    path = os.path.join(os.environ["DATA_DIR"], "workout_data.json")
+    start = time.perf_counter()
+    write_legacy_file(path, rows, users)
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    print(f"Generated {rows} workout rows ({size_mb:.1f} MiB) in {time.perf_counter() - start:.1f}s")
+
+    await DatabaseManager.open_pool()
+    await DatabaseManager.initialize()
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    await DatabaseManager.run_migrations()
+    elapsed = time.perf_counter() - start
+    await DatabaseManager.close_pool()
+
+    print(f"\n{'rows':<20}{rows:>12}")
+    print(f"{'import time (s)':<20}{elapsed:>12.2f}")
+    print(f"{'rows/s':<20}{rows / elapsed:>12.0f}")
+    print(f"{'peak RSS (MiB)':<20}{peak_rss_mb():>12.1f}")
+    print(f"{'RSS before (MiB)':<20}{baseline:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.users))
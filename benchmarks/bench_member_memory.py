@@ -0,0 +1,96 @@
+"""Compare resident memory of the default member cache with LOW_MEMORY_MODE.
+
+Each mode runs in a fresh interpreter that builds one synthetic guild of
+--members members, the way the gateway delivers it (GUILD_CREATE plus member
+chunks), into a client configured like bot.py. It then resolves the top 15
+members the way /server_wrapped does, with the member query answered locally
+instead of over the gateway. Reported are the RSS growth over an idle client
+and the number of members held in memory.
+
+    python benchmarks/bench_member_memory.py [--members 100000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import asyncio, gc, json, sys
+import discord
+from members import MemberResolver, client_options
+
+GUILD_ID = 1 << 40
+
+def rss_bytes():
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * 4096
+
+def member_payload(i):
+    return {
+        "user": {"id": str(GUILD_ID + i), "username": f"member{i}", "global_name": f"Member {i}",
+                 "discriminator": "0", "avatar": f"{i:032x}"},
+        "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0,
+    }
+
+class SyntheticGuild(discord.Guild):
+    async def fetch_member(self, user_id):
+        await asyncio.sleep(0)
+        return discord.Member(data=member_payload(user_id - GUILD_ID), guild=self, state=self._state)
+
+    async def query_members(self, *, user_ids, limit, cache):
+        await asyncio.sleep(0)
+        return [discord.Member(data=member_payload(user_id - GUILD_ID), guild=self, state=self._state) for user_id in user_ids]
+
+async def main(count):
+    intents = discord.Intents.default()
+    intents.members = True
+    client = discord.Client(intents=intents, **client_options())
+    gc.collect()
+    before = rss_bytes()
+
+    payload = {"id": str(GUILD_ID), "name": "Synthetic", "owner_id": str(GUILD_ID), "member_count": count,
+               "roles": [], "channels": [], "members": [member_payload(i) for i in range(count)]}
+    guild = SyntheticGuild(data=payload, state=client._connection)
+    del payload
+    gc.collect()
+
+    resolver = MemberResolver(client)
+    top = [GUILD_ID + i for i in range(0, count, max(1, count // 15))][:15]
+    resolved = await resolver.resolve_many(guild, top)
+    gc.collect()
+    print("MEMBER_MEMORY " + json.dumps({
+        "rss_growth": rss_bytes() - before,
+        "cached_members": len(guild._members),
+        "resolver_entries": len(resolver),
+        "resolved": sum(m is not None for m in resolved.values()),
+    }))
+
+asyncio.run(main(int(sys.argv[1])))
+"""
+
+
+def run(members: int, low_memory: bool) -> dict:
+    env = dict(os.environ, LOW_MEMORY_MODE="1" if low_memory else "0")
+    proc = subprocess.run([sys.executable, "-c", CHILD, str(members)], cwd=ROOT, env=env, capture_output=True, text=True, timeout=600)
+    for line in proc.stdout.splitlines():
+        if line.startswith("MEMBER_MEMORY "):
+            return json.loads(line.split(" ", 1)[1])
+    raise RuntimeError(f"Benchmark run failed (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+
+
+def main(members: int):
+    print(f"Synthetic guild with {members} members:")
+    print(f"{'mode':<14}{'RSS growth':>14}{'members cached':>17}{'resolver':>10}")
+    for label, low_memory in (("default", False), ("low-memory", True)):
+        r = run(members, low_memory)
+        print(f"{label:<14}{r['rss_growth'] / 1024 / 1024:>11.1f} MiB{r['cached_members']:>17}{r['resolver_entries']:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=100_000)
+    main(parser.parse_args().members)
@@ -0,0 +1,85 @@
+"""Compare concurrent chart rendering on threads against the render process pool.
+
+Fires --charts renders of the /server_wrapped 15-bar chart (with avatars) at
+once, first the old way (asyncio.to_thread calling pyplot directly) and then
+through RenderService with 1, 2 and --workers worker processes. Reported are
+the wall time, charts per second, the worst event loop lag seen by a 10 ms
+heartbeat while the burst ran, and renders that failed (pyplot is not
+thread-safe, so the thread mode can raise or mix up figures).
+
+    python benchmarks/bench_render_pool.py [--charts 24] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import charts  # noqa: E402
+from render import RenderService  # noqa: E402
+
+AVATAR_SIZE = 36
+
+
+def chart_args(i: int) -> tuple:
+    names = [f"Member {i}-{n}" for n in range(15)]
+    values = [100 + 37 * n for n in range(15)]
+    avatars = [(AVATAR_SIZE, bytes([(n * 16) % 256, 80, 160, 255]) * AVATAR_SIZE * AVATAR_SIZE) for n in range(15)]
+    colors = [f"#{(n * 16) % 256:02x}50a0" for n in range(15)]
+    return names, values, avatars, colors, "Message Counts by User", "Messages"
+
+
+async def heartbeat(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - started - 0.01)
+
+
+async def burst(render, count: int) -> dict:
+    lags, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(render(charts.bar_chart, "wrapped", *chart_args(i)) for i in range(count)), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    failed = sum(isinstance(r, BaseException) or not r.startswith(b"\x89PNG") for r in results)
+    return {"seconds": elapsed, "per_second": count / elapsed, "max_lag_ms": max(lags, default=0) * 1000, "failed": failed}
+
+
+async def main(count: int, max_workers: int):
+    print(f"{count} concurrent 15-bar charts on {os.cpu_count()} CPU(s):")
+    print(f"{'mode':<16}{'wall (s)':>10}{'charts/s':>10}{'max loop lag (ms)':>19}{'failed':>8}")
+
+    async def threaded(renderer, *args):
+        return await asyncio.to_thread(renderer, *args)
+
+    # Warm the imports first so neither mode pays for them
+    charts.warm()
+    modes = [("threads", threaded, None)]
+    for workers in sorted({1, 2, max_workers}):
+        modes.append((f"pool x{workers}", None, workers))
+
+    for label, render, workers in modes:
+        service = None
+        if workers is not None:
+            service = RenderService(workers=workers)
+            service.start()
+            await service.warm()
+            render = service.render
+        r = await burst(render, count)
+        print(f"{label:<16}{r['seconds']:>10.2f}{r['per_second']:>10.1f}{r['max_lag_ms']:>19.0f}{r['failed']:>8}")
+        if service is not None:
+            service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+    asyncio.run(main(args.charts, args.workers))
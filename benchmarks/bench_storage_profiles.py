@@ -0,0 +1,78 @@
+"""Mixed read/write throughput of the pooled database under each storage profile.
+
+Writers log workouts (one INSERT + COMMIT each, like WorkoutTracker.on_message)
+while readers count a user's workouts, all against the same pool.
+
+    python benchmarks/bench_storage_profiles.py [--seconds 3] [--writers 2] [--readers 8]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="danbot-bench-")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import DatabaseManager, STORAGE_PROFILES  # noqa: E402
+
+USERS = 100
+
+
+async def writer(stop_at: float, worker_id: int) -> int:
+    ops = 0
+    while time.perf_counter() < stop_at:
+        async with await DatabaseManager.get_connection() as conn:
+            await conn.execute(
+                "INSERT OR IGNORE INTO workout_history (user_id, timestamp) VALUES (?, ?);",
+                (ops % USERS, worker_id * 1_000_000_000 + ops),
+            )
+            await conn.commit()
+        ops += 1
+    return ops
+
+
+async def reader(stop_at: float) -> int:
+    ops = 0
+    while time.perf_counter() < stop_at:
+        async with await DatabaseManager.get_connection(readonly=True) as conn:
+            async with conn.execute("SELECT COUNT(*) FROM workout_history WHERE user_id = ?;", (ops % USERS,)) as cursor:
+                await cursor.fetchone()
+        ops += 1
+    return ops
+
+
+async def run_profile(profile: str, seconds: float, writers: int, readers: int):
+    DatabaseManager.configure(os.path.join(os.environ["DATA_DIR"], f"{profile}.db"), storage_profile=profile)
+    await DatabaseManager.open_pool()
+    await DatabaseManager.initialize()
+
+    stop_at = time.perf_counter() + seconds
+    results = await asyncio.gather(
+        *(writer(stop_at, i) for i in range(writers)),
+        *(reader(stop_at) for _ in range(readers)),
+    )
+    await DatabaseManager.close_pool()
+    return sum(results[:writers]) / seconds, sum(results[writers:]) / seconds
+
+
+async def main(seconds: float, writers: int, readers: int):
+    rows = []
+    for profile in STORAGE_PROFILES:
+        rows.append((profile, *await run_profile(profile, seconds, writers, readers)))
+
+    print(f"\n{writers} writers / {readers} readers for {seconds:.0f}s per profile")
+    print(f"{'profile':<12}{'writes/s':>12}{'reads/s':>12}")
+    for profile, writes, reads in rows:
+        print(f"{profile:<12}{writes:>12.0f}{reads:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.seconds, args.writers, args.readers))
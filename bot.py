@@ -1,9 +1,19 @@
-import os
-from pathlib import Path
+from startup import HEAVY_MODULES, PREWARM_IMPORTS, STARTUP, prewarm_imports
 
-import discord
-from discord.ext import commands
-from dotenv import load_dotenv
+with STARTUP.phase("import discord"):
+    import ast
+    import asyncio
+    import hashlib
+    import importlib
+    import json
+    import os
+    import sys
+    import time
+    from pathlib import Path
+
+    import discord
+    from discord.ext import commands
+    from dotenv import load_dotenv
 
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN") or os.getenv("BOT_TOKEN")
@@ -12,10 +22,23 @@ if not TOKEN:
         "Missing Discord token. Set DISCORD_TOKEN or BOT_TOKEN in the environment."
     )
 
-from database import DatabaseManager
+with STARTUP.phase("import database"):
+    from avatars import AvatarService
+    from database import DatabaseManager
+    from http_client import HttpClient
+    from repositories import BotStateRepository
+    from members import LOW_MEMORY_MODE, MemberResolver, client_options
+    from metrics import HTTP_STATS, METRICS_ENABLED, MetricsServer
+    from render import WORKER_MODULES, RenderService
+    from shards import SHARDED, shard_options
+    from watchdog import LOOP_STALL_THRESHOLD_MS, LoopWatchdog
 
 COMMAND_PREFIX = os.getenv("COMMAND_PREFIX", "!")
 ENABLED_COGS = os.getenv("ENABLED_COGS")
+# Sync even if the command tree looks unchanged
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC", "").strip().lower() in ("1", "true", "yes", "on")
+# Register commands in this guild only (they update instantly there) instead of globally
+DEV_GUILD_ID = os.getenv("DEV_GUILD_ID")
 
 intents = discord.Intents.default()
 intents.members = True
@@ -23,42 +46,210 @@ intents.messages = True
 intents.message_content = True
 
 
-class DanBot(commands.Bot):
-    async def setup_hook(self):
-        # Initialize the database & run schema migrations
-        await DatabaseManager.initialize()
-        await DatabaseManager.run_migrations()
+def read_cog_source(path: Path) -> tuple:
+    """Return (modules the cog imports at top level, its COG_DEPENDENCIES) without executing it.
 
-        await self.load_cogs()
-        await self.tree.sync()
+    The cog module itself must only be run once, by load_extension, so its
+    imports and dependencies are read from the source instead.
+    """
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    imports, declared = [], ()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            imports.append(node.module)
+        elif isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "COG_DEPENDENCIES" for t in node.targets):
+            declared = tuple(ast.literal_eval(node.value))
+    return imports, declared
+
+
+def cog_dependency_order(names: list, declared: dict) -> dict:
+    """Return {cog: enabled cogs it waits for}, from each cog's declared COG_DEPENDENCIES.
+
+    Dependencies that are not enabled are ignored, and so are those that would
+    close a cycle, with a warning, so every cog still gets loaded.
+    """
+    dependencies = {}
+    for name in names:
+        dependencies[name] = [d for d in declared.get(name, ()) if d in names and d != name]
+
+    def reaches(start, target, seen):
+        for dep in dependencies[start]:
+            if dep == target or (dep not in seen and not seen.add(dep) and reaches(dep, target, seen)):
+                return True
+        return False
+
+    for name in names:
+        for dep in list(dependencies[name]):
+            if reaches(dep, name, set()):
+                print(f"[Startup] Ignoring cyclic cog dependency {name} -> {dep}")
+                dependencies[name].remove(dep)
+    return dependencies
+
+
+def command_tree_fingerprint(tree: discord.app_commands.CommandTree, guild: discord.abc.Snowflake = None) -> str:
+    """Stable hash of the command payloads ``tree.sync(guild=guild)`` would upload."""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda c: (c.get("type", 1), c["name"]),
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class DanBot(commands.AutoShardedBot if SHARDED else commands.Bot):
+    _prewarm_task = None
+    metrics = None
+    watchdog = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Cogs look members up through this so they also work without the member cache
+        self.member_resolver = MemberResolver(self)
+        # Shared pooled session for everything that is not the Discord API; opened in prepare()
+        self.http_client = HttpClient()
+        # Avatar sprites for the charts, cached in memory and under DATA_DIR/avatars
+        self.avatars = AvatarService(self.http_client)
+        # Worker processes that draw the charts; started in prepare()
+        self.renderer = RenderService()
+
+    async def setup_hook(self):
+        await self.prepare()
+        # Started after the cogs so their one-off load work is not reported as stalls
+        if LOOP_STALL_THRESHOLD_MS > 0:
+            self.watchdog = LoopWatchdog()
+            self.watchdog.start()
+        if METRICS_ENABLED:
+            self.metrics = MetricsServer(self)
+            await self.metrics.start()
+        with STARTUP.phase("tree.sync"):
+            await self.sync_commands()
         for command in self.tree.get_commands():
             command.dm_permission = True
 
+    async def prepare(self):
+        """Everything setup_hook does before talking to Discord: database, HTTP client and cogs."""
+        await self.http_client.open()
+        self.renderer.start()
+        # Open the connection pool, initialize the database & run schema migrations
+        with STARTUP.phase("db pool"):
+            await DatabaseManager.open_pool()
+        with STARTUP.phase("db schema"):
+            await DatabaseManager.initialize()
+        with STARTUP.phase("legacy migrations"):
+            await DatabaseManager.run_migrations()
+            # In partitioned mode, move guild data out of the shared database into per-guild files
+            await DatabaseManager.split_into_partitions()
+
+        await self.load_cogs()
+
+    async def sync_commands(self):
+        """Upload the command tree, unless it matches what the last successful sync sent."""
+        guild = discord.Object(id=int(DEV_GUILD_ID)) if DEV_GUILD_ID else None
+        if guild is not None:
+            self.tree.copy_global_to(guild=guild)
+        scope = f"guild {guild.id}" if guild is not None else "global"
+        # Keyed by application too, so switching bot tokens still syncs
+        key = f"command_tree:{self.application_id}:{scope}"
+        fingerprint = command_tree_fingerprint(self.tree, guild)
+
+        if not FORCE_COMMAND_SYNC and await BotStateRepository.get(key) == fingerprint:
+            print(f"[Startup] Command tree unchanged ({scope}, {fingerprint[:12]}); skipping sync")
+            return
+        synced = await self.tree.sync(guild=guild)
+        await BotStateRepository.set(key, fingerprint)
+        print(f"[Startup] Synced {len(synced)} application commands ({scope}, {fingerprint[:12]})")
+
     async def load_cogs(self):
+        """Load the enabled cogs concurrently, each one after the cogs it lists in COG_DEPENDENCIES."""
         cogs_path = Path(__file__).resolve().parent / "cogs"
         default_cogs = sorted(
             p.stem for p in cogs_path.glob("*.py") if p.is_file() and p.name != "__init__.py"
         )
         enabled = ENABLED_COGS.split(",") if ENABLED_COGS else default_cogs
         enabled = [c.strip() for c in enabled if c.strip()]
-
-        for cog_name in sorted(enabled):
+        names = []
+        for cog_name in sorted(set(enabled)):
             if cog_name not in default_cogs:
                 print(f"Skipping unknown cog: {cog_name}")
                 continue
+            names.append(cog_name)
+
+        # Import what the cogs import on worker threads in parallel, so that load_extension,
+        # which runs each cog module exactly once on the loop, finds them in sys.modules
+        with STARTUP.phase("cog imports"):
+            sources = await asyncio.gather(
+                *(asyncio.to_thread(read_cog_source, cogs_path / f"{name}.py") for name in names), return_exceptions=True
+            )
+            sources = {name: src for name, src in zip(names, sources) if not isinstance(src, BaseException)}
+            imports = sorted({m for imported, _ in sources.values() for m in imported if m not in sys.modules})
+            # Failures surface again, with the cog's name, when load_extension imports the cog
+            await asyncio.gather(*(asyncio.to_thread(importlib.import_module, m) for m in imports), return_exceptions=True)
+        dependencies = cog_dependency_order(names, {name: declared for name, (_, declared) in sources.items()})
+
+        loaded = {name: asyncio.get_running_loop().create_future() for name in names}
+        timings = {}
+        errors = {}
+
+        async def load(cog_name):
+            # Dependencies are optional: wait until they are loaded or have failed, then go ahead either way
+            for dependency in dependencies[cog_name]:
+                await loaded[dependency]
+            start = time.perf_counter()
             try:
-                await self.load_extension(f"cogs.{cog_name}")
-                print(f"Loaded cog: {cog_name}")
+                with STARTUP.phase(f"cog {cog_name}"):
+                    await self.load_extension(f"cogs.{cog_name}")
             except Exception as exc:
-                print(f"Failed to load cog {cog_name}: {exc}")
+                errors[cog_name] = exc
+            finally:
+                timings[cog_name] = time.perf_counter() - start
+                loaded[cog_name].set_result(cog_name not in errors)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(load(name) for name in names))
+        print(f"[Startup] Loaded {len(names) - len(errors)}/{len(names)} cogs in {time.perf_counter() - started:.2f}s:")
+        for cog_name, seconds in sorted(timings.items(), key=lambda t: t[1], reverse=True):
+            status = f"FAILED: {errors[cog_name]}" if cog_name in errors else "ok"
+            print(f"  {cog_name:<18}{seconds * 1000:>8.1f} ms  {status}")
+
+    async def close(self):
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        if self.metrics is not None:
+            await self.metrics.stop()
+        await super().close()
+        await self.http_client.close()
+        self.renderer.close()
+        await DatabaseManager.close_pool()
 
     async def on_ready(self):
         print(f"Logged in as {self.user} ({self.user.id})")
+        if LOW_MEMORY_MODE:
+            print("[Members] Low-memory mode: member and message caches are off; members are fetched on demand")
+        if SHARDED:
+            shard_ids = self.shard_ids if self.shard_ids is not None else range(self.shard_count or 0)
+            print(f"[Shards] Running shard(s) {', '.join(map(str, shard_ids))} of {self.shard_count} with {len(self.guilds)} guilds")
+        if STARTUP.ready_after is None:
+            ready_after = STARTUP.mark_ready()
+            print(f"[Startup] Ready {ready_after:.2f}s after launch (slowest phases: {STARTUP.summary()})")
+            if PREWARM_IMPORTS:
+                self._prewarm_task = asyncio.create_task(self.prewarm())
         print("DanBot is ready.")
 
+    async def prewarm(self):
+        modules = HEAVY_MODULES
+        if self.renderer.running:
+            started = time.perf_counter()
+            await self.renderer.warm()
+            print(f"[Startup] Started {self.renderer.workers} render worker(s) in {time.perf_counter() - started:.2f}s")
+            modules = tuple(name for name in HEAVY_MODULES if name not in WORKER_MODULES)
+        seconds = await prewarm_imports(modules)
+        print(f"[Startup] Pre-imported plotting and media libraries in {seconds:.2f}s")
+
 
-bot = DanBot(command_prefix=COMMAND_PREFIX, intents=intents)
+# Discord REST calls are only traced when the metrics endpoint is on
+http_options = {"http_trace": HTTP_STATS.trace_config()} if METRICS_ENABLED else {}
+bot = DanBot(command_prefix=COMMAND_PREFIX, intents=intents, **shard_options(), **client_options(), **http_options)
 
 if __name__ == "__main__":
     bot.run(TOKEN)
- 
\ No newline at end of file
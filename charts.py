@@ -0,0 +1,390 @@
+"""Chart renderers that take plain data and return PNG bytes.
+
+Every function here is self-contained: names, values, colours and avatars
+come in as plain Python data (avatars as ``(size, raw RGBA bytes)`` from
+``Sprite.rgba``) and the finished image goes out as PNG bytes. That lets
+``RenderService`` run them in its worker processes, where pyplot's global
+figure state belongs to one render at a time.
+
+The avatar bar charts of /server_wrapped, /wordle_stats and the workout
+/leaderboard all go through ``bar_chart``: one ``BarChart`` renderer with a
+``BarStyle`` template per chart, drawn on a bare ``Figure``/Agg canvas.
+"""
+import os
+from functools import lru_cache
+from io import BytesIO
+from typing import NamedTuple
+
+from startup import pyplot
+
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "arial.ttf")
+
+CONNECTION_COLORS = {
+    "sibling": "#3B82F6",       # Modern blue
+    "friend": "#10B981",        # Modern emerald green
+    "roommate": "#F59E0B",      # Modern orange
+    "partner": "#EF4444",       # Modern soft red
+    "acquaintance": "#6B7280",  # Modern gray
+    "cousin": "#06B6D4"         # Modern cyan
+}
+
+
+def warm():
+    """Import the plotting stack, register the bundled font and draw one throwaway figure."""
+    plt = pyplot()
+    import matplotlib.offsetbox  # noqa: F401
+    from matplotlib import font_manager
+    from PIL import Image  # noqa: F401
+
+    if os.path.exists(FONT_PATH):
+        font_manager.fontManager.addfont(FONT_PATH)
+    fig, ax = plt.subplots(figsize=(2, 2))
+    ax.barh([0], [1])
+    ax.set_title("warm-up")
+    fig.savefig(BytesIO(), format="png")
+    plt.close(fig)
+    # Builds each style's BarChart and fills the text metric cache
+    for style in BAR_STYLES:
+        bar_chart(style, ["warm-up"], [1], [None], [None], "warm-up", "warm-up")
+    return os.getpid()
+
+
+def _avatar_image(avatar):
+    from PIL import Image
+
+    size, data = avatar
+    return Image.frombytes("RGBA", (size, size), data)
+
+
+def _png(fig, **kwargs) -> bytes:
+    buf = BytesIO()
+    fig.savefig(buf, format="png", **kwargs)
+    return buf.getvalue()
+
+
+class BarStyle(NamedTuple):
+    """Look of an avatar bar chart; sizes in points, figure sizes in inches."""
+    bar_height: float = 0.6
+    top_down: bool = True  # first entry at the top; False stacks them upwards from the bottom
+    width: float = 10
+    row_height: float = 0.6
+    min_height: float = 3
+    dpi: int = 100
+    background: str = "#2C2F33"
+    text_color: str = "#FFFFFF"
+    title_size: float = 16
+    title_pad: float = 15
+    label_size: float = 12
+    name_size: float = 12
+    tick_size: float = 10
+    value_size: float = 12
+    y_label: str = ""
+    avatar_zoom: float = 1.0
+    avatar_align: float = 0.5  # 0 puts the avatar's left edge at the anchor, 0.5 its centre
+    avatar_gap: float = 0.03  # anchor distance after the bar, as a fraction of the largest value
+    value_gap: float = 0.08  # value label distance after the bar when there is an avatar
+    x_margin: float = 1.05  # x axis reaches at least this times the largest value
+    ring: bool = False  # outline avatars in their bar colour
+
+
+# /server_wrapped: bottom-up top 15 with ringed avatars
+WRAPPED = BarStyle(bar_height=0.5, top_down=False, min_height=6, title_size=18, label_size=14, tick_size=12,
+                   y_label="Users", avatar_zoom=0.7, avatar_align=0.0, avatar_gap=0.02, x_margin=1.15, ring=True)
+# /wordle_stats leaderboards
+LEADERBOARD = BarStyle()
+# /leaderboard (workouts): taller minimum and a sharper image
+WORKOUT = LEADERBOARD._replace(min_height=4, dpi=150)
+
+BAR_STYLES = {"wrapped": WRAPPED, "leaderboard": LEADERBOARD, "workout": WORKOUT}
+
+# Matplotlib's own spacing around ticks and axis labels, and a margin around the figure
+TICK_SPACE = 7.0
+LABEL_PAD = 4.0
+OUTER_PAD = 8.0
+
+_metrics = None  # RendererAgg used only to measure text
+
+
+@lru_cache(maxsize=4096)
+def text_size(text: str, size: float) -> tuple:
+    """(width, height) of ``text`` at ``size`` points, as the Agg backend would draw it."""
+    global _metrics
+    if _metrics is None:
+        from matplotlib.backends.backend_agg import RendererAgg
+        _metrics = RendererAgg(1, 1, 72)  # at 72 dpi a pixel is a point
+    width, height, descent = _metrics.get_text_width_height_descent(text, _font(size), ismath=False)
+    return width, height
+
+
+@lru_cache(maxsize=None)
+def _font(size: float):
+    from matplotlib.font_manager import FontProperties
+
+    return FontProperties(size=size)
+
+
+@lru_cache(maxsize=None)
+def _ring_mask(size: int, width: int):
+    """Boolean mask of a ``width`` px circle outline on a ``size`` px square."""
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    mask = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size - 1, size - 1), outline=255, width=width)
+    return np.asarray(mask) > 0
+
+
+class BarChart:
+    """Horizontal avatar bar chart drawn straight onto an Agg canvas with a precomputed layout.
+
+    Margins come from measured text sizes, so there is no ``tight_layout`` or
+    ``bbox_inches="tight"`` pass. Avatars are pasted as figure images at
+    pixel positions worked out from the same layout.
+    """
+
+    def __init__(self, style: BarStyle):
+        self.style = style
+        # Height above the axes for the title, and below for the tick labels without the x label
+        self.top = OUTER_PAD + text_size("Ay", style.title_size)[1] + style.title_pad
+        self.bottom = OUTER_PAD + text_size("0", style.tick_size)[1] + TICK_SPACE
+        self.y_label_space = text_size("Ay", style.label_size)[1] + LABEL_PAD if style.y_label else 0.0
+
+    def render(self, names, values, avatars, colors, title, x_label, default_color="#10B981") -> bytes:
+        import numpy as np
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from PIL import Image
+
+        style = self.style
+        count = len(names)
+        max_val = max(values) if values else 1
+        max_val = max_val or 1
+        colors = [color or default_color for color in colors]
+
+        # Layout in points
+        fig_w = style.width * 72
+        fig_h = max(style.min_height, count * style.row_height) * 72
+        left = OUTER_PAD + self.y_label_space + max((text_size(n, style.name_size)[0] for n in names), default=0) + TICK_SPACE
+        bottom = self.bottom + text_size(x_label, style.label_size)[1] + LABEL_PAD
+        ax_w = fig_w - left - OUTER_PAD
+        ax_h = fig_h - bottom - self.top
+        avatar_pt = [avatar[0] * style.avatar_zoom if avatar is not None else 0 for avatar in avatars]
+
+        # Widen the x axis until every avatar and value label fits inside it
+        x_max = max_val * style.x_margin
+        for value, avatar, shown in zip(values, avatar_pt, avatars):
+            text_x = value + max_val * (style.value_gap if shown is not None else 0.02)
+            needed = text_size(str(value), style.value_size)[0] + LABEL_PAD
+            x_max = max(x_max, text_x * ax_w / max(ax_w - needed, 1))
+            if shown is not None:
+                avatar_end = value + max_val * style.avatar_gap
+                x_max = max(x_max, avatar_end * ax_w / max(ax_w - avatar * (1 - style.avatar_align), 1))
+
+        fig = Figure(figsize=(fig_w / 72, fig_h / 72), dpi=style.dpi, facecolor=style.background)
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_axes((left / fig_w, bottom / fig_h, ax_w / fig_w, ax_h / fig_h), facecolor=style.background)
+
+        rows = [count - 1 - i if style.top_down else i for i in range(count)]
+        ax.barh(rows, values, color=colors, height=style.bar_height, edgecolor="none")
+        ax.set_xlim(0, x_max)
+        ax.set_ylim(-0.5, max(count, 1) - 0.5)
+        # Names as plain text beside the axis: much cheaper to draw than one tick object per row
+        ax.set_yticks([])
+        name_x = -TICK_SPACE / ax_w
+        for row, name in zip(rows, names):
+            ax.text(name_x, row, name, transform=ax.get_yaxis_transform(), ha="right", va="center",
+                    color=style.text_color, fontsize=style.name_size)
+        ax.tick_params(axis="x", colors=style.text_color, labelsize=style.tick_size)
+        ax.set_xlabel(x_label, color=style.text_color, fontsize=style.label_size)
+        if style.y_label:
+            fig.text(OUTER_PAD / fig_w, (bottom + ax_h / 2) / fig_h, style.y_label, rotation=90, ha="left", va="center",
+                     color=style.text_color, fontsize=style.label_size)
+        ax.set_title(title, color=style.text_color, fontsize=style.title_size, pad=style.title_pad)
+
+        px = style.dpi / 72
+        for value, row, avatar, color, size_pt in zip(values, rows, avatars, colors, avatar_pt):
+            if avatar is None:
+                ax.text(value + max_val * 0.02, row, str(value), va="center", color=style.text_color, fontsize=style.value_size)
+                continue
+            ax.text(value + max_val * style.value_gap, row, str(value), va="center", color=style.text_color, fontsize=style.value_size)
+            size, data = avatar
+            image = np.frombuffer(data, dtype=np.uint8).reshape(size, size, 4)
+            if style.ring:
+                image = image.copy()
+                image[_ring_mask(size, 2)] = (*_rgb(color), 255)
+            side = max(1, round(size_pt * px))
+            if side != size:
+                image = np.asarray(Image.fromarray(image).resize((side, side), Image.Resampling.BICUBIC))
+            # Anchor point in figure pixels, then the image's lower-left corner
+            anchor_x = (left + (value + max_val * style.avatar_gap) / x_max * ax_w) * px
+            anchor_y = (bottom + (row + 0.5) / count * ax_h) * px
+            fig.figimage(image, xo=round(anchor_x - side * style.avatar_align), yo=round(anchor_y - side / 2), origin="upper")
+
+        buf = BytesIO()
+        canvas.print_png(buf)
+        return buf.getvalue()
+
+
+def _rgb(color: str) -> tuple:
+    color = color.lstrip("#")
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+_bar_charts = {}
+
+
+def bar_chart(style: str, names, values, avatars, colors, title, x_label, default_color="#10B981") -> bytes:
+    """Render an avatar bar chart in one of the ``BAR_STYLES`` templates; each worker keeps one BarChart per style."""
+    chart = _bar_charts.get(style)
+    if chart is None:
+        chart = _bar_charts[style] = BarChart(BAR_STYLES[style])
+    return chart.render(names, values, avatars, colors, title, x_label, default_color)
+
+
+def activity_heatmap(active_hours) -> bytes:
+    """Messages per hour of the day as a blue-to-red gradient line."""
+    plt = pyplot()
+    import matplotlib.colors as mcolors
+    import numpy as np
+    from matplotlib.collections import LineCollection
+
+    max_val = max(active_hours) if active_hours else 1
+    hours = range(24)
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    background_color = "#2C2F33"  # Discord darker background
+    fig.patch.set_facecolor(background_color)
+    ax.set_facecolor(background_color)
+
+    # Gradient color map (from blue to red)
+    cmap = mcolors.LinearSegmentedColormap.from_list("activity_gradient", ["blue", "red"])
+
+    points = np.array([hours, active_hours]).T.reshape(-1, 1, 2)
+    segments = np.concatenate([points[:-1], points[1:]], axis=1)
+    lc = LineCollection(segments, cmap=cmap, norm=plt.Normalize(0, max_val))
+    lc.set_array(np.array(active_hours))
+    lc.set_linewidth(3)
+
+    ax.add_collection(lc)
+    ax.plot(hours, active_hours, color="white", alpha=0.2, zorder=0)
+
+    ax.set_title("Activity by Hour (EST)", color="white", fontsize=16)
+    ax.set_xlabel("Hour of the Day", color="white")
+    ax.set_ylabel("Messages", color="white")
+    ax.tick_params(axis="both", colors="white")
+    ax.set_xticks(hours)
+    ax.set_xticklabels([f"{hour}:00" for hour in hours], rotation=45, color="white")
+
+    y_step = max(1, max_val // 10)
+    ax.set_yticks(range(0, max_val + 1, y_step))
+
+    plt.tight_layout()
+    data = _png(fig, transparent=False, facecolor=fig.get_facecolor())
+    plt.close(fig)
+    return data
+
+
+def word_cloud(frequencies) -> bytes:
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud(
+        width=1024,
+        height=1024,
+        background_color="black",
+        colormap="Set3"
+    ).generate_from_frequencies(frequencies)
+    buf = BytesIO()
+    wordcloud.to_image().save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def connection_chart(edges, labels, avatars, guild_name) -> bytes:
+    """Kamada-Kawai graph of ``edges`` ((user1, user2, connection) tuples) with avatar nodes."""
+    plt = pyplot()
+    import matplotlib.patches as mpatches
+    import networkx as nx
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.offsetbox import AnnotationBbox, OffsetImage
+    from PIL import Image, ImageDraw
+
+    G = nx.Graph()
+    for user1, user2, connection in edges:
+        G.add_node(user1)
+        G.add_node(user2)
+        G.add_edge(user1, user2, connection=connection)
+    pos = nx.kamada_kawai_layout(G)
+
+    edge_colors = []
+    for (_, _, data) in G.edges(data=True):
+        color = CONNECTION_COLORS.get(data.get("connection", "").lower(), "#6B7280")
+        edge_colors.append(color)
+
+    fig, ax = plt.subplots(figsize=(16, 12), facecolor='none')
+    ax.set_facecolor('none')
+
+    # Draw curved edges with elegant styling
+    nx.draw_networkx_edges(
+        G, pos,
+        edge_color=edge_colors,
+        width=6,
+        ax=ax,
+        arrows=True,
+        arrowstyle='-',
+        connectionstyle='arc3, rad=0.15',
+        alpha=0.8
+    )
+
+    nx.draw_networkx_nodes(G, pos, node_color='none', ax=ax)
+
+    # Load font
+    font = FontProperties(fname=FONT_PATH, size=10)
+
+    # Draw avatars with PIL circular frames and glowing rings
+    for node, (x, y) in pos.items():
+        avatar = avatars.get(node)
+        if avatar is not None:
+            try:
+                circle_avatar = _avatar_image(avatar)
+                size = circle_avatar.size
+
+                # Draw a border circle around avatar
+                border_img = Image.new("RGBA", (size[0]+6, size[1]+6), (0, 0, 0, 0))
+                b_draw = ImageDraw.Draw(border_img)
+                b_draw.ellipse((0, 0, size[0]+5, size[1]+5), fill=None, outline="#4B5563", width=3) # Slate gray border
+                border_img.paste(circle_avatar, (3, 3), circle_avatar)
+
+                imagebox = OffsetImage(border_img, zoom=1)
+                ab = AnnotationBbox(imagebox, (x, y), frameon=False)
+                ax.add_artist(ab)
+            except Exception as e:
+                print(f"[ConnectionChart] Error styling avatar for node {node}: {e}")
+
+        # Draw labels with glowing round bounds below the avatar
+        ax.text(
+            x, y - 0.12, labels[node],
+            fontproperties=font,
+            fontsize=11,
+            ha='center', va='top',
+            color='white',
+            bbox=dict(facecolor='#111827', edgecolor='#374151', alpha=0.9, boxstyle='round,pad=0.3', lw=1.5)
+        )
+
+    # Build elegant legend
+    patches = [mpatches.Patch(color=color, label=key.capitalize()) for key, color in CONNECTION_COLORS.items()]
+    legend = ax.legend(
+        handles=patches,
+        loc="upper center",
+        bbox_to_anchor=(0.5, -0.05),
+        ncol=3,
+        frameon=False,
+        prop=font
+    )
+    for text in legend.get_texts():
+        text.set_color("white")
+
+    plt.title(f"{guild_name} Connection Chart", fontsize=16, color='white', pad=25, fontproperties=font)
+    plt.axis('off')
+
+    data = _png(fig, transparent=True, bbox_inches='tight', dpi=180)
+    plt.close(fig)
+    return data
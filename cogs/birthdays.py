@@ -3,13 +3,13 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 from datetime import datetime, timedelta
-import aiohttp
 from urllib.parse import quote, urlencode
 import random
 import re
 import os
 import json
-from database import DatabaseManager
+from repositories import BirthdayRepository
+from shards import is_primary, owns_channel
 
 class BirthdayCog(commands.Cog):
     def __init__(self, bot):
@@ -25,13 +25,10 @@ class BirthdayCog(commands.Cog):
         try:
             month, day = birthday_str.split("-")
             url = f"https://en.wikipedia.org/api/rest_v1/feed/onthisday/births/{int(month)}/{int(day)}"
-            headers = {"User-Agent": "DanBot/1.0 (https://github.com/thenotoriousJeremy/DanBot)"}
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, timeout=10) as r:
-                    if r.status != 200:
-                        return None
-                    data = await r.json()
+            r = await self.bot.http_client.get(url, read="json")
+            if r.status != 200:
+                return None
+            data = r.body
 
             # Collect page entries
             pages = []
@@ -50,11 +47,10 @@ class BirthdayCog(commands.Cog):
 
             # Fetch summary
             summary_url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{quote(title)}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(summary_url, headers=headers, timeout=10) as rs:
-                    if rs.status != 200:
-                        return None
-                    summary = await rs.json()
+            rs = await self.bot.http_client.get(summary_url, read="json")
+            if rs.status != 200:
+                return None
+            summary = rs.body
 
             name = summary.get("title") or title
             extract = summary.get("extract") or summary.get("description") or ""
@@ -79,13 +75,10 @@ class BirthdayCog(commands.Cog):
         try:
             month, day = birthday_str.split("-")
             url = f"https://en.wikipedia.org/api/rest_v1/feed/onthisday/events/{int(month)}/{int(day)}"
-            headers = {"User-Agent": "DanBot/1.0 (https://github.com/thenotoriousJeremy/DanBot)"}
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, timeout=10) as r:
-                    if r.status != 200:
-                        return []
-                    data = await r.json()
+            r = await self.bot.http_client.get(url, read="json")
+            if r.status != 200:
+                return []
+            data = r.body
 
             events = []
             for entry in data.get("events", []):
@@ -143,7 +136,6 @@ class BirthdayCog(commands.Cog):
                 return s2
 
             async def _fetch():
-                headers = {"User-Agent": "DanBot/1.0 (https://github.com/thenotoriousJeremy/DanBot)"}
                 now_year = datetime.now().year
                 years_back = 30
                 mm = int(month)
@@ -164,26 +156,25 @@ class BirthdayCog(commands.Cog):
                     if bb is None:
                         try:
                             bb_url = f"https://www.billboard.com/charts/hot-100/{date_full}"
-                            async with aiohttp.ClientSession() as session:
-                                async with session.get(bb_url, headers=headers, timeout=10) as r:
-                                    if r.status == 200:
-                                        html = await r.text()
-                                        m = re.search(r'data-rank="1"[\s\S]{0,300}?<h3[^>]*>([^<]+)</h3>[\s\S]{0,300}?<span[^>]*>([^<]+)</span>', html, re.IGNORECASE)
-                                        if not m:
-                                            m = re.search(r'"chart-element__information"[\s\S]{0,400}?"chart-element__information__song">\s*([^<]+)\s*<', html, re.IGNORECASE)
-                                        
-                                        if m:
-                                            if len(m.groups()) >= 2:
-                                                title = m.group(1).strip()
-                                                artist = m.group(2).strip()
-                                            else:
-                                                title = m.group(1).strip()
-                                                artist = None
-                                            bb = {"title": title, "artist": artist, "source": "billboard", "date": date_full}
-                                        else:
-                                            bb = {"title": None}
+                            r = await self.bot.http_client.get(bb_url, read="text")
+                            if r.status == 200:
+                                html = r.body
+                                m = re.search(r'data-rank="1"[\s\S]{0,300}?<h3[^>]*>([^<]+)</h3>[\s\S]{0,300}?<span[^>]*>([^<]+)</span>', html, re.IGNORECASE)
+                                if not m:
+                                    m = re.search(r'"chart-element__information"[\s\S]{0,400}?"chart-element__information__song">\s*([^<]+)\s*<', html, re.IGNORECASE)
+
+                                if m:
+                                    if len(m.groups()) >= 2:
+                                        title = m.group(1).strip()
+                                        artist = m.group(2).strip()
                                     else:
-                                        bb = {"title": None}
+                                        title = m.group(1).strip()
+                                        artist = None
+                                    bb = {"title": title, "artist": artist, "source": "billboard", "date": date_full}
+                                else:
+                                    bb = {"title": None}
+                            else:
+                                bb = {"title": None}
                         except Exception:
                             bb = {"title": None}
                         _cache_set(bb_cache_k, bb)
@@ -209,13 +200,12 @@ class BirthdayCog(commands.Cog):
                         try:
                             mb_release_search = "https://musicbrainz.org/ws/2/release/"
                             params = {"query": f"date:{date_full} AND status:Official", "fmt": "json", "limit": 50}
-                            async with aiohttp.ClientSession() as session:
-                                async with session.get(mb_release_search, params=params, headers=headers, timeout=10) as r:
-                                    if r.status == 200:
-                                        data = await r.json()
-                                        _cache_set(mb_cache_k, data)
-                                    else:
-                                        data = {"releases": []}
+                            r = await self.bot.http_client.get(mb_release_search, read="json", params=params)
+                            if r.status == 200:
+                                data = r.body
+                                _cache_set(mb_cache_k, data)
+                            else:
+                                data = {"releases": []}
                         except Exception:
                             data = {"releases": []}
 
@@ -229,13 +219,12 @@ class BirthdayCog(commands.Cog):
                             if rel_data is None:
                                 try:
                                     rel_lookup = f"https://musicbrainz.org/ws/2/release/{rel_id}"
-                                    async with aiohttp.ClientSession() as session:
-                                        async with session.get(rel_lookup, params={"fmt": "json", "inc": "recordings+artist-credits"}, headers=headers, timeout=10) as rl:
-                                            if rl.status == 200:
-                                                rel_data = await rl.json()
-                                                _cache_set(rel_cache_k, rel_data)
-                                            else:
-                                                rel_data = {}
+                                    rl = await self.bot.http_client.get(rel_lookup, read="json", params={"fmt": "json", "inc": "recordings+artist-credits"})
+                                    if rl.status == 200:
+                                        rel_data = rl.body
+                                        _cache_set(rel_cache_k, rel_data)
+                                    else:
+                                        rel_data = {}
                                 except Exception:
                                     rel_data = {}
 
@@ -297,12 +286,7 @@ class BirthdayCog(commands.Cog):
             datetime.strptime(date, '%m-%d')  # Validate date format
 
             # Save asynchronously to SQLite
-            async with await DatabaseManager.get_connection() as conn:
-                await conn.execute(
-                    "INSERT OR REPLACE INTO birthdays (user_id, username, birthday) VALUES (?, ?, ?);",
-                    (target_user.id, target_user.name, date)
-                )
-                await conn.commit()
+            await BirthdayRepository.set_birthday(target_user.id, target_user.name, date, guild_id=interaction.guild_id)
 
             await interaction.response.send_message(
                 f"{target_user.mention}, your birthday has been set to {date}. 🎉",
@@ -317,13 +301,11 @@ class BirthdayCog(commands.Cog):
     @app_commands.command(name="when_is", description="Ask when a user's birthday is")
     async def when_is(self, interaction: discord.Interaction, target_user: discord.Member):
         """Ask when a user's birthday is."""
-        async with await DatabaseManager.get_connection() as conn:
-            async with conn.execute("SELECT birthday FROM birthdays WHERE user_id = ?;", (target_user.id,)) as cursor:
-                result = await cursor.fetchone()
+        birthday = await BirthdayRepository.get_birthday(target_user.id, guild_id=interaction.guild_id)
 
-        if result:
+        if birthday:
             await interaction.response.send_message(
-                f"{target_user.mention}'s birthday is on {result[0]}. 🎂",
+                f"{target_user.mention}'s birthday is on {birthday}. 🎂",
                 ephemeral=False,
             )
         else:
@@ -337,13 +319,11 @@ class BirthdayCog(commands.Cog):
         """List all saved birthdays in the database."""
         await interaction.response.defer()
         
-        async with await DatabaseManager.get_connection() as conn:
-            async with conn.execute("SELECT username, birthday FROM birthdays ORDER BY birthday;") as cursor:
-                birthdays = await cursor.fetchall()
+        birthdays = await BirthdayRepository.list_birthdays(guild_id=interaction.guild_id)
 
         if birthdays:
             birthday_list = "\n".join(
-                [f"🎂 **{username}**: {birthday}" for username, birthday in birthdays]
+                [f"🎂 **{b.username}**: {b.birthday}" for b in birthdays]
             )
             
             msg = f"Here are all the birthdays I know:\n{birthday_list}"
@@ -365,11 +345,18 @@ class BirthdayCog(commands.Cog):
         channel_env = os.getenv("BIRTHDAY_CHANNEL_ID")
         channel = None
         if channel_env:
+            # With shards split across processes, only the one handling that channel's guild announces
+            if not await owns_channel(self.bot, int(channel_env)):
+                return
             try:
                 channel = self.bot.get_channel(int(channel_env)) or await self.bot.fetch_channel(int(channel_env))
             except Exception:
                 pass
-        
+
+        if not channel and not is_primary(self.bot):
+            # The fallback channels below are picked by the process running shard 0
+            return
+
         if not channel:
             for name in ['birthdays', 'birthday', 'general', 'chat', 'chat-sponsored-by-raid-shadow-legends']:
                 channel = discord.utils.get(self.bot.get_all_channels(), name=name)
@@ -386,9 +373,9 @@ class BirthdayCog(commands.Cog):
             print("[Birthdays] Error: Could not find any suitable text channel for birthday announcements.")
             return
 
-        async with await DatabaseManager.get_connection() as conn:
-            async with conn.execute("SELECT user_id, username, birthday FROM birthdays;") as cursor:
-                birthdays = await cursor.fetchall()
+        # Only the birthdays that need an announcement today, via the birthday index
+        guild_id = channel.guild.id if getattr(channel, "guild", None) else None
+        birthdays = await BirthdayRepository.birthdays_on(today, next_week, guild_id=guild_id)
 
         for user_id, username, birthday in birthdays:
             user_mention = f"<@{user_id}>"
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+from io import BytesIO
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from database import DatabaseManager
+from query_stats import DB_QUERY_STATS, DB_QUERY_STATS_FILE, DB_QUERY_STATS_INTERVAL, DB_SLOW_QUERY_MS
+from repositories import repository_stats
+from shards import SHARD_STATS_INTERVAL, SHARDED, ShardMonitor, runs_all_shards
+
+# Loaded after these when they are enabled (see DanBot.load_cogs); /db_stats reports on their last runs
+COG_DEPENDENCIES = ("maintenance",)
+
+
+def _shorten(text: str, width: int) -> str:
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+class Diagnostics(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.stats_path = None
+        self.shard_monitor = ShardMonitor(bot)
+        if DB_QUERY_STATS and DB_QUERY_STATS_FILE:
+            self.stats_path = os.path.join(os.getenv("DATA_DIR", "."), DB_QUERY_STATS_FILE)
+            if not runs_all_shards(bot):
+                # One file per process when shards are split across processes
+                root, ext = os.path.splitext(self.stats_path)
+                self.stats_path = f"{root}.shards-{'-'.join(map(str, bot.shard_ids))}{ext}"
+            self.dump_query_stats.change_interval(seconds=DB_QUERY_STATS_INTERVAL)
+            self.dump_query_stats.start()
+            print(f"[Diagnostics] Writing query stats to {self.stats_path} every {DB_QUERY_STATS_INTERVAL}s")
+        if SHARDED and SHARD_STATS_INTERVAL > 0:
+            self.log_shard_stats.change_interval(seconds=SHARD_STATS_INTERVAL)
+            self.log_shard_stats.start()
+
+    async def cog_unload(self):
+        self.log_shard_stats.cancel()
+        if self.dump_query_stats.is_running():
+            self.dump_query_stats.cancel()
+            # Keep the last interval's numbers
+            await asyncio.to_thread(DatabaseManager.dump_query_stats, self.stats_path)
+
+    @tasks.loop(seconds=300)
+    async def dump_query_stats(self):
+        try:
+            await asyncio.to_thread(DatabaseManager.dump_query_stats, self.stats_path)
+        except OSError as e:
+            print(f"[Diagnostics] Error writing query stats: {e}")
+
+    @tasks.loop(seconds=300)
+    async def log_shard_stats(self):
+        parts = [
+            f"#{row['shard_id']} {row['latency_ms'] if row['latency_ms'] is not None else '-'}ms "
+            f"{row['events_per_s'] if row['events_per_s'] is not None else '-'} ev/s"
+            for row in self.shard_monitor.sample()
+        ]
+        print(f"[Shards] {' | '.join(parts)}")
+
+    @log_shard_stats.before_loop
+    async def before_log_shard_stats(self):
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_shard_disconnect(self, shard_id: int):
+        self.shard_monitor.record_disconnect(shard_id)
+
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        # Sharded clients dispatch on_shard_disconnect as well
+        if not isinstance(self.bot, discord.AutoShardedClient):
+            self.shard_monitor.record_disconnect(self.bot.shard_id or 0)
+
+    @app_commands.command(name="shard_stats", description="Show gateway latency and event rates per shard (admin only).")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def shard_stats(self, interaction: discord.Interaction):
+        rows = self.shard_monitor.sample(update=not self.log_shard_stats.is_running())
+        lines = [f"{'shard':>5} {'latency':>9} {'events/s':>9} {'events':>9} {'guilds':>7} {'drops':>6}"]
+        for row in rows:
+            latency = f"{row['latency_ms']:.0f} ms" if row["latency_ms"] is not None else "-"
+            rate = f"{row['events_per_s']:.2f}" if row["events_per_s"] is not None else "-"
+            lines.append(
+                f"{row['shard_id']:>5} {latency:>9} {rate:>9} {row['events']:>9} {row['guilds']:>7} {row['disconnects']:>6}"
+            )
+        if interaction.guild is not None:
+            lines.append(f"\nThis guild is on shard {interaction.guild.shard_id}.")
+        await interaction.response.send_message("```\n" + "\n".join(lines)[:1980] + "\n```", ephemeral=True)
+
+    @app_commands.command(name="db_stats", description="Show SQLite statement latencies and slow queries (admin only).")
+    @app_commands.describe(export="Attach the full statistics as a JSON file")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def db_stats(self, interaction: discord.Interaction, export: bool = False):
+        lines = []
+        if DB_QUERY_STATS:
+            lines.append(f"Statements by total time (slow threshold {DB_SLOW_QUERY_MS:g} ms):")
+            lines.append(f"{'calls':>7} {'p50':>6} {'p95':>6} {'max':>8} {'rows':>8}  sql")
+            for s in DatabaseManager.query_stats(limit=10):
+                lines.append(
+                    f"{s['calls']:>7} {s['p50_ms']:>6g} {s['p95_ms']:>6g} {s['max_ms']:>8.1f} {s['rows']:>8}  {_shorten(s['sql'], 60)}"
+                )
+            slow = DatabaseManager.slow_queries(limit=5)
+            if slow:
+                lines.append("")
+                lines.append("Recent slow queries:")
+                for q in slow:
+                    lines.append(f"{q['ms']:>8.1f} ms  {_shorten(q['sql'], 70)}")
+        else:
+            lines.append("Per-statement timing is off; set DB_QUERY_STATS=1 to enable it.")
+
+        repo = repository_stats(limit=5)
+        if repo:
+            lines.append("")
+            lines.append("Repository methods by total time:")
+            for r in repo:
+                lines.append(f"{r['calls']:>7} calls {r['avg_ms']:>8.2f} ms avg  {r['method']}")
+
+        writes = DatabaseManager.write_stats()
+        if writes.get("flushes"):
+            lines.append("")
+            lines.append(
+                f"Write batches: {writes['flushes']} flushes, {writes['avg_batch_size']:.1f} writes/batch, "
+                f"p95 ack {writes['ack_ms']['p95']:.1f} ms"
+            )
+
+        partitions = DatabaseManager.partition_stats()
+        if partitions:
+            lines.append("")
+            lines.append(
+                f"Guild partitions: {partitions['open']}/{partitions['max_open']} open, "
+                f"{partitions['hits']} hits, {partitions['misses']} misses, {partitions['evictions']} evictions"
+            )
+
+        maintenance = self.bot.get_cog("Maintenance")
+        if maintenance is not None and (maintenance.last_backup or maintenance.last_retention):
+            lines.append("")
+            if maintenance.last_backup:
+                backup = maintenance.last_backup
+                lines.append(
+                    f"Last backup: {backup['finished_at']:%Y-%m-%d %H:%M}, "
+                    f"{backup['bytes'] / 1024 / 1024:.1f} MiB in {backup['seconds']:.2f}s"
+                )
+            if maintenance.last_retention:
+                retention = maintenance.last_retention
+                lines.append(
+                    f"Last retention run: {retention['finished_at']:%Y-%m-%d %H:%M}, {retention['rows']} rows deleted, "
+                    f"{retention['reclaimed_bytes'] / 1024 / 1024:.1f} MiB reclaimed"
+                )
+
+        content = "```\n" + "\n".join(lines)[:1980] + "\n```"
+        if export:
+            data = {
+                "statements": DatabaseManager.query_stats(),
+                "slow_queries": DatabaseManager.slow_queries(),
+                "repositories": repository_stats(),
+                "writes": writes,
+                "partitions": partitions,
+            }
+            file = discord.File(BytesIO(json.dumps(data, indent=2).encode()), filename="db_stats.json")
+            await interaction.response.send_message(content, file=file, ephemeral=True)
+        else:
+            await interaction.response.send_message(content, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Diagnostics(bot))
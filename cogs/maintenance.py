@@ -0,0 +1,227 @@
+import asyncio
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from database import DatabaseManager
+from shards import is_primary
+
+DB_BACKUP_DIR = os.getenv("DB_BACKUP_DIR") or os.path.join(os.getenv("DATA_DIR", "."), "backups")
+DB_BACKUP_INTERVAL_HOURS = float(os.getenv("DB_BACKUP_INTERVAL_HOURS", 24))
+DB_BACKUP_KEEP = int(os.getenv("DB_BACKUP_KEEP", 7))
+DB_RETENTION_INTERVAL_HOURS = float(os.getenv("DB_RETENTION_INTERVAL_HOURS", 24))
+# 0 keeps rows forever
+DB_RETENTION_WRAPPED_YEARS = int(os.getenv("DB_RETENTION_WRAPPED_YEARS", 0))
+DB_RETENTION_WORDLE_DAYS = int(os.getenv("DB_RETENTION_WORDLE_DAYS", 365))
+DB_RETENTION_WARNING_DAYS = int(os.getenv("DB_RETENTION_WARNING_DAYS", 30))
+
+WRAPPED_TABLES = (
+    "server_wrapped_metrics",
+    "server_wrapped_word_freq",
+    "server_wrapped_most_reacted",
+    "server_wrapped_longest_messages",
+    "server_wrapped_cache_status",
+)
+
+
+def retention_policies(now: datetime = None) -> list:
+    """Return (table, condition, params) for every table with a retention limit configured."""
+    now = now or datetime.now()
+    policies = []
+    if DB_RETENTION_WRAPPED_YEARS > 0:
+        # Keep the current year plus the previous N - 1
+        oldest_year = now.year - DB_RETENTION_WRAPPED_YEARS + 1
+        policies += [(table, "year < ?", (oldest_year,)) for table in WRAPPED_TABLES]
+    if DB_RETENTION_WORDLE_DAYS > 0:
+        cutoff = now - timedelta(days=DB_RETENTION_WORDLE_DAYS)
+        policies.append(("wordle_stats_cache", "timestamp < ?", (cutoff.isoformat(),)))
+    if DB_RETENTION_WARNING_DAYS > 0:
+        # The tracker resolves warnings after a week; older ones were orphaned (e.g. the channel is gone)
+        cutoff = now - timedelta(days=DB_RETENTION_WARNING_DAYS)
+        policies.append(("pending_workout_warnings", "timestamp < ?", (cutoff.isoformat(),)))
+    return policies
+
+
+class Maintenance(commands.Cog):
+    BACKUP_PREFIX = "birthdays-"
+    GUILD_BACKUP_PREFIX = "guild-{guild_id}-"
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.backup_dir = Path(DB_BACKUP_DIR)
+        self._backup_lock = asyncio.Lock()
+        self._retention_lock = asyncio.Lock()
+        self.last_backup = None
+        self.last_retention = None
+        if not is_primary(bot):
+            # Every process shares the database; the one running shard 0 maintains it
+            print("[Maintenance] Scheduled backups and retention run in the process that owns shard 0")
+            return
+        if DB_BACKUP_INTERVAL_HOURS > 0:
+            self.scheduled_backup.change_interval(hours=DB_BACKUP_INTERVAL_HOURS)
+            self.scheduled_backup.start()
+            print(f"[Maintenance] Database backups every {DB_BACKUP_INTERVAL_HOURS:g}h to {self.backup_dir} (keeping {DB_BACKUP_KEEP})")
+        if DB_RETENTION_INTERVAL_HOURS > 0:
+            self.scheduled_retention.change_interval(hours=DB_RETENTION_INTERVAL_HOURS)
+            self.scheduled_retention.start()
+            print(f"[Maintenance] Retention job every {DB_RETENTION_INTERVAL_HOURS:g}h ({len(retention_policies())} table policies)")
+
+    def cog_unload(self):
+        self.scheduled_backup.cancel()
+        self.scheduled_retention.cancel()
+
+    def list_backups(self, prefix: str = BACKUP_PREFIX) -> list:
+        """Return existing snapshots, oldest first."""
+        return sorted(self.backup_dir.glob(f"{prefix}*.db"))
+
+    def rotate_backups(self, prefix: str = BACKUP_PREFIX) -> list:
+        """Delete all but the newest DB_BACKUP_KEEP snapshots and return the removed paths."""
+        backups = self.list_backups(prefix)
+        expired = backups[:-DB_BACKUP_KEEP] if DB_BACKUP_KEEP > 0 else []
+        for path in expired:
+            path.unlink(missing_ok=True)
+        return expired
+
+    async def run_backup(self) -> dict:
+        """Write a new snapshot, rotate old ones and return the backup report."""
+        async with self._backup_lock:
+            self.backup_dir.mkdir(parents=True, exist_ok=True)
+            started = datetime.now()
+            stamp = started.strftime("%Y%m%d-%H%M%S")
+            target = self.backup_dir / f"{self.BACKUP_PREFIX}{stamp}.db"
+            result = await DatabaseManager.backup(str(target))
+            removed = self.rotate_backups()
+
+            # Per-guild files in partitioned mode get their own rotated snapshots
+            if DatabaseManager.partitioned:
+                for guild_id, path in (await DatabaseManager.partition_paths()).items():
+                    if not os.path.exists(path):
+                        continue
+                    prefix = self.GUILD_BACKUP_PREFIX.format(guild_id=guild_id)
+                    part = await DatabaseManager.backup(str(self.backup_dir / f"{prefix}{stamp}.db"), db_path=path)
+                    result["bytes"] += part["bytes"]
+                    result["pages"] += part["pages"]
+                    result["steps"] += part["steps"]
+                    removed += self.rotate_backups(prefix)
+                result["seconds"] = (datetime.now() - started).total_seconds()
+            result["rotated"] = len(removed)
+            result["finished_at"] = datetime.now()
+            self.last_backup = result
+            print(
+                f"[Maintenance] Backup written to {target.name} in {result['seconds']:.2f}s "
+                f"({result['bytes'] / 1024 / 1024:.1f} MiB, {result['pages']} pages in {result['steps']} steps); "
+                f"removed {len(removed)} old snapshot(s)"
+            )
+            return result
+
+    @tasks.loop(hours=24)
+    async def scheduled_backup(self):
+        try:
+            await self.run_backup()
+        except Exception as e:
+            print(f"[Maintenance] Error during scheduled backup: {e}")
+
+    @scheduled_backup.before_loop
+    async def before_scheduled_backup(self):
+        await self.bot.wait_until_ready()
+
+    async def run_retention(self) -> dict:
+        """Delete expired rows in small batches, then vacuum the freed pages; return what was removed."""
+        async with self._retention_lock:
+            started = datetime.now()
+            policies = retention_policies(started)
+            # In partitioned mode guild data lives in the per-guild files, the rest in the catalog
+            targets = [None]
+            if DatabaseManager.partitioned:
+                targets += list(await DatabaseManager.partition_paths())
+
+            deleted = Counter()
+            reclaimed = 0
+            for guild_id in targets:
+                for table, condition, params in policies:
+                    deleted[table] += await DatabaseManager.delete_expired(table, condition, params, guild_id=guild_id)
+                # Also returns pages freed by ordinary deletes since the last run
+                reclaimed += await DatabaseManager.incremental_vacuum(guild_id=guild_id)
+            # Cached avatar files nobody has drawn in a while
+            avatars = getattr(self.bot, "avatars", None)
+            avatar_files = await avatars.prune() if avatars is not None else 0
+
+            result = {
+                "deleted": dict(deleted),
+                "rows": sum(deleted.values()),
+                "reclaimed_bytes": reclaimed,
+                "avatar_files": avatar_files,
+                "seconds": (datetime.now() - started).total_seconds(),
+                "finished_at": datetime.now(),
+            }
+            self.last_retention = result
+            details = ", ".join(f"{table}={count}" for table, count in deleted.items() if count) or "nothing expired"
+            print(
+                f"[Maintenance] Retention removed {result['rows']} row(s) ({details}) and reclaimed "
+                f"{reclaimed / 1024 / 1024:.1f} MiB in {result['seconds']:.2f}s, {avatar_files} stale avatar file(s) pruned"
+            )
+            return result
+
+    @tasks.loop(hours=24)
+    async def scheduled_retention(self):
+        try:
+            await self.run_retention()
+        except Exception as e:
+            print(f"[Maintenance] Error during retention job: {e}")
+
+    @scheduled_retention.before_loop
+    async def before_scheduled_retention(self):
+        await self.bot.wait_until_ready()
+
+    @app_commands.command(name="db_backup", description="Take a database snapshot now and list stored backups (admin only).")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def db_backup(self, interaction: discord.Interaction):
+        if self._backup_lock.locked():
+            await interaction.response.send_message("A backup is already running, try again shortly.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        try:
+            result = await self.run_backup()
+        except Exception as e:
+            print(f"[Maintenance] Error during manual backup: {e}")
+            await interaction.followup.send(f"Backup failed: {e}", ephemeral=True)
+            return
+
+        backups = self.list_backups()
+        await interaction.followup.send(
+            f"Backup written to `{os.path.basename(result['path'])}` in {result['seconds']:.2f}s "
+            f"({result['bytes'] / 1024 / 1024:.1f} MiB). {len(backups)} snapshot(s) stored, keeping {DB_BACKUP_KEEP}.",
+            ephemeral=True
+        )
+
+    @app_commands.command(name="db_prune", description="Apply the data retention policies now and vacuum freed space (admin only).")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def db_prune(self, interaction: discord.Interaction):
+        if self._retention_lock.locked():
+            await interaction.response.send_message("The retention job is already running, try again shortly.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        try:
+            result = await self.run_retention()
+        except Exception as e:
+            print(f"[Maintenance] Error during manual retention run: {e}")
+            await interaction.followup.send(f"Retention run failed: {e}", ephemeral=True)
+            return
+
+        lines = [f"`{table}`: {count}" for table, count in result["deleted"].items() if count]
+        await interaction.followup.send(
+            f"Removed {result['rows']} expired row(s) and reclaimed {result['reclaimed_bytes'] / 1024 / 1024:.1f} MiB "
+            f"in {result['seconds']:.2f}s." + ("\n" + "\n".join(lines) if lines else ""),
+            ephemeral=True
+        )
+
+
+async def setup(bot):
+    await bot.add_cog(Maintenance(bot))
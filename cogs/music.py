@@ -2,12 +2,12 @@ import asyncio
 import os
 import shutil
 import random
+import threading
 from pathlib import Path
 
 import discord
 from discord import app_commands
 from discord.ext import commands
-import yt_dlp
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 COOKIE_FILE = Path(os.getenv("YTDLP_COOKIE_FILE", Path(os.getenv("DATA_DIR", BASE_DIR)) / "cookies.txt"))
@@ -35,7 +35,18 @@ ffmpeg_options = {
     'before_options': '-protocol_whitelist file,http,https,tcp,tls,crypto -reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
 }
 
-ytdl = yt_dlp.YoutubeDL(ytdl_format_options)
+_ytdl = None
+_ytdl_lock = threading.Lock()
+
+
+def get_ytdl():
+    """Import yt_dlp and build the shared YoutubeDL instance on first use (from an executor thread)."""
+    global _ytdl
+    with _ytdl_lock:
+        if _ytdl is None:
+            import yt_dlp
+            _ytdl = yt_dlp.YoutubeDL(ytdl_format_options)
+        return _ytdl
 
 class YTDLSource(discord.PCMVolumeTransformer):
     def __init__(self, source, *, data, volume=0.5):
@@ -61,7 +72,7 @@ class YTDLSource(discord.PCMVolumeTransformer):
         
         def fetch_data():
             try:
-                data = ytdl.extract_info(f"ytsearch:{query}" if not query.startswith('http') else query, download=False)
+                data = get_ytdl().extract_info(f"ytsearch:{query}" if not query.startswith('http') else query, download=False)
                 if 'entries' in data:
                     return data['entries'][0]
                 return data
@@ -83,7 +94,7 @@ class YTDLSource(discord.PCMVolumeTransformer):
         
         def fetch_data():
             try:
-                data = ytdl.extract_info(f"ytsearch:{query}" if not query.startswith('http') else query, download=False)
+                data = get_ytdl().extract_info(f"ytsearch:{query}" if not query.startswith('http') else query, download=False)
                 if 'entries' in data:
                     return data['entries'][0]
                 return data
@@ -413,6 +424,13 @@ class YouTubeMusic(commands.Cog):
         self.bot = bot
         self.players = {}
 
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        # Players only exist for guilds this process (or its shards) receives events for
+        player = self.players.pop(guild.id, None)
+        if player is not None:
+            await player.stop()
+
     def get_player(self, guild_id: int) -> GuildMusicPlayer:
         """Fetch or spawn the dedicated music player for a given guild."""
         if guild_id not in self.players:
@@ -1,15 +1,12 @@
 import re
 import asyncio
 from collections import defaultdict, Counter
-from io import BytesIO
 import os
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.offsetbox import OffsetImage, AnnotationBbox
-from PIL import Image, ImageDraw
+from io import BytesIO
 import discord
 from discord.ext import commands
 from discord import app_commands
+import charts
 
 
 WORDLE_PATTERN = re.compile(r"Your group is on \d+ day streak|Here are yesterday's results|[1-6X]/6:|👑", re.IGNORECASE)
@@ -28,7 +25,6 @@ class WordleStats(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self._member_cache = {}
 
     def parse_wordle_post(self, content: str):
         """Parse a Wordle post's text and return (results, group_streak).
@@ -76,18 +72,10 @@ class WordleStats(commands.Cog):
         return results, group_streak
 
     async def resolve_player(self, guild: discord.Guild, player_token):
-        """Resolve token to (display_name, member or None)."""
+        """Resolve token to (display_name, member or None); prefetch IDs with resolve_many to batch lookups."""
         if isinstance(player_token, int):
-            member = guild.get_member(player_token)
-            if member is None:
-                try:
-                    member = await guild.fetch_member(player_token)
-                except Exception:
-                    member = None
-
+            member = await self.bot.member_resolver.resolve(guild, player_token)
             if member:
-                # cache member
-                self._member_cache[player_token] = member
                 return member.display_name, member
             return f"<@{player_token}>", None
 
@@ -97,20 +85,10 @@ class WordleStats(commands.Cog):
         return str(player_token), None
 
     async def resolve_player_name(self, guild: discord.Guild, player_token):
-        """Resolve token to display name; cache members to reduce REST calls."""
+        """Resolve token to display name; the bot's member resolver caches fetched members."""
         if isinstance(player_token, int):
-            if player_token in self._member_cache:
-                return self._member_cache[player_token].display_name
-
-            member = guild.get_member(player_token)
-            if member is None:
-                try:
-                    member = await guild.fetch_member(player_token)
-                except Exception:
-                    member = None
-
+            member = await self.bot.member_resolver.resolve(guild, player_token)
             if member:
-                self._member_cache[player_token] = member
                 return member.display_name
             return f"<@{player_token}>"
 
@@ -179,8 +157,12 @@ class WordleStats(commands.Cog):
         # Map display_name -> member (when resolvable) for avatar fetching
         player_member_map = {}
 
-        for message, combined in reversed(matches):
-            parsed, grp = self.parse_wordle_post(combined)
+        # Parse every post once and resolve all mentioned players in one batch
+        posts = [(message, *self.parse_wordle_post(combined)) for message, combined in reversed(matches)]
+        player_ids = [token for _, parsed, _ in posts for _, players in parsed for token in players if isinstance(token, int)]
+        await self.bot.member_resolver.resolve_many(guild, player_ids)
+
+        for message, parsed, grp in posts:
             if grp:
                 group_streaks.append((message.created_at, grp))
 
@@ -221,15 +203,15 @@ class WordleStats(commands.Cog):
 
         if top_completions:
             try:
-                completions_path = await self.generate_completions_graph(guild, top_completions, player_member_map)
-                files_to_send.append(discord.File(completions_path, filename=os.path.basename(completions_path)))
+                completions_png = await self.generate_completions_graph(guild, top_completions, player_member_map)
+                files_to_send.append(discord.File(BytesIO(completions_png), filename="wordle_top_completions.png"))
             except Exception as e:
                 print(f"Failed to generate completions graph: {e}")
 
         if top_streaks:
             try:
-                streaks_path = await self.generate_streaks_graph(guild, top_streaks, player_member_map)
-                files_to_send.append(discord.File(streaks_path, filename=os.path.basename(streaks_path)))
+                streaks_png = await self.generate_streaks_graph(guild, top_streaks, player_member_map)
+                files_to_send.append(discord.File(BytesIO(streaks_png), filename="wordle_top_streaks.png"))
             except Exception as e:
                 print(f"Failed to generate streaks graph: {e}")
 
@@ -237,136 +219,47 @@ class WordleStats(commands.Cog):
             await interaction.followup.send("No Wordle data found to plot.")
             return
 
-        try:
-            await interaction.followup.send(files=files_to_send)
-        finally:
-            # cleanup
-            for f in files_to_send:
-                try:
-                    os.remove(f.filename)
-                except Exception:
-                    pass
-
-    async def _fetch_avatars_concurrently(self, members):
-        """Download avatars concurrently using aiohttp."""
-        import aiohttp
-        async def fetch_avatar(session, member):
-            if not member:
-                return None
-            try:
-                avatar_url = member.avatar.url if getattr(member, 'avatar', None) else member.display_avatar.url
-                async with session.get(str(avatar_url), timeout=5) as resp:
-                    if resp.status == 200:
-                        return await resp.read()
-            except Exception:
-                pass
-            return None
-
-        async with aiohttp.ClientSession() as session:
-            tasks = [fetch_avatar(session, m) for m in members]
-            return await asyncio.gather(*tasks)
-
-    def _render_wordle_graph_sync(self, names, counts, avatars_data, out_path, title, x_label):
-        """Synchronous Matplotlib rendering function run on background thread."""
-        num = len(names)
-        fig_height = max(3, num * 0.6)
-        fig, ax = plt.subplots(figsize=(10, fig_height))
-        fig.patch.set_facecolor("#2C2F33")
-        ax.set_facecolor("#2C2F33")
-
-        processed_avatars = []
-        bar_colors = []
-
-        for i, name in enumerate(names):
-            avatar_bytes = avatars_data[i]
-            avg_hex = "#00BFA5" if "Completions" in title else "#FFB74D"
-            avatar_img = None
-            if avatar_bytes:
-                try:
-                    avatar = Image.open(BytesIO(avatar_bytes)).convert("RGBA").resize((36, 36))
-                    avatar_array = np.array(avatar)[..., :3]
-                    avg_color = tuple(avatar_array.mean(axis=(0, 1)).astype(int))
-                    avg_hex = f"#{avg_color[0]:02x}{avg_color[1]:02x}{avg_color[2]:02x}"
-                    
-                    mask = Image.new("L", avatar.size, 0)
-                    draw = ImageDraw.Draw(mask)
-                    draw.ellipse((0, 0, avatar.size[0], avatar.size[1]), fill=255)
-                    avatar.putalpha(mask)
-                    
-                    avatar_img = avatar
-                except Exception:
-                    pass
-            processed_avatars.append(avatar_img)
-            bar_colors.append(avg_hex)
-
-        y = np.arange(num)
-        bars = ax.barh(y, counts, color=bar_colors, height=0.6, edgecolor="none")
-
-        ax.set_yticks(y)
-        ax.set_yticklabels(names, color="#FFFFFF", fontsize=12)
-        ax.invert_yaxis()
-        ax.set_xlabel(x_label, color="#FFFFFF")
-        ax.set_title(title, color="#FFFFFF", fontsize=16, pad=15)
-        ax.tick_params(axis="x", colors="#FFFFFF")
-
-        max_count = max(counts) if counts else 1
-        for i, b in enumerate(bars):
-            x = b.get_width()
-            y_pos = b.get_y() + b.get_height() / 2
-            avatar_img = processed_avatars[i]
-            if avatar_img is not None:
-                avatar_box = OffsetImage(avatar_img, zoom=1)
-                ab = AnnotationBbox(avatar_box, (x + max_count * 0.03, y_pos), frameon=False, xycoords="data", box_alignment=(0.5, 0.5))
-                ax.add_artist(ab)
-                text_x = x + max_count * 0.08
-            else:
-                text_x = x + max_count * 0.02
-
-            ax.text(text_x, y_pos, str(counts[i]), va="center", color="#FFFFFF", fontsize=12)
-
-        plt.tight_layout()
-        plt.savefig(out_path, bbox_inches="tight", facecolor=fig.get_facecolor())
-        plt.close(fig)
+        await interaction.followup.send(files=files_to_send)
 
     async def generate_completions_graph(self, guild: discord.Guild, top_completions, player_member_map: dict):
-        """Generate a horizontal bar chart for top completions and return the file path."""
+        """Generate a horizontal bar chart for top completions and return it as PNG bytes."""
         names = [n for n, _ in top_completions]
         counts = [s["completions"] for _, s in top_completions]
         members = [player_member_map.get(name) for name in names]
 
-        avatars_data = await self._fetch_avatars_concurrently(members)
+        sprites = await self.bot.avatars.sprites(members)
 
-        out_path = os.path.join(os.getenv("DATA_DIR", "."), "wordle_top_completions.png")
-        await asyncio.to_thread(
-            self._render_wordle_graph_sync,
+        return await self.bot.renderer.render(
+            charts.bar_chart,
+            "leaderboard",
             names,
             counts,
-            avatars_data,
-            out_path,
+            [sprite.rgba if sprite else None for sprite in sprites],
+            [sprite.hex if sprite else None for sprite in sprites],
             "Top Wordle Completions",
-            "Completions"
+            "Completions",
+            "#00BFA5"
         )
-        return out_path
 
     async def generate_streaks_graph(self, guild: discord.Guild, top_streaks, player_member_map: dict):
-        """Generate a horizontal bar chart for longest completion streaks and return the file path."""
+        """Generate a horizontal bar chart for longest completion streaks and return it as PNG bytes."""
         names = [n for n, _ in top_streaks]
         counts = [s["longest_streak"] for _, s in top_streaks]
         members = [player_member_map.get(name) for name in names]
 
-        avatars_data = await self._fetch_avatars_concurrently(members)
+        sprites = await self.bot.avatars.sprites(members)
 
-        out_path = os.path.join(os.getenv("DATA_DIR", "."), "wordle_top_streaks.png")
-        await asyncio.to_thread(
-            self._render_wordle_graph_sync,
+        return await self.bot.renderer.render(
+            charts.bar_chart,
+            "leaderboard",
             names,
             counts,
-            avatars_data,
-            out_path,
+            [sprite.rgba if sprite else None for sprite in sprites],
+            [sprite.hex if sprite else None for sprite in sprites],
             "Longest Recorded Completion Streaks",
-            "Days"
+            "Days",
+            "#FFB74D"
         )
-        return out_path
 
 
 async def setup(bot):
@@ -3,21 +3,15 @@ from discord.ext import commands, tasks
 from discord import app_commands
 from datetime import datetime, timedelta
 import asyncio
-import aiohttp
 from collections import defaultdict
 import json
 import os
 from io import BytesIO
 
-# Plotting libs
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import numpy as np
-from PIL import Image, ImageDraw
-from matplotlib.offsetbox import OffsetImage, AnnotationBbox
-
-from database import DatabaseManager
+import charts
+from render import RenderError
+from repositories import WorkoutRepository
+from shards import owns_channel
 
 # Local Insult & Motivation Engine (Zero-dependency Dan persona)
 DAN_INSULTS = [
@@ -66,6 +60,11 @@ def get_next_weekly_reset():
         next_reset += timedelta(weeks=1)
     return next_reset
 
+def get_week_start(now: datetime = None) -> datetime:
+    """Return local midnight on the Monday of the week containing ``now``."""
+    now = now or datetime.now()
+    return now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=now.weekday())
+
 
 class AcknowledgeWorkoutButton(discord.ui.View):
     def __init__(self):
@@ -74,27 +73,18 @@ class AcknowledgeWorkoutButton(discord.ui.View):
     @discord.ui.button(label="Acknowledge & Stay in Tracker", style=discord.ButtonStyle.green, custom_id="ack_workout_btn")
     async def acknowledge(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Determine who this warning is actually for from the SQLite database
-        async with await DatabaseManager.get_connection() as conn:
-            async with conn.execute(
-                "SELECT user_id FROM pending_workout_warnings WHERE message_id = ?;",
-                (interaction.message.id,)
-            ) as cursor:
-                row = await cursor.fetchone()
-
-        if not row:
+        warned_user_id = await WorkoutRepository.get_warned_user(interaction.message.id, guild_id=interaction.guild_id)
+
+        if warned_user_id is None:
             await interaction.response.send_message("This warning is no longer active or already acknowledged.", ephemeral=True)
             return
 
-        warned_user_id = row[0]
-
         if interaction.user.id != warned_user_id:
             await interaction.response.send_message("This warning isn't for you! Go back to lifting! 😠", ephemeral=True)
             return
 
         # Delete pending warning in SQLite
-        async with await DatabaseManager.get_connection() as conn:
-            await conn.execute("DELETE FROM pending_workout_warnings WHERE user_id = ?;", (warned_user_id,))
-            await conn.commit()
+        await WorkoutRepository.clear_warning(warned_user_id, guild_id=interaction.guild_id)
 
         # Update warning message to confirm they stay
         await interaction.response.edit_message(
@@ -126,98 +116,75 @@ class WorkoutTracker(commands.Cog):
         bot.loop.create_task(self.schedule_weekly_reset())
         print(f"[WorkoutTracker] Weekly reset scheduled for: {self.weekly_reset_time}")
 
-    async def get_goal(self, user_id: int) -> int:
+    def tracker_guild_id(self):
+        """Guild of the tracker's channel, used to route scheduled jobs in partitioned mode."""
+        channel = self.bot.get_channel(self.leaderboard_channel)
+        guild = getattr(channel, "guild", None)
+        return guild.id if guild else None
+
+    async def get_goal(self, user_id: int, guild_id: int = None) -> int:
         """Return the workout goal for a user asynchronously from SQLite."""
-        async with await DatabaseManager.get_connection() as conn:
-            async with conn.execute("SELECT goal FROM workout_goals WHERE user_id = ?;", (user_id,)) as cursor:
-                row = await cursor.fetchone()
-                return row[0] if row else 0
-
-    async def get_workouts(self, user_id: int) -> list:
-        """Return a user's workout list of datetimes asynchronously from SQLite."""
-        async with await DatabaseManager.get_connection() as conn:
-            async with conn.execute("SELECT timestamp FROM workout_history WHERE user_id = ?;", (user_id,)) as cursor:
-                rows = await cursor.fetchall()
-                return [datetime.fromisoformat(r[0]) for r in rows]
-
-    async def calculate_streak(self, user_id: int) -> int:
-        workouts = sorted(await self.get_workouts(user_id))
-        goal = await self.get_goal(user_id)
+        return await WorkoutRepository.get_goal(user_id, guild_id=guild_id)
+
+    # The helpers below work on {week start date: workout count} maps from WorkoutRepository,
+    # so streaks never need a user's full workout history.
+
+    @staticmethod
+    def current_streak(weekly: dict, goal: int) -> int:
+        """Consecutive weeks meeting ``goal``, counting back from the current week."""
         if goal <= 0:
             return 0
 
-        now = datetime.now()
-        current_week_start = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=now.weekday())
-        current_week_end = current_week_start + timedelta(days=7)
-
+        current_week = get_week_start().date()
         streak = 0
-        current_week_count = sum(1 for w in workouts if current_week_start <= w < current_week_end)
-        if current_week_count >= goal:
+        if weekly.get(current_week, 0) >= goal:
             streak += 1
-            week_start = current_week_start - timedelta(days=7)
-        else:
-            week_start = current_week_start - timedelta(days=7)
+        week = current_week - timedelta(days=7)
 
         for _ in range(52):
-            week_end = week_start + timedelta(days=7)
-            week_count = sum(1 for w in workouts if week_start <= w < week_end)
-            if week_count >= goal:
+            if weekly.get(week, 0) >= goal:
                 streak += 1
-                week_start -= timedelta(days=7)
+                week -= timedelta(days=7)
             else:
                 break
 
         return streak
 
-    async def calculate_consecutive_misses(self, user_id: int) -> int:
-        workouts = sorted(await self.get_workouts(user_id))
-        goal = await self.get_goal(user_id)
+    @staticmethod
+    def consecutive_misses(weekly: dict, goal: int) -> int:
+        """Consecutive completed weeks below ``goal``, counting back from last week."""
         if goal <= 0:
             return 0
 
-        now = datetime.now()
-        current_week_start = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=now.weekday())
         consecutive_misses = 0
-        week_start = current_week_start - timedelta(days=7)
+        week = get_week_start().date() - timedelta(days=7)
 
         for _ in range(52):
-            week_end = week_start + timedelta(days=7)
-            week_count = sum(1 for w in workouts if week_start <= w < week_end)
-            if week_count < goal:
+            if weekly.get(week, 0) < goal:
                 consecutive_misses += 1
-                week_start -= timedelta(days=7)
+                week -= timedelta(days=7)
             else:
                 break
 
         return consecutive_misses
 
-    async def calculate_longest_streak(self, user_id: int) -> int:
-        workouts = sorted(await self.get_workouts(user_id))
-        goal = await self.get_goal(user_id)
-        if goal <= 0 or not workouts:
+    @staticmethod
+    def longest_streak(weekly: dict, goal: int) -> int:
+        """Longest run of consecutive weeks meeting ``goal``."""
+        if goal <= 0 or not weekly:
             return 0
 
-        first = workouts[0]
-        last = workouts[-1]
-        start_week = first.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=first.weekday())
-        end_week = last.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=last.weekday())
-
-        week = start_week
-        met_weeks = []
-        while week <= end_week:
-            week_end = week + timedelta(days=7)
-            week_count = sum(1 for w in workouts if week <= w < week_end)
-            met_weeks.append(week_count >= goal)
-            week += timedelta(days=7)
-
+        week = min(weekly)
+        end_week = max(weekly)
         longest = 0
         current = 0
-        for v in met_weeks:
-            if v:
+        while week <= end_week:
+            if weekly.get(week, 0) >= goal:
                 current += 1
                 longest = max(longest, current)
             else:
                 current = 0
+            week += timedelta(days=7)
 
         return longest
 
@@ -227,9 +194,7 @@ class WorkoutTracker(commands.Cog):
             await interaction.response.send_message("Your goal must be at least 1 workout per week.", ephemeral=True)
             return
 
-        async with await DatabaseManager.get_connection() as conn:
-            await conn.execute("INSERT OR REPLACE INTO workout_goals (user_id, goal) VALUES (?, ?);", (interaction.user.id, goal_per_week))
-            await conn.commit()
+        await WorkoutRepository.set_goal(interaction.user.id, goal_per_week, guild_id=interaction.guild_id)
 
         await interaction.response.send_message(
             f"Your weekly workout goal is set to {goal_per_week} workouts! Let's get moving!", ephemeral=True
@@ -244,30 +209,20 @@ class WorkoutTracker(commands.Cog):
     @app_commands.command(name="opt_out", description="Opt out of the workout tracker.")
     async def opt_out(self, interaction: discord.Interaction):
         uid = interaction.user.id
-        async with await DatabaseManager.get_connection() as conn:
-            async with conn.execute("SELECT 1 FROM workout_goals WHERE user_id = ?;", (uid,)) as cursor:
-                exists = await cursor.fetchone()
-
-            if exists:
-                await conn.execute("DELETE FROM workout_goals WHERE user_id = ?;", (uid,))
-                await conn.execute("DELETE FROM workout_history WHERE user_id = ?;", (uid,))
-                await conn.execute("DELETE FROM pending_workout_warnings WHERE user_id = ?;", (uid,))
-                await conn.commit()
-
-                await interaction.response.send_message(
-                    "You have opted out of the workout tracker. But remember, quitting is for the weak! 😠", ephemeral=False
-                )
-                channel = interaction.channel
-                if channel:
-                    await channel.send(f"📢 {interaction.user.mention} has quit the workout tracker. I'm not really surprised.")
-            else:
-                await interaction.response.send_message("You're not currently participating in the tracker.", ephemeral=True)
+        if await WorkoutRepository.remove_user(uid, guild_id=interaction.guild_id):
+            await interaction.response.send_message(
+                "You have opted out of the workout tracker. But remember, quitting is for the weak! 😠", ephemeral=False
+            )
+            channel = interaction.channel
+            if channel:
+                await channel.send(f"📢 {interaction.user.mention} has quit the workout tracker. I'm not really surprised.")
+        else:
+            await interaction.response.send_message("You're not currently participating in the tracker.", ephemeral=True)
 
     @app_commands.command(name="leaderboard", description="View the workout leaderboard.")
     async def leaderboard(self, interaction: discord.Interaction):
-        async with await DatabaseManager.get_connection() as conn:
-            async with conn.execute("SELECT user_id, goal FROM workout_goals;") as cursor:
-                users = await cursor.fetchall()
+        # Goals and per-week workout counts for every tracked user in a single query
+        users = await WorkoutRepository.goals_and_weekly_counts(guild_id=interaction.guild_id)
 
         if not users:
             await interaction.response.send_message("No one has logged any workouts yet! Be the first to start!", ephemeral=True)
@@ -278,212 +233,70 @@ class WorkoutTracker(commands.Cog):
         # Gather metrics for all users
         total_workouts = {}
         longest_streaks = {}
-        for uid, goal in users:
-            w = await self.get_workouts(uid)
-            total_workouts[uid] = len(w)
-            longest_streaks[uid] = await self.calculate_longest_streak(uid)
+        for uid, (goal, weekly) in users.items():
+            total_workouts[uid] = sum(weekly.values())
+            longest_streaks[uid] = self.longest_streak(weekly, goal)
 
         leaderboard_counts = sorted(total_workouts.items(), key=lambda x: x[1], reverse=True)
         leaderboard_streaks = sorted(longest_streaks.items(), key=lambda x: x[1], reverse=True)
 
-        member_map = {}
-        display_names = {}
-        for uid, _ in leaderboard_counts:
-            member = interaction.guild.get_member(uid) if interaction.guild else None
-            if not member:
-                try:
-                    member = await self.bot.fetch_user(uid)
-                except:
-                    member = None
-            member_map[uid] = member
-            display_names[uid] = member.display_name if member else f"User {uid}"
-
         TOP_N = 10
+        # Only the users shown on either chart need a name and avatar
+        top_ids = [uid for uid, _ in leaderboard_counts[:TOP_N]] + [uid for uid, _ in leaderboard_streaks[:TOP_N]]
+        if interaction.guild:
+            member_map = await self.bot.member_resolver.resolve_many(interaction.guild, top_ids, user_fallback=True)
+        else:
+            users_found = await asyncio.gather(*(self.bot.fetch_user(uid) for uid in top_ids), return_exceptions=True)
+            member_map = {uid: None if isinstance(user, Exception) else user for uid, user in zip(top_ids, users_found)}
+        display_names = {uid: member.display_name if member else f"User {uid}" for uid, member in member_map.items()}
+
         top_counts = [(display_names[uid], count, member_map.get(uid)) for uid, count in leaderboard_counts[:TOP_N]]
         top_streaks = [(display_names[uid], streak, member_map.get(uid)) for uid, streak in leaderboard_streaks[:TOP_N]]
 
-        # Concurrent Avatar Fetching via aiohttp
-        async def fetch_avatar(session, member):
-            if not member:
-                return None
-            try:
-                avatar_url = member.avatar.url if getattr(member, 'avatar', None) else member.display_avatar.url
-                async with session.get(str(avatar_url), timeout=10) as resp:
-                    if resp.status == 200:
-                        return await resp.read()
-            except:
-                pass
-            return None
-
-        # Fetch for counts
-        counts_avatars = []
-        streaks_avatars = []
-        async with aiohttp.ClientSession() as session:
-            tasks_counts = [fetch_avatar(session, t[2]) for t in top_counts]
-            tasks_streaks = [fetch_avatar(session, t[2]) for t in top_streaks]
-            
-            counts_avatars = await asyncio.gather(*tasks_counts)
-            streaks_avatars = await asyncio.gather(*tasks_streaks)
+        # Avatar sprites from the bot's shared avatar cache
+        counts_sprites = await self.bot.avatars.sprites([t[2] for t in top_counts])
+        streaks_sprites = await self.bot.avatars.sprites([t[2] for t in top_streaks])
+
+        # Both charts are drawn at the same time in the render workers
+        def chart(rows, sprites, title, x_label, default_color):
+            return self.bot.renderer.render(
+                charts.bar_chart,
+                "workout",
+                [t[0] for t in rows],
+                [t[1] for t in rows],
+                [sprite.rgba if sprite else None for sprite in sprites],
+                [sprite.hex if sprite else None for sprite in sprites],
+                title,
+                x_label,
+                default_color,
+            )
 
-        # Plot charts asynchronously in separate threads
-        counts_path = os.path.join(os.getenv("DATA_DIR", "."), "workout_top_counts.png")
-        streaks_path = os.path.join(os.getenv("DATA_DIR", "."), "workout_top_streaks.png")
-        
         try:
-            await asyncio.to_thread(self._render_leaderboard_counts, top_counts, counts_avatars, counts_path)
-            await asyncio.to_thread(self._render_leaderboard_streaks, top_streaks, streaks_avatars, streaks_path)
-
-            files = []
-            if os.path.exists(counts_path):
-                files.append(discord.File(counts_path))
-            if os.path.exists(streaks_path):
-                files.append(discord.File(streaks_path))
-
-            if files:
-                await interaction.followup.send(files=files)
-            else:
-                await interaction.followup.send("Could not generate leaderboard images.")
-        finally:
-            for path in [counts_path, streaks_path]:
-                try:
-                    if os.path.exists(path):
-                        os.remove(path)
-                except:
-                    pass
-
-    def _render_leaderboard_counts(self, top_counts, avatars_data, out_path):
-        names = [t[0] for t in top_counts]
-        counts = [t[1] for t in top_counts]
-        num = len(names)
-
-        fig_height = max(4, num * 0.6)
-        fig, ax = plt.subplots(figsize=(10, fig_height))
-        fig.patch.set_facecolor("#2C2F33")
-        ax.set_facecolor("#2C2F33")
-
-        bar_colors = []
-        processed_avatars = []
-        for idx, (name, count, member) in enumerate(top_counts):
-            avatar_bytes = avatars_data[idx]
-            avg_hex = "#10B981" # Sleek emerald
-            avatar_img = None
-            if avatar_bytes:
-                try:
-                    avatar = Image.open(BytesIO(avatar_bytes)).convert("RGBA").resize((36, 36))
-                    avatar_array = np.array(avatar)[..., :3]
-                    avg_color = tuple(avatar_array.mean(axis=(0, 1)).astype(int))
-                    avg_hex = f"#{avg_color[0]:02x}{avg_color[1]:02x}{avg_color[2]:02x}"
-                    mask = Image.new("L", avatar.size, 0)
-                    draw = ImageDraw.Draw(mask)
-                    draw.ellipse((0, 0, avatar.size[0], avatar.size[1]), fill=255)
-                    avatar.putalpha(mask)
-                    avatar_img = avatar
-                except:
-                    pass
-            bar_colors.append(avg_hex)
-            processed_avatars.append(avatar_img)
-
-        y = np.arange(num)
-        bars = ax.barh(y, counts, color=bar_colors, height=0.6, edgecolor="none")
-
-        ax.set_yticks(y)
-        ax.set_yticklabels(names, color="#FFFFFF", fontsize=12)
-        ax.invert_yaxis()
-        ax.set_xlabel("Workouts", color="#FFFFFF", fontsize=12)
-        ax.set_title("Top Workout Totals", color="#FFFFFF", fontsize=16, pad=15)
-        ax.tick_params(axis="x", colors="#FFFFFF")
-
-        max_count = max(counts) if counts else 1
-        for i, b in enumerate(bars):
-            x = b.get_width()
-            y_pos = b.get_y() + b.get_height() / 2
-            avatar_img = processed_avatars[i]
-            if avatar_img is not None:
-                avatar_box = OffsetImage(avatar_img, zoom=1)
-                ab = AnnotationBbox(avatar_box, (x + max_count * 0.03, y_pos), frameon=False, xycoords="data", box_alignment=(0.5, 0.5))
-                ax.add_artist(ab)
-                text_x = x + max_count * 0.08
-            else:
-                text_x = x + max_count * 0.02
-            ax.text(text_x, y_pos, str(counts[i]), va="center", color="#FFFFFF", fontsize=12)
-
-        plt.tight_layout()
-        fig.savefig(out_path, dpi=150, bbox_inches='tight')
-        plt.close(fig)
-
-    def _render_leaderboard_streaks(self, top_streaks, avatars_data, out_path):
-        names = [t[0] for t in top_streaks]
-        streaks = [t[1] for t in top_streaks]
-        num = len(names)
-
-        fig_height = max(4, num * 0.6)
-        fig, ax = plt.subplots(figsize=(10, fig_height))
-        fig.patch.set_facecolor("#2C2F33")
-        ax.set_facecolor("#2C2F33")
-
-        bar_colors = []
-        processed_avatars = []
-        for idx, (name, streak, member) in enumerate(top_streaks):
-            avatar_bytes = avatars_data[idx]
-            avg_hex = "#F59E0B" # Sleek orange
-            avatar_img = None
-            if avatar_bytes:
-                try:
-                    avatar = Image.open(BytesIO(avatar_bytes)).convert("RGBA").resize((36, 36))
-                    avatar_array = np.array(avatar)[..., :3]
-                    avg_color = tuple(avatar_array.mean(axis=(0, 1)).astype(int))
-                    avg_hex = f"#{avg_color[0]:02x}{avg_color[1]:02x}{avg_color[2]:02x}"
-                    mask = Image.new("L", avatar.size, 0)
-                    draw = ImageDraw.Draw(mask)
-                    draw.ellipse((0, 0, avatar.size[0], avatar.size[1]), fill=255)
-                    avatar.putalpha(mask)
-                    avatar_img = avatar
-                except:
-                    pass
-            bar_colors.append(avg_hex)
-            processed_avatars.append(avatar_img)
-
-        y = np.arange(num)
-        bars = ax.barh(y, streaks, color=bar_colors, height=0.6, edgecolor="none")
-
-        ax.set_yticks(y)
-        ax.set_yticklabels(names, color="#FFFFFF", fontsize=12)
-        ax.invert_yaxis()
-        ax.set_xlabel("Longest Streak (weeks)", color="#FFFFFF", fontsize=12)
-        ax.set_title("Top Longest Workout Streaks", color="#FFFFFF", fontsize=16, pad=15)
-        ax.tick_params(axis="x", colors="#FFFFFF")
-
-        max_count = max(streaks) if streaks else 1
-        for i, b in enumerate(bars):
-            x = b.get_width()
-            y_pos = b.get_y() + b.get_height() / 2
-            avatar_img = processed_avatars[i]
-            if avatar_img is not None:
-                avatar_box = OffsetImage(avatar_img, zoom=1)
-                ab = AnnotationBbox(avatar_box, (x + max_count * 0.03, y_pos), frameon=False, xycoords="data", box_alignment=(0.5, 0.5))
-                ax.add_artist(ab)
-                text_x = x + max_count * 0.08
-            else:
-                text_x = x + max_count * 0.02
-            ax.text(text_x, y_pos, str(streaks[i]), va="center", color="#FFFFFF", fontsize=12)
+            counts_png, streaks_png = await asyncio.gather(
+                chart(top_counts, counts_sprites, "Top Workout Totals", "Workouts", "#10B981"),  # Sleek emerald
+                chart(top_streaks, streaks_sprites, "Top Longest Workout Streaks", "Longest Streak (weeks)", "#F59E0B"),  # Sleek orange
+            )
+        except RenderError as e:
+            print(f"[WorkoutTracker] Could not render leaderboard: {e}")
+            await interaction.followup.send("Could not generate leaderboard images.")
+            return
 
-        plt.tight_layout()
-        fig.savefig(out_path, dpi=150, bbox_inches='tight')
-        plt.close(fig)
+        await interaction.followup.send(files=[
+            discord.File(BytesIO(counts_png), filename="workout_top_counts.png"),
+            discord.File(BytesIO(streaks_png), filename="workout_top_streaks.png"),
+        ])
 
     @app_commands.command(name="my_workouts", description="Check how many workouts you've logged this week.")
     async def my_workouts(self, interaction: discord.Interaction):
         uid = interaction.user.id
-        now = datetime.now()
-        week_start = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=now.weekday())
-        
-        all_w = await self.get_workouts(uid)
-        this_week = [w for w in all_w if w >= week_start]
-        total = len(all_w)
-        weekly = len(this_week)
-        goal = await self.get_goal(uid)
-        
-        streak = await self.calculate_streak(uid)
+
+        # Per-week counts aggregated in SQLite cover this week, the total and the streak
+        weekly_counts = await WorkoutRepository.weekly_counts(uid, guild_id=interaction.guild_id)
+        weekly = weekly_counts.get(get_week_start().date(), 0)
+        total = sum(weekly_counts.values())
+        goal = await self.get_goal(uid, interaction.guild_id)
+
+        streak = self.current_streak(weekly_counts, goal)
         streak_msg = f" You're on a **{streak} week streak!**" if streak > 0 else ""
         await interaction.response.send_message(
             f"You've logged **{weekly} workouts** this week and **{total} total**! (Goal: {goal}).{streak_msg}", 
@@ -511,7 +324,8 @@ class WorkoutTracker(commands.Cog):
         if not message.attachments or not isinstance(message.channel, discord.Thread) or message.channel.id != self.SPECIFIC_THREAD_ID:
             return
         
-        goal = await self.get_goal(message.author.id)
+        guild_id = message.guild.id
+        goal = await self.get_goal(message.author.id, guild_id)
         if goal <= 0:
             return
             
@@ -523,13 +337,10 @@ class WorkoutTracker(commands.Cog):
             if reply.content.lower() == "yes":
                 now = datetime.now()
                 # Log workout in SQLite
-                async with await DatabaseManager.get_connection() as conn:
-                    await conn.execute("INSERT OR IGNORE INTO workout_history (user_id, timestamp) VALUES (?, ?);", (message.author.id, now.isoformat()))
-                    await conn.commit()
+                await WorkoutRepository.log_workout(message.author.id, now, guild_id=guild_id)
                 
-                ws = now.replace(hour=0,minute=0,second=0,microsecond=0) - timedelta(days=now.weekday())
-                w = await self.get_workouts(message.author.id)
-                count = sum(1 for d in w if d >= ws)
+                ws = get_week_start(now)
+                count = await WorkoutRepository.count_in_range(message.author.id, ws, ws + timedelta(days=7), guild_id=guild_id)
                 
                 await message.channel.send(
                     f"Workout logged for {message.author.mention}! Total this week: {count} (Goal: {goal})."
@@ -550,12 +361,15 @@ class WorkoutTracker(commands.Cog):
                 delay = (self.weekly_reset_time - now).total_seconds()
                 if delay > self.warning_threshold:
                     await asyncio.sleep(delay - self.warning_threshold)
-                    await self.send_reminders()
+                    # With shards split across processes, only the one handling the tracker's guild runs the jobs
+                    if await owns_channel(self.bot, self.leaderboard_channel):
+                        await self.send_reminders()
                     await asyncio.sleep(self.warning_threshold)
                 else:
                     await asyncio.sleep(delay)
-                
-                await self.reset_weekly_goals()
+
+                if await owns_channel(self.bot, self.leaderboard_channel):
+                    await self.reset_weekly_goals()
                 self.weekly_reset_time = get_next_weekly_reset()
                 print(f"[WorkoutTracker] Next weekly reset scheduled for: {self.weekly_reset_time}")
             except Exception as e:
@@ -563,15 +377,16 @@ class WorkoutTracker(commands.Cog):
                 await asyncio.sleep(60)
 
     async def send_reminders(self):
-        start_of_week = datetime.now().replace(hour=0,minute=0,second=0,microsecond=0) - timedelta(days=datetime.now().weekday())
-        
-        async with await DatabaseManager.get_connection() as conn:
-            async with conn.execute("SELECT user_id, goal FROM workout_goals;") as cursor:
-                users = await cursor.fetchall()
-                
+        start_of_week = get_week_start()
+
+        guild_id = self.tracker_guild_id()
+
+        users = await WorkoutRepository.list_goals(guild_id=guild_id)
+        # This week's count for every user in one range query
+        weekly_counts = await WorkoutRepository.counts_in_range(start_of_week, start_of_week + timedelta(days=7), guild_id=guild_id)
+
         for user_id, goal in users:
-            w = await self.get_workouts(user_id)
-            weekly_count = sum(1 for d in w if d >= start_of_week)
+            weekly_count = weekly_counts.get(user_id, 0)
             if weekly_count < goal:
                 try:
                     user = await self.bot.fetch_user(user_id)
@@ -592,28 +407,26 @@ class WorkoutTracker(commands.Cog):
                 print(f"[WorkoutTracker] Leaderboard channel {self.leaderboard_channel} not found: {e}")
                 return
 
-        start_of_week = datetime.now().replace(hour=0,minute=0,second=0,microsecond=0) - timedelta(days=datetime.now().weekday())
-        
-        async with await DatabaseManager.get_connection() as conn:
-            async with conn.execute("SELECT user_id, goal FROM workout_goals;") as cursor:
-                users = await cursor.fetchall()
+        this_week = get_week_start().date()
+
+        # Goals and per-week counts for everyone in one query; streaks and misses derive from them
+        guild_id = channel.guild.id if getattr(channel, "guild", None) else None
+        users = await WorkoutRepository.goals_and_weekly_counts(guild_id=guild_id)
 
         met = []
         missed = []
-        for uid, goal in users:
-            w = await self.get_workouts(uid)
-            weekly_count = sum(1 for d in w if d >= start_of_week)
+        for uid, (goal, weekly) in users.items():
+            weekly_count = weekly.get(this_week, 0)
             if weekly_count >= goal:
-                met.append((uid, goal, weekly_count))
+                met.append((uid, goal, weekly_count, self.current_streak(weekly, goal)))
             else:
-                misses = await self.calculate_consecutive_misses(uid)
+                misses = self.consecutive_misses(weekly, goal)
                 missed.append((uid, goal, weekly_count, misses))
 
         # Announce who hit goals
         if met:
             msg = "🎉 **Users Who Met Their Goal** 🎉\n"
-            for uid, g, c in met:
-                s = await self.calculate_streak(uid)
+            for uid, g, c, s in met:
                 msg += f"**<@{uid}>**: Goal **{g}** - Logged **{c}**"
                 if s:
                     msg += f" - Streak: **{s} week{'s' if s>1 else ''}**"
@@ -621,25 +434,19 @@ class WorkoutTracker(commands.Cog):
             await channel.send(msg[:2000])
 
         # Process old warnings that were NOT acknowledged within 1 week
-        async with await DatabaseManager.get_connection() as conn:
-            async with conn.execute("SELECT user_id, message_id, timestamp FROM pending_workout_warnings;") as cursor:
-                pending_warnings = await cursor.fetchall()
-            
-            for p_uid, p_msg_id, p_ts_str in pending_warnings:
-                p_ts = datetime.fromisoformat(p_ts_str)
-                if datetime.now() - p_ts > timedelta(weeks=1):
-                    # Kick user out of tracker
-                    await conn.execute("DELETE FROM workout_goals WHERE user_id = ?;", (p_uid,))
-                    await conn.execute("DELETE FROM workout_history WHERE user_id = ?;", (p_uid,))
-                    await conn.execute("DELETE FROM pending_workout_warnings WHERE user_id = ?;", (p_uid,))
-                    await conn.commit()
-                    
-                    try:
-                        # Attempt to edit button message to say they were removed
-                        msg = await channel.fetch_message(p_msg_id)
-                        await msg.edit(content=f"❌ **<@{p_uid}> did not acknowledge their warning in time and was removed from the tracker.** Quitting is for the weak! 😠", view=None)
-                    except:
-                        await channel.send(f"❌ <@{p_uid}> did not acknowledge their warning in time and was removed from the tracker.")
+        pending_warnings = await WorkoutRepository.list_warnings(guild_id=guild_id)
+
+        for p_uid, p_msg_id, p_ts in pending_warnings:
+            if datetime.now() - p_ts > timedelta(weeks=1):
+                # Kick user out of tracker
+                await WorkoutRepository.remove_user(p_uid, guild_id=guild_id)
+
+                try:
+                    # Attempt to edit button message to say they were removed
+                    msg = await channel.fetch_message(p_msg_id)
+                    await msg.edit(content=f"❌ **<@{p_uid}> did not acknowledge their warning in time and was removed from the tracker.** Quitting is for the weak! 😠", view=None)
+                except:
+                    await channel.send(f"❌ <@{p_uid}> did not acknowledge their warning in time and was removed from the tracker.")
 
         # Announce failures & Create new warnings with Interactive Buttons
         for uid, g, c, misses in missed:
@@ -657,12 +464,7 @@ class WorkoutTracker(commands.Cog):
                 sent = await channel.send(text[:2000], view=view)
                 
                 # Save pending warning in SQLite
-                async with await DatabaseManager.get_connection() as conn:
-                    await conn.execute(
-                        "INSERT OR REPLACE INTO pending_workout_warnings (user_id, message_id, timestamp) VALUES (?, ?, ?);",
-                        (uid, sent.id, datetime.now().isoformat())
-                    )
-                    await conn.commit()
+                await WorkoutRepository.add_warning(uid, sent.id, datetime.now(), guild_id=guild_id)
 
         print("[WorkoutTracker] Weekly goals reset successfully.")
 
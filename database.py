@@ -1,115 +1,884 @@
+import asyncio
 import os
-import json
+import sqlite3
+import time
+from collections import OrderedDict, defaultdict, deque
 import aiosqlite
 from pathlib import Path
 
+from legacy_import import finish_import, import_records, iter_connection_records, iter_workout_records
+from query_stats import DB_QUERY_STATS, QUERY_STATS, ProfiledConnection
+from schema import LATEST_SCHEMA_VERSION, apply_migrations
+
 BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = os.path.join(os.getenv("DATA_DIR", "."), "birthdays.db")
+DB_POOL_READERS = int(os.getenv("DB_POOL_READERS", 4))
+# How long closing the pool waits for borrowed connections to come back
+DB_POOL_CLOSE_TIMEOUT = float(os.getenv("DB_POOL_CLOSE_TIMEOUT", 10))
+DB_WRITE_FLUSH_MS = float(os.getenv("DB_WRITE_FLUSH_MS", 5))
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", 100))
+DB_BACKUP_PAGES = int(os.getenv("DB_BACKUP_PAGES", 64))
+# "single" keeps everything in DB_PATH; "guild" gives every guild its own file next to a shared catalog
+DB_PARTITION_MODE = os.getenv("DB_PARTITION_MODE", "single").strip().lower()
+DB_PARTITION_DIR = os.getenv("DB_PARTITION_DIR") or os.path.join(os.getenv("DATA_DIR", "."), "guilds")
+DB_PARTITION_MAX_OPEN = int(os.getenv("DB_PARTITION_MAX_OPEN", 64))
+DB_PARTITION_READERS = int(os.getenv("DB_PARTITION_READERS", 1))
+DB_DEFAULT_GUILD_ID = os.getenv("DB_DEFAULT_GUILD_ID")
+DB_BACKUP_STEP_SLEEP_MS = float(os.getenv("DB_BACKUP_STEP_SLEEP_MS", 5))
+# Retention deletes and incremental vacuum work in short steps so interactive writes keep flowing
+DB_PRUNE_BATCH_SIZE = int(os.getenv("DB_PRUNE_BATCH_SIZE", 500))
+DB_PRUNE_PAUSE_MS = float(os.getenv("DB_PRUNE_PAUSE_MS", 20))
+DB_VACUUM_PAGES = int(os.getenv("DB_VACUUM_PAGES", 256))
+
+# Named storage profiles, applied once to every connection when it is opened.
+# All of them use WAL so long write transactions never block readers.
+STORAGE_PROFILES = {
+    # fsync on every commit; survives power loss as well as crashes
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -8000,  # negative values are KiB
+        "temp_store": "DEFAULT",
+    },
+    # fsync only at checkpoints; the last commits can be lost on power loss but never corrupted
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+    },
+    # no fsync at all; only suitable for scratch data or benchmarks
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_STORAGE_PROFILE = "balanced"
+
+# Tables that move into per-guild files in partitioned mode, with the column naming the guild.
+# Tables without one predate multi-guild support; their existing rows belong to DB_DEFAULT_GUILD_ID.
+PARTITIONED_TABLES = {
+    "birthdays": None,
+    "connections": None,
+    "workout_goals": None,
+    "workout_history": None,
+    "pending_workout_warnings": None,
+    "wordle_stats_cache": None,
+    "server_wrapped_metrics": "guild_id",
+    "server_wrapped_word_freq": "guild_id",
+    "server_wrapped_most_reacted": "guild_id",
+    "server_wrapped_longest_messages": "guild_id",
+    "server_wrapped_cache_status": "guild_id",
+}
+
+
+def memory_uri(name: str = "danbot") -> str:
+    """URI of a named in-memory database shared by every connection in this process."""
+    return f"file:{name}?mode=memory&cache=shared"
+
+
+def is_memory_path(db_path) -> bool:
+    return str(db_path).startswith("file:") and "mode=memory" in str(db_path)
+
+
+def resolve_storage_profile(name) -> str:
+    """Return a known storage profile name, falling back to the default."""
+    name = (name or DEFAULT_STORAGE_PROFILE).strip().lower()
+    if name not in STORAGE_PROFILES:
+        print(f"[Database] Unknown DB_STORAGE_PROFILE '{name}', using '{DEFAULT_STORAGE_PROFILE}'.")
+        return DEFAULT_STORAGE_PROFILE
+    return name
+
+
+async def open_connection(db_path, readonly: bool = False, profile: str = DEFAULT_STORAGE_PROFILE) -> aiosqlite.Connection:
+    """Open a new aiosqlite connection with the per-connection pragmas applied."""
+    # A larger statement cache lets the repositories' fixed SQL stay prepared
+    # uri=True lets db_path name a shared in-memory database (see memory_uri)
+    if DB_QUERY_STATS:
+        conn = ProfiledConnection(db_path, QUERY_STATS, cached_statements=256, uri=True)
+    else:
+        conn = aiosqlite.connect(db_path, cached_statements=256, uri=True)
+    await conn
+    # Enable foreign key support
+    await conn.execute("PRAGMA foreign_keys = ON;")
+    if not readonly:
+        # Only takes effect on a file without tables yet; older files are converted by enable_incremental_vacuum
+        await conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+    for pragma, value in STORAGE_PROFILES[profile].items():
+        await conn.execute(f"PRAGMA {pragma} = {value};")
+    if readonly:
+        # Guard against accidental writes through a reader connection
+        await conn.execute("PRAGMA query_only = ON;")
+        if is_memory_path(db_path):
+            # Shared-cache tables are locked per connection and fail instantly instead of
+            # waiting, so readers skip table read locks rather than erroring mid-write
+            await conn.execute("PRAGMA read_uncommitted = ON;")
+    return conn
+
+
+async def enable_incremental_vacuum(conn: aiosqlite.Connection) -> bool:
+    """Switch an existing file to auto_vacuum=INCREMENTAL with a one-off VACUUM; return whether it ran."""
+    async with conn.execute("PRAGMA auto_vacuum;") as cursor:
+        if (await cursor.fetchone())[0] == 2:
+            return False
+    await conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+    await conn.execute("VACUUM;")
+    return True
+
+
+class ConnectionPool:
+    """A fixed set of long-lived connections: several readers and a single writer."""
+
+    def __init__(self, db_path, readers: int = DB_POOL_READERS, profile: str = DEFAULT_STORAGE_PROFILE):
+        self.db_path = db_path
+        self.profile = profile
+        self.reader_count = max(1, readers)
+        self._readers = asyncio.Queue()
+        self._writer = None
+        self._writer_lock = asyncio.Lock()
+        self._connections = []
+        self._closing = False
+        self._closed = False
+
+    async def open(self):
+        self._writer = await open_connection(self.db_path, profile=self.profile)
+        self._connections.append(self._writer)
+        for _ in range(self.reader_count):
+            conn = await open_connection(self.db_path, readonly=True, profile=self.profile)
+            self._connections.append(conn)
+            self._readers.put_nowait(conn)
+
+    async def close(self, timeout: float = DB_POOL_CLOSE_TIMEOUT):
+        """Stop lending connections, wait for borrowed ones to come back, then close them all."""
+        self._closing = True
+        # Wait for the writer to be handed back so an in-flight write can commit
+        async with self._writer_lock:
+            drained = []
+            try:
+                # Every reader back means no SELECT is still running on one
+                await asyncio.wait_for(self._drain_readers(drained), timeout)
+            except asyncio.TimeoutError:
+                print(f"[Database] {self.reader_count - len(drained)} reader connection(s) still busy after {timeout:g}s; closing anyway.")
+            self._closed = True
+            for conn in self._connections:
+                try:
+                    await conn.close()
+                except Exception as e:
+                    print(f"[Database] Error closing pooled connection: {e}")
+            self._connections.clear()
+            self._writer = None
+
+    async def _drain_readers(self, drained: list):
+        while len(drained) < self.reader_count:
+            drained.append(await self._readers.get())
+
+    async def acquire(self, readonly: bool = False) -> aiosqlite.Connection:
+        if self._closing:
+            raise RuntimeError("The connection pool is closed.")
+        if readonly:
+            return await self._readers.get()
+        await self._writer_lock.acquire()
+        if self._closed:
+            # Queued for the writer while the pool was closing
+            self._writer_lock.release()
+            raise RuntimeError("The connection pool is closed.")
+        return self._writer
+
+    async def release(self, conn: aiosqlite.Connection, readonly: bool = False):
+        if self._closed:
+            # Closed underneath a borrower that outlived the close timeout; nothing to hand back
+            if not readonly:
+                self._writer_lock.release()
+            return
+        try:
+            # Never hand a connection back with a dangling transaction
+            if conn.in_transaction:
+                await conn.rollback()
+        finally:
+            if readonly:
+                self._readers.put_nowait(conn)
+            else:
+                self._writer_lock.release()
+
+
+class WriteCoalescer:
+    """Write-behind queue that commits small writes from every cog in shared transactions.
+
+    Writes are collected for up to ``flush_interval`` seconds or ``batch_size``
+    units and then run on the pool's writer inside one transaction, each unit
+    in its own savepoint so a failing unit does not take the others down.
+    Callers are only resolved once the transaction has committed.
+
+    Under the default ``balanced`` profile the writer commits with
+    ``synchronous=NORMAL``, which is not fsynced, so each batch is committed
+    with ``synchronous=FULL`` instead: one fsync per batch, and an
+    acknowledged write survives power loss. ``durable`` already commits that
+    way; ``fast`` opts out of fsync altogether and keeps it off here too.
+    """
+
+    def __init__(self, pool: ConnectionPool, flush_interval: float = DB_WRITE_FLUSH_MS / 1000, batch_size: int = DB_WRITE_BATCH_SIZE):
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        # synchronous level to restore after each batch, or None when the profile's own is kept
+        profile_sync = STORAGE_PROFILES[pool.profile]["synchronous"]
+        self._restore_sync = profile_sync if profile_sync == "NORMAL" else None
+        self._queue = asyncio.Queue()
+        self._task = None
+        self._stopping = False
+        self.flushes = 0
+        self.units = 0
+        self.failed_units = 0
+        # Recent samples for the percentiles reported by stats()
+        self._flush_latencies = deque(maxlen=1000)
+        self._ack_latencies = deque(maxlen=1000)
+        self._batch_sizes = deque(maxlen=1000)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything already queued and stop the background task."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, statements: list) -> list:
+        """Queue one atomic unit of (sql, params) statements and wait for its commit."""
+        if self._stopping:
+            raise RuntimeError("The write coalescer is shutting down.")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((statements, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            await self._flush_safely(batch)
+            if stop:
+                break
+        # Anything queued behind the stop marker still gets written
+        leftovers = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                leftovers.append(item)
+        for start in range(0, len(leftovers), self.batch_size):
+            await self._flush_safely(leftovers[start:start + self.batch_size])
+
+    async def _flush_safely(self, batch: list):
+        """Flush ``batch``, failing its writers on any unexpected error so the loop keeps running."""
+        try:
+            await self._flush(batch)
+        except Exception as e:
+            print(f"[Database] Coalesced write batch failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    self.failed_units += 1
+                    future.set_exception(e)
+
+    async def _flush(self, batch: list):
+        started = time.perf_counter()
+        try:
+            results = await self._write_batch(batch)
+        except Exception as e:
+            # The transaction itself failed, so nothing in the batch is durable
+            results = [(future, None, e) for _, future, _ in batch]
+
+        finished = time.perf_counter()
+        self.flushes += 1
+        self.units += len(batch)
+        self._flush_latencies.append(finished - started)
+        self._batch_sizes.append(len(batch))
+        for (_, _, queued_at), (future, rowcounts, error) in zip(batch, results):
+            self._ack_latencies.append(finished - queued_at)
+            if future.done():
+                continue
+            if error is not None:
+                self.failed_units += 1
+                future.set_exception(error)
+            else:
+                future.set_result(rowcounts)
+
+    async def _write_batch(self, batch: list) -> list:
+        """Run ``batch`` in one transaction and return (future, rowcounts, error) for each unit."""
+        results = []
+        conn = await self.pool.acquire()
+        try:
+            if self._restore_sync is not None:
+                await conn.execute("PRAGMA synchronous = FULL;")
+            await conn.execute("BEGIN;")
+            for statements, future, _ in batch:
+                await conn.execute("SAVEPOINT coalesced_write;")
+                try:
+                    rowcounts = []
+                    for sql, params in statements:
+                        cursor = await conn.execute(sql, params)
+                        rowcounts.append(cursor.rowcount)
+                        await cursor.close()
+                    await conn.execute("RELEASE coalesced_write;")
+                    results.append((future, rowcounts, None))
+                except Exception as e:
+                    await conn.execute("ROLLBACK TO coalesced_write;")
+                    await conn.execute("RELEASE coalesced_write;")
+                    results.append((future, None, e))
+            await conn.commit()
+        finally:
+            await self._reset_writer(conn)
+        return results
+
+    async def _reset_writer(self, conn: aiosqlite.Connection):
+        """Roll back whatever a failed batch left open, restore the profile's synchronous level and release."""
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            if self._restore_sync is not None:
+                await conn.execute(f"PRAGMA synchronous = {self._restore_sync};")
+        except Exception as e:
+            # The batch's outcome is already decided; a broken writer shows up on the next one
+            print(f"[Database] Error resetting the writer after a coalesced batch: {e}")
+        finally:
+            await self.pool.release(conn)
+
+    def stats(self) -> dict:
+        """Return flush latency and batch size metrics."""
+        def summary(samples, scale=1.0):
+            if not samples:
+                return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+            ordered = sorted(samples)
+            return {
+                "p50": ordered[len(ordered) // 2] * scale,
+                "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * scale,
+                "max": ordered[-1] * scale,
+            }
+
+        return {
+            "flushes": self.flushes,
+            "units": self.units,
+            "failed_units": self.failed_units,
+            "queued": self._queue.qsize(),
+            "avg_batch_size": self.units / self.flushes if self.flushes else 0.0,
+            "batch_size": summary(self._batch_sizes),
+            "flush_ms": summary(self._flush_latencies, 1000),
+            "ack_ms": summary(self._ack_latencies, 1000),
+        }
+
+
+class GuildPartition:
+    """One guild's database file with its own small pool and write coalescer."""
+
+    def __init__(self, guild_id: int, path: str, readers: int, profile: str):
+        self.guild_id = guild_id
+        self.path = path
+        self.pool = ConnectionPool(path, readers=readers, profile=profile)
+        self.writes = WriteCoalescer(self.pool)
+        self.users = 0
+
+    async def open(self):
+        await self.pool.open()
+        self.writes.start()
+
+    async def close(self):
+        await self.writes.stop()
+        await self.pool.close()
+
+
+class PartitionCache:
+    """Keeps at most ``max_open`` guild partitions open, closing the least recently used idle ones."""
+
+    def __init__(self, directory: str, max_open: int = DB_PARTITION_MAX_OPEN, readers: int = DB_PARTITION_READERS,
+                 profile: str = DEFAULT_STORAGE_PROFILE, on_create=None):
+        self.directory = directory
+        self.max_open = max(1, max_open)
+        self.readers = readers
+        self.profile = profile
+        # Awaited with the guild id whenever a partition file is created
+        self.on_create = on_create
+        self._open = OrderedDict()
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, guild_id: int) -> str:
+        return os.path.join(self.directory, f"{int(guild_id)}.db")
+
+    async def ensure_schema(self, guild_id: int) -> str:
+        """Create the guild's file if needed and bring its schema up to date; return its path."""
+        path = self.path_for(guild_id)
+        created = not os.path.exists(path)
+        os.makedirs(self.directory, exist_ok=True)
+        conn = await open_connection(path, profile=self.profile)
+        try:
+            await apply_migrations(conn)
+            if not created:
+                await enable_incremental_vacuum(conn)
+        finally:
+            await conn.close()
+        if created and self.on_create is not None:
+            await self.on_create(guild_id, path)
+        return path
+
+    async def acquire(self, guild_id: int) -> GuildPartition:
+        partition = self._open.get(guild_id)
+        if partition is None:
+            async with self._lock:
+                partition = self._open.get(guild_id)
+                if partition is None:
+                    self.misses += 1
+                    path = await self.ensure_schema(guild_id)
+                    partition = GuildPartition(guild_id, path, self.readers, self.profile)
+                    await partition.open()
+                    self._open[guild_id] = partition
+        else:
+            self.hits += 1
+        self._open.move_to_end(guild_id)
+        partition.users += 1
+        await self._evict()
+        return partition
+
+    async def release(self, partition: GuildPartition):
+        partition.users -= 1
+        await self._evict()
+
+    async def _evict(self):
+        # Partitions still in use are skipped, so the cache can briefly exceed max_open
+        while len(self._open) > self.max_open:
+            idle = next((gid for gid, p in self._open.items() if p.users == 0), None)
+            if idle is None:
+                return
+            partition = self._open.pop(idle)
+            self.evictions += 1
+            await partition.close()
+
+    async def close(self):
+        partitions = list(self._open.values())
+        self._open.clear()
+        for partition in partitions:
+            await partition.close()
+
+    def stats(self) -> dict:
+        return {
+            "open": len(self._open),
+            "max_open": self.max_open,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class PartitionConnectionContext:
+    def __init__(self, partitions: PartitionCache, guild_id: int, readonly: bool = False):
+        self.partitions = partitions
+        self.guild_id = guild_id
+        self.readonly = readonly
+        self.partition = None
+        self.conn = None
+
+    async def __aenter__(self) -> aiosqlite.Connection:
+        self.partition = await self.partitions.acquire(self.guild_id)
+        try:
+            self.conn = await self.partition.pool.acquire(self.readonly)
+        except BaseException:
+            await self.partitions.release(self.partition)
+            raise
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            await self.partition.pool.release(self.conn, self.readonly)
+        finally:
+            await self.partitions.release(self.partition)
+
 
 class AsyncConnectionContext:
-    def __init__(self, db_path):
+    def __init__(self, db_path, pool: ConnectionPool = None, readonly: bool = False, profile: str = DEFAULT_STORAGE_PROFILE):
         self.db_path = db_path
+        self.pool = pool
+        self.readonly = readonly
+        self.profile = profile
         self.conn = None
 
     async def __aenter__(self) -> aiosqlite.Connection:
-        self.conn = aiosqlite.connect(self.db_path)
-        await self.conn
-        # Enable foreign key support
-        await self.conn.execute("PRAGMA foreign_keys = ON;")
+        if self.pool is not None:
+            self.conn = await self.pool.acquire(self.readonly)
+        else:
+            self.conn = await open_connection(self.db_path, self.readonly, self.profile)
         return self.conn
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.conn:
+        if not self.conn:
+            return
+        if self.pool is not None:
+            await self.pool.release(self.conn, self.readonly)
+        else:
             await self.conn.close()
 
 class DatabaseManager:
-    @staticmethod
-    async def get_connection() -> AsyncConnectionContext:
-        """Establish and return an asynchronous SQLite database connection."""
-        return AsyncConnectionContext(DB_PATH)
+    _pool: ConnectionPool = None
+    _writes: WriteCoalescer = None
+    _partitions: PartitionCache = None
+    _memory_anchor: sqlite3.Connection = None
+    db_path: str = DB_PATH
+    storage_profile: str = resolve_storage_profile(os.getenv("DB_STORAGE_PROFILE"))
+    partitioned: bool = DB_PARTITION_MODE == "guild"
+
+    @classmethod
+    def configure(cls, db_path: str = None, memory=False, storage_profile: str = None) -> str:
+        """Point the manager at another database before the pool is opened; return the new target.
+
+        ``memory=True`` (or a name) selects a shared-cache in-memory database,
+        which tests, benchmarks and fixtures can fill and query without
+        touching disk. Partitioning is off in memory mode.
+        """
+        if cls._pool is not None:
+            raise RuntimeError("DatabaseManager.configure() must be called before open_pool()")
+        if cls._memory_anchor is not None:
+            cls._memory_anchor.close()
+            cls._memory_anchor = None
+
+        if memory:
+            cls.db_path = memory_uri(memory if isinstance(memory, str) else "danbot")
+            cls.partitioned = False
+            # A shared in-memory database only lives while a connection to it is open
+            cls._memory_anchor = sqlite3.connect(cls.db_path, uri=True, check_same_thread=False)
+        else:
+            cls.db_path = db_path or DB_PATH
+        if storage_profile is not None:
+            cls.storage_profile = resolve_storage_profile(storage_profile)
+        return cls.db_path
+
+    @classmethod
+    async def get_connection(cls, readonly: bool = False, guild_id: int = None):
+        """Return a connection context, borrowing from the pool when it is open.
+
+        Read-only callers share the reader connections; everyone else is
+        serialized through the single writer. In partitioned mode a
+        ``guild_id`` routes the connection to that guild's own file; without
+        one it goes to the shared catalog database.
+        """
+        if guild_id is not None and cls._partitions is not None:
+            return PartitionConnectionContext(cls._partitions, guild_id, readonly)
+        return AsyncConnectionContext(cls.db_path, pool=cls._pool, readonly=readonly, profile=cls.storage_profile)
+
+    @classmethod
+    async def open_pool(cls, readers: int = DB_POOL_READERS):
+        """Open the long-lived connection pool used by get_connection."""
+        if cls._pool is not None:
+            return
+        pool = ConnectionPool(cls.db_path, readers=readers, profile=cls.storage_profile)
+        await pool.open()
+        cls._pool = pool
+        cls._writes = WriteCoalescer(pool)
+        cls._writes.start()
+        print(f"[Database] Connection pool opened ({pool.reader_count} readers, 1 writer).")
+        if cls.partitioned:
+            cls._partitions = PartitionCache(DB_PARTITION_DIR, profile=cls.storage_profile, on_create=cls._register_partition)
+            print(f"[Database] Per-guild partitions enabled in {DB_PARTITION_DIR} (at most {DB_PARTITION_MAX_OPEN} open).")
+
+    @classmethod
+    async def close_pool(cls):
+        """Flush queued writes and close every pooled connection; later calls fall back to per-call connections."""
+        partitions, cls._partitions = cls._partitions, None
+        if partitions is not None:
+            await partitions.close()
+        writes, cls._writes = cls._writes, None
+        if writes is not None:
+            await writes.stop()
+        pool, cls._pool = cls._pool, None
+        if pool is not None:
+            await pool.close()
+            print("[Database] Connection pool closed.")
+
+    @classmethod
+    async def write(cls, sql: str, params=(), guild_id: int = None) -> int:
+        """Run a single write through the coalescer and return its rowcount once committed.
+
+        Committed means fsynced under the ``durable`` and ``balanced`` profiles,
+        so the write survives power loss; under ``fast`` it only survives a crash
+        of the bot process.
+        """
+        return (await cls.write_many([(sql, params)], guild_id=guild_id))[0]
+
+    @classmethod
+    async def write_many(cls, statements: list, guild_id: int = None) -> list:
+        """Run several (sql, params) writes atomically and return their rowcounts once committed."""
+        if guild_id is not None and cls._partitions is not None:
+            partition = await cls._partitions.acquire(guild_id)
+            try:
+                return await partition.writes.submit(statements)
+            finally:
+                await cls._partitions.release(partition)
+        if cls._writes is not None:
+            return await cls._writes.submit(statements)
+        # No pool (scripts, benchmarks): commit directly on a one-off connection
+        async with await cls.get_connection() as conn:
+            rowcounts = []
+            for sql, params in statements:
+                cursor = await conn.execute(sql, params)
+                rowcounts.append(cursor.rowcount)
+                await cursor.close()
+            await conn.commit()
+        return rowcounts
+
+    @classmethod
+    def write_stats(cls) -> dict:
+        """Return the coalescer's flush latency and batch size metrics (empty without a pool)."""
+        return cls._writes.stats() if cls._writes is not None else {}
+
+    @classmethod
+    def partition_stats(cls) -> dict:
+        """Return the partition cache's open count, hits, misses and evictions (empty unless partitioned)."""
+        return cls._partitions.stats() if cls._partitions is not None else {}
+
+    @classmethod
+    async def _register_partition(cls, guild_id: int, path: str):
+        await cls.write(
+            "INSERT OR IGNORE INTO guild_partitions (guild_id, path, created_at) VALUES (?, ?, ?);",
+            (guild_id, path, int(time.time()))
+        )
+
+    @classmethod
+    async def partition_paths(cls) -> dict:
+        """Return {guild_id: path} for every guild partition recorded in the catalog."""
+        async with await cls.get_connection(readonly=True) as conn:
+            async with conn.execute("SELECT guild_id, path FROM guild_partitions ORDER BY guild_id;") as cursor:
+                return dict(await cursor.fetchall())
+
+    @classmethod
+    async def split_into_partitions(cls):
+        """Move guild data still in the catalog database into per-guild files.
+
+        Rows of tables with a guild column go to their guild's file; rows of
+        the older tables without one go to DB_DEFAULT_GUILD_ID. Each guild is
+        copied with ATTACH and then deleted from the catalog. Copies use
+        INSERT OR IGNORE, so an interrupted split can simply run again.
+        """
+        if cls._partitions is None:
+            return
+        default_guild = int(DB_DEFAULT_GUILD_ID) if DB_DEFAULT_GUILD_ID else None
+
+        guilds = set()
+        unscoped = []
+        async with await cls.get_connection(readonly=True) as conn:
+            for table, column in PARTITIONED_TABLES.items():
+                if column:
+                    async with conn.execute(f"SELECT DISTINCT {column} FROM {table};") as cursor:
+                        guilds.update(row[0] for row in await cursor.fetchall())
+                else:
+                    async with conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table});") as cursor:
+                        if (await cursor.fetchone())[0]:
+                            unscoped.append(table)
+        if unscoped:
+            if default_guild is None:
+                print(f"[Database] Tables {unscoped} have unpartitioned rows; set DB_DEFAULT_GUILD_ID to move them into a guild partition.")
+            else:
+                guilds.add(default_guild)
+        if not guilds:
+            return
+
+        print(f"[Database] Splitting data for {len(guilds)} guild(s) into per-guild partitions...")
+        for guild_id in sorted(guilds):
+            path = await cls._partitions.ensure_schema(guild_id)
+            moved = defaultdict(int)
+            async with await cls.get_connection() as conn:
+                await conn.execute("ATTACH DATABASE ? AS guild;", (path,))
+                try:
+                    for table, column in PARTITIONED_TABLES.items():
+                        if column:
+                            where, params = f"WHERE {column} = ?", (guild_id,)
+                        elif guild_id == default_guild:
+                            where, params = "", ()
+                        else:
+                            continue
+                        # Both files are built by the same migrations, so the column order matches
+                        await conn.execute(f"INSERT OR IGNORE INTO guild.{table} SELECT * FROM main.{table} {where};", params)
+                        cursor = await conn.execute(f"DELETE FROM main.{table} {where};", params)
+                        moved[table] = cursor.rowcount
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+                finally:
+                    await conn.execute("DETACH DATABASE guild;")
+            summary = ", ".join(f"{n} {t}" for t, n in moved.items() if n)
+            print(f"[Database] Guild {guild_id}: moved {summary or 'no rows'} into {path}")
+
+    @classmethod
+    def query_stats(cls, limit: int = None) -> list:
+        """Return per-statement latency summaries, slowest total first (empty unless DB_QUERY_STATS is on)."""
+        return QUERY_STATS.snapshot(limit) if DB_QUERY_STATS else []
+
+    @classmethod
+    def slow_queries(cls, limit: int = None) -> list:
+        """Return the most recent statements that exceeded DB_SLOW_QUERY_MS, newest first."""
+        entries = list(reversed(QUERY_STATS.slow_log))
+        return entries[:limit] if limit else entries
+
+    @classmethod
+    def dump_query_stats(cls, path: str):
+        """Write the statement histograms and slow-query log to a JSON file."""
+        QUERY_STATS.dump(path)
 
     @classmethod
     async def initialize(cls):
-        """Create all database tables asynchronously if they do not exist."""
-        print(f"[Database] Initializing database at: {os.path.abspath(DB_PATH)}")
+        """Bring the database schema up to date, applying any pending migrations."""
+        location = cls.db_path if is_memory_path(cls.db_path) else os.path.abspath(cls.db_path)
+        print(f"[Database] Initializing database at: {location}")
         async with await cls.get_connection() as conn:
-            # 1. Birthdays table (preserved schema)
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS birthdays (
-                    user_id INTEGER,
-                    username TEXT,
-                    birthday TEXT,
-                    PRIMARY KEY (user_id, username)
-                );
-            """)
-
-            # 2. Connection Chart table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS connections (
-                    user1_id INTEGER,
-                    user2_id INTEGER,
-                    connection TEXT,
-                    PRIMARY KEY (user1_id, user2_id, connection)
-                );
-            """)
-
-            # 3. Workout Tracker Goals table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS workout_goals (
-                    user_id INTEGER PRIMARY KEY,
-                    goal INTEGER NOT NULL
-                );
-            """)
-
-            # 4. Workout Tracker History table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS workout_history (
-                    user_id INTEGER,
-                    timestamp TEXT,
-                    PRIMARY KEY (user_id, timestamp)
-                );
-            """)
-
-            # 5. Workout Tracker Pending Warnings table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS pending_workout_warnings (
-                    user_id INTEGER PRIMARY KEY,
-                    message_id INTEGER NOT NULL,
-                    timestamp TEXT NOT NULL
-                );
-            """)
-
-            # 6. Server Wrapped Metrics table (Lightweight aggregated tracking)
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS server_wrapped_metrics (
-                    guild_id INTEGER,
-                    user_id INTEGER,
-                    year INTEGER,
-                    message_count INTEGER DEFAULT 0,
-                    word_count INTEGER DEFAULT 0,
-                    active_hours TEXT, -- Stored as a JSON array string representing 24 hourly buckets
-                    reaction_count INTEGER DEFAULT 0,
-                    PRIMARY KEY (guild_id, user_id, year)
-                );
-            """)
-
-            # 7. Wordle Stats Cache Table (To avoid crawling channel history repeatedly)
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS wordle_stats_cache (
-                    message_id INTEGER PRIMARY KEY,
-                    user_id INTEGER,
-                    timestamp TEXT,
-                    score TEXT, -- 1-6 or X
-                    group_streak INTEGER
-                );
-            """)
+            async with conn.execute("PRAGMA journal_mode;") as cursor:
+                journal_mode = (await cursor.fetchone())[0]
+            settings = ", ".join(f"{k}={v}" for k, v in STORAGE_PROFILES[cls.storage_profile].items() if k != "journal_mode")
+            print(f"[Database] Storage profile '{cls.storage_profile}' active (journal_mode={journal_mode}, {settings})")
 
-            await conn.commit()
-        print("[Database] All tables initialized successfully.")
+            applied = await apply_migrations(conn)
+            started = time.perf_counter()
+            if await enable_incremental_vacuum(conn):
+                print(f"[Database] Converted the database to auto_vacuum=INCREMENTAL in {time.perf_counter() - started:.2f}s (one-time VACUUM).")
+        if applied:
+            print(f"[Database] Applied schema migrations {applied}; schema is at version {LATEST_SCHEMA_VERSION}.")
+        else:
+            print(f"[Database] Schema is current (version {LATEST_SCHEMA_VERSION}).")
+
+    @classmethod
+    async def backup(cls, target_path: str, pages: int = DB_BACKUP_PAGES, step_sleep: float = DB_BACKUP_STEP_SLEEP_MS / 1000,
+                     db_path: str = None) -> dict:
+        """Copy the live database (or the file at ``db_path``) to ``target_path`` with SQLite's online backup API.
+
+        Pages are copied ``pages`` at a time on a dedicated connection's thread,
+        pausing ``step_sleep`` seconds between steps to throttle disk I/O; the
+        event loop is never blocked. The snapshot is written next to
+        ``target_path`` and only renamed into place once complete. Returns the
+        duration, size and page count.
+        """
+        partial_path = target_path + ".partial"
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+        steps = 0
+        total_pages = 0
+
+        def progress(status, remaining, total):
+            # Runs on the source connection's thread after every step
+            nonlocal steps, total_pages
+            steps += 1
+            total_pages = total
+            if remaining and step_sleep > 0:
+                time.sleep(step_sleep)
+
+        started = time.perf_counter()
+        # A separate source connection keeps the pool's readers and writer free
+        source = await open_connection(db_path or cls.db_path, readonly=True, profile=cls.storage_profile)
+        # Only the source connection's thread touches the target
+        target = sqlite3.connect(partial_path, check_same_thread=False)
+        try:
+            # Pin a WAL read snapshot. Otherwise every commit from the pool's writer
+            # restarts the backup and a busy bot could keep it from ever finishing.
+            await source.execute("BEGIN;")
+            await source.execute("SELECT COUNT(*) FROM sqlite_master;")
+            await source.backup(target, pages=pages, progress=progress, sleep=step_sleep)
+        except BaseException:
+            target.close()
+            os.remove(partial_path)
+            raise
+        else:
+            target.close()
+        finally:
+            await source.close()
+        os.replace(partial_path, target_path)
+
+        return {
+            "path": target_path,
+            "seconds": time.perf_counter() - started,
+            "bytes": os.path.getsize(target_path),
+            "pages": total_pages,
+            "steps": steps,
+        }
+
+    @classmethod
+    async def delete_expired(cls, table: str, condition: str, params=(), guild_id: int = None,
+                             batch_size: int = DB_PRUNE_BATCH_SIZE, pause: float = DB_PRUNE_PAUSE_MS / 1000) -> int:
+        """Delete the rows of ``table`` matching ``condition`` in small batches and return how many went.
+
+        Matching rowids are read ``batch_size`` at a time on a reader, resuming
+        after the last rowid seen, so the table is scanned once overall. Each
+        batch is then deleted as one coalesced write (re-checking the
+        condition) with a ``pause`` in between, so the writer is never held
+        for longer than a single small DELETE.
+        """
+        select = f"SELECT rowid FROM {table} WHERE rowid > ? AND ({condition}) ORDER BY rowid LIMIT ?;"
+        deleted = 0
+        last_rowid = -1
+        while True:
+            async with await cls.get_connection(readonly=True, guild_id=guild_id) as conn:
+                async with conn.execute(select, (last_rowid, *params, batch_size)) as cursor:
+                    rowids = [row[0] for row in await cursor.fetchall()]
+            if not rowids:
+                return deleted
+            placeholders = ", ".join("?" * len(rowids))
+            deleted += await cls.write(
+                f"DELETE FROM {table} WHERE rowid IN ({placeholders}) AND ({condition});", (*rowids, *params), guild_id=guild_id
+            )
+            if len(rowids) < batch_size:
+                return deleted
+            last_rowid = rowids[-1]
+            await asyncio.sleep(pause)
+
+    @classmethod
+    async def incremental_vacuum(cls, pages: int = DB_VACUUM_PAGES, pause: float = DB_PRUNE_PAUSE_MS / 1000,
+                                 guild_id: int = None) -> int:
+        """Return free pages to the filesystem ``pages`` at a time and report the bytes reclaimed."""
+        async with await cls.get_connection(readonly=True, guild_id=guild_id) as conn:
+            async with conn.execute("PRAGMA page_size;") as cursor:
+                page_size = (await cursor.fetchone())[0]
+        reclaimed = 0
+        while True:
+            async with await cls.get_connection(guild_id=guild_id) as conn:
+                async with conn.execute("PRAGMA freelist_count;") as cursor:
+                    free = (await cursor.fetchone())[0]
+                async with conn.execute("PRAGMA page_count;") as cursor:
+                    before = (await cursor.fetchone())[0]
+                if not free:
+                    return reclaimed
+                # executescript steps the pragma to completion; execute() would free a single page
+                await conn.executescript(f"PRAGMA incremental_vacuum({pages});")
+                async with conn.execute("PRAGMA page_count;") as cursor:
+                    after = (await cursor.fetchone())[0]
+            reclaimed += (before - after) * page_size
+            # Nothing freed means auto_vacuum is not INCREMENTAL on this file
+            if free <= pages or after == before:
+                return reclaimed
+            await asyncio.sleep(pause)
 
     @classmethod
     async def run_migrations(cls):
-        """Run safe data migrations from legacy JSON files into SQLite tables."""
+        """Stream data from legacy JSON files into SQLite tables, resuming interrupted imports."""
         data_dir = os.getenv("DATA_DIR", ".")
         conn_chart_path = os.path.join(data_dir, "connection_chart.json")
         workout_data_path = os.path.join(data_dir, "workout_data.json")
@@ -118,27 +887,14 @@ class DatabaseManager:
         if os.path.exists(conn_chart_path):
             print(f"[Database] Legacy connection_chart.json found. Migrating data...")
             try:
-                with open(conn_chart_path, "r", encoding="utf-8") as f:
-                    connections = json.load(f)
-                
                 async with await cls.get_connection() as conn:
-                    migrated_count = 0
-                    for conn_data in connections:
-                        u1 = conn_data.get("user1")
-                        u2 = conn_data.get("user2")
-                        ctype = conn_data.get("connection")
-                        if u1 is not None and u2 is not None and ctype is not None:
-                            await conn.execute(
-                                "INSERT OR IGNORE INTO connections (user1_id, user2_id, connection) VALUES (?, ?, ?);",
-                                (int(u1), int(u2), str(ctype).lower().strip())
-                            )
-                            migrated_count += 1
-                    await conn.commit()
-                
-                # Backup legacy file
-                backup_path = conn_chart_path + ".bak"
-                os.rename(conn_chart_path, backup_path)
-                print(f"[Database] Successfully migrated {migrated_count} connections to SQLite. Backed up to {backup_path}")
+                    counts = await import_records(
+                        conn, "connection_chart.json", conn_chart_path,
+                        iter_connection_records(conn_chart_path),
+                        {"connection": "INSERT OR IGNORE INTO connections (user1_id, user2_id, connection) VALUES (?, ?, ?);"},
+                    )
+                    backup_path = await finish_import(conn, "connection_chart.json", conn_chart_path)
+                print(f"[Database] Successfully migrated {counts['connection']} connections to SQLite. Backed up to {backup_path}")
             except Exception as e:
                 print(f"[Database] Error migrating connection chart: {e}")
 
@@ -146,53 +902,17 @@ class DatabaseManager:
         if os.path.exists(workout_data_path):
             print(f"[Database] Legacy workout_data.json found. Migrating data...")
             try:
-                with open(workout_data_path, "r", encoding="utf-8") as f:
-                    workout_data = json.load(f)
-                
-                goals = workout_data.get("user_goals", {})
-                workouts = workout_data.get("user_workouts", {})
-                pending_warnings = workout_data.get("pending_reactions", {})
-
                 async with await cls.get_connection() as conn:
-                    # Migrate Goals
-                    goals_count = 0
-                    for uid_str, goal_val in goals.items():
-                        # Unpack list values if they exist, else use int
-                        goal_int = goal_val[0] if isinstance(goal_val, list) else goal_val
-                        await conn.execute(
-                            "INSERT OR REPLACE INTO workout_goals (user_id, goal) VALUES (?, ?);",
-                            (int(uid_str), int(goal_int))
-                        )
-                        goals_count += 1
-
-                    # Migrate Workout logs
-                    workouts_count = 0
-                    for uid_str, ts_list in workouts.items():
-                        uid = int(uid_str)
-                        for ts in ts_list:
-                            await conn.execute(
-                                "INSERT OR IGNORE INTO workout_history (user_id, timestamp) VALUES (?, ?);",
-                                (uid, ts)
-                            )
-                            workouts_count += 1
-
-                    # Migrate Pending warnings
-                    warnings_count = 0
-                    for uid_str, warning_data in pending_warnings.items():
-                        msg_id = warning_data.get("message_id")
-                        ts = warning_data.get("timestamp")
-                        if msg_id and ts:
-                            await conn.execute(
-                                "INSERT OR REPLACE INTO pending_workout_warnings (user_id, message_id, timestamp) VALUES (?, ?, ?);",
-                                (int(uid_str), int(msg_id), str(ts))
-                            )
-                            warnings_count += 1
-                    
-                    await conn.commit()
-                
-                # Backup legacy file
-                backup_path = workout_data_path + ".bak"
-                os.rename(workout_data_path, backup_path)
-                print(f"[Database] Successfully migrated workouts ({goals_count} goals, {workouts_count} logs, {warnings_count} warnings) to SQLite. Backed up to {backup_path}")
+                    counts = await import_records(
+                        conn, "workout_data.json", workout_data_path,
+                        iter_workout_records(workout_data_path),
+                        {
+                            "goal": "INSERT OR REPLACE INTO workout_goals (user_id, goal) VALUES (?, ?);",
+                            "workout": "INSERT OR IGNORE INTO workout_history (user_id, timestamp) VALUES (?, ?);",
+                            "warning": "INSERT OR REPLACE INTO pending_workout_warnings (user_id, message_id, timestamp) VALUES (?, ?, ?);",
+                        },
+                    )
+                    backup_path = await finish_import(conn, "workout_data.json", workout_data_path)
+                print(f"[Database] Successfully migrated workouts ({counts['goal']} goals, {counts['workout']} logs, {counts['warning']} warnings) to SQLite. Backed up to {backup_path}")
             except Exception as e:
                 print(f"[Database] Error migrating workout tracker: {e}")
@@ -0,0 +1,149 @@
+"""Bulk-generated, realistic data for benchmarks and local experiments.
+
+``load_fixtures`` fills the database DatabaseManager points at with N guilds
+worth of users, birthdays, connections, years of workout history and Server
+Wrapped statistics, inserting everything with ``executemany``. Pair it with
+``DatabaseManager.configure(memory=True)`` to query the cogs' data paths in
+seconds, without touching disk or connecting to Discord:
+
+    python fixtures.py --memory --guilds 3 --users 200 --years 2
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from database import DatabaseManager
+from repositories import (BirthdayRepository, ConnectionRepository, WorkoutRepository, WrappedMessage,
+                          WrappedMetric, WrappedRepository)
+from schema import pack_active_hours
+
+CONNECTION_TYPES = ("sibling", "friend", "roommate", "partner", "acquaintance", "cousin")
+# Relative message volume per hour of the day: quiet overnight, busiest in the evening
+HOURLY_ACTIVITY = np.array([3, 2, 1, 1, 1, 1, 2, 4, 6, 7, 8, 9, 10, 10, 9, 9, 10, 12, 14, 15, 14, 12, 8, 5], dtype=float)
+HOURLY_ACTIVITY /= HOURLY_ACTIVITY.sum()
+
+
+def fixture_user_id(guild_id: int, index: int) -> int:
+    """Snowflake-sized user ids that are unique across generated guilds."""
+    return 100_000_000_000_000_000 + guild_id * 100_000 + index
+
+
+def fixture_guild_id(index: int) -> int:
+    return 900_000_000_000_000_000 + index
+
+
+def _birthday_rows(rng: random.Random, users: list) -> list:
+    start = datetime(2000, 1, 1)
+    return [(uid, f"user{uid % 100_000}", (start + timedelta(days=rng.randrange(366))).strftime("%m-%d")) for uid in users]
+
+
+def _connection_rows(rng: random.Random, users: list) -> list:
+    rows = set()
+    for _ in range(len(users) * 3 // 2):
+        a, b = rng.sample(users, 2)
+        rows.add((a, b, rng.choice(CONNECTION_TYPES)))
+    return list(rows)
+
+
+def _workout_rows(rng: random.Random, users: list, years: int, tracked_share: float):
+    """Goals, workout timestamps and a few pending warnings for a share of the users."""
+    now = datetime.now()
+    this_week = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=now.weekday())
+    goals, workouts, warnings = [], [], []
+    for uid in users:
+        if rng.random() >= tracked_share:
+            continue
+        goal = rng.randint(1, 6)
+        goals.append((uid, goal))
+        # Most weeks land near the goal; a steady minority fall short
+        for week in range(years * 52):
+            week_start = this_week - timedelta(weeks=week)
+            count = max(0, goal + rng.choice((-2, -1, 0, 0, 0, 1)))
+            for _ in range(count):
+                when = week_start + timedelta(seconds=rng.randrange(7 * 24 * 3600))
+                if when <= now:
+                    workouts.append((uid, int(when.timestamp())))
+        if rng.random() < 0.02:
+            warnings.append((uid, rng.getrandbits(60), (now - timedelta(days=rng.randrange(10))).isoformat()))
+    return goals, workouts, warnings
+
+
+def _wrapped_year(rng: random.Random, np_rng: np.random.Generator, users: list):
+    """Per-member metrics, word frequencies and top message lists for one year."""
+    messages = np_rng.lognormal(mean=5, sigma=1.2, size=len(users)).astype(int)
+    metrics = []
+    for uid, count in zip(users, messages):
+        if count <= 0:
+            continue
+        hours = np_rng.multinomial(int(count), HOURLY_ACTIVITY)
+        metrics.append(WrappedMetric(uid, int(count), int(count * rng.uniform(4, 14)), pack_active_hours(hours.tolist()),
+                                     rng.randrange(int(count) // 3 + 1)))
+    # Zipf-like word frequencies, as in real chat
+    words = [(f"word{rank}", int(50_000 / rank)) for rank in range(1, 1001)]
+    most_reacted = [WrappedMessage(rng.getrandbits(60), rng.getrandbits(60), rng.choice(users), rng.randint(5, 80)) for _ in range(10)]
+    longest = [WrappedMessage(rng.getrandbits(60), rng.getrandbits(60), rng.choice(users), rng.randint(500, 4000)) for _ in range(10)]
+    return metrics, words, most_reacted, longest
+
+
+async def load_fixtures(guilds: int = 3, users: int = 200, years: int = 2, tracked_share: float = 0.5, seed: int = 0) -> dict:
+    """Generate and insert fixture data for ``guilds`` guilds and return the number of rows per table."""
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    counts = defaultdict(int)
+    current_year = datetime.now().year
+
+    for g in range(guilds):
+        guild_id = fixture_guild_id(g)
+        members = [fixture_user_id(g, i) for i in range(users)]
+        birthdays = _birthday_rows(rng, members)
+        connections = _connection_rows(rng, members)
+        goals, workouts, warnings = _workout_rows(rng, members, years, tracked_share)
+
+        async with await DatabaseManager.get_connection(guild_id=guild_id) as conn:
+            await conn.executemany(BirthdayRepository.SET_BIRTHDAY, birthdays)
+            await conn.executemany(ConnectionRepository.ADD, connections)
+            await conn.executemany(WorkoutRepository.SET_GOAL, goals)
+            await conn.executemany(WorkoutRepository.LOG_WORKOUT, workouts)
+            await conn.executemany(WorkoutRepository.ADD_WARNING, warnings)
+            await conn.commit()
+        counts["birthdays"] += len(birthdays)
+        counts["connections"] += len(connections)
+        counts["workout_goals"] += len(goals)
+        counts["workout_history"] += len(workouts)
+        counts["pending_workout_warnings"] += len(warnings)
+
+        for year in range(current_year - years + 1, current_year + 1):
+            metrics, words, most_reacted, longest = _wrapped_year(rng, np_rng, members)
+            await WrappedRepository.replace_year(guild_id, year, metrics, words, most_reacted, longest)
+            counts["server_wrapped_metrics"] += len(metrics)
+            counts["server_wrapped_word_freq"] += len(words)
+    return dict(counts)
+
+
+async def main(args):
+    if args.memory:
+        DatabaseManager.configure(memory=True)
+    await DatabaseManager.open_pool()
+    await DatabaseManager.initialize()
+    started = time.perf_counter()
+    counts = await load_fixtures(args.guilds, args.users, args.years, seed=args.seed)
+    elapsed = time.perf_counter() - started
+    await DatabaseManager.close_pool()
+    print(f"[Fixtures] Loaded {sum(counts.values())} rows in {elapsed:.2f}s:")
+    for table, count in counts.items():
+        print(f"  {table:<28}{count:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill the database with generated fixture data.")
+    parser.add_argument("--guilds", type=int, default=3)
+    parser.add_argument("--users", type=int, default=200, help="members per guild")
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", action="store_true", help="use a throwaway in-memory database")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,157 @@
+"""The bot's shared HTTP client for everything that is not the Discord API.
+
+Cogs used to open a new ``aiohttp.ClientSession`` per request, paying for a
+TCP and TLS handshake every time. ``HttpClient`` keeps one session for the
+bot's lifetime (``bot.http_client``, opened in ``DanBot.prepare`` and closed
+with the bot). Its connection pool holds ``HTTP_POOL_SIZE`` connections, at
+most ``HTTP_POOL_PER_HOST`` per host, and DNS answers are cached for
+``HTTP_DNS_TTL`` seconds. Every request shares the ``HTTP_TIMEOUT`` default.
+Connection errors, timeouts, 429s and 5xx responses are retried up to
+``HTTP_RETRIES`` times with exponential backoff, and per-host request counts
+and latencies are kept for the metrics endpoint.
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Any, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 100))
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", 10))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", 300))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+HTTP_RETRY_BACKOFF_MS = float(os.getenv("HTTP_RETRY_BACKOFF_MS", 250))
+
+USER_AGENT = "DanBot/1.0 (https://github.com/thenotoriousJeremy/DanBot)"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Longest Retry-After the client is willing to wait before giving up on a retry
+MAX_RETRY_AFTER = 10.0
+
+
+class HttpResponse(NamedTuple):
+    status: int
+    body: Any  # bytes, str or parsed JSON for successful responses, else None
+    url: str
+
+
+class HostStats:
+    __slots__ = ("requests", "statuses", "failures", "retries", "seconds")
+
+    def __init__(self):
+        self.requests = 0
+        self.statuses = {}
+        self.failures = 0
+        self.retries = 0
+        self.seconds = 0.0
+
+
+class HttpClient:
+    """One pooled aiohttp session with shared timeouts, retries and per-host stats."""
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, per_host: int = HTTP_POOL_PER_HOST, dns_ttl: int = HTTP_DNS_TTL,
+                 timeout: float = HTTP_TIMEOUT, retries: int = HTTP_RETRIES, backoff: float = HTTP_RETRY_BACKOFF_MS / 1000):
+        self.pool_size = pool_size
+        self.per_host = per_host
+        self.dns_ttl = dns_ttl
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hosts = {}  # host -> HostStats
+        self._session = None
+
+    async def open(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.per_host,
+                                         ttl_dns_cache=self.dns_ttl, use_dns_cache=True)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT},
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The underlying session, for callers that need streaming or other aiohttp features."""
+        if self._session is None or self._session.closed:
+            raise RuntimeError("The HTTP client is not open.")
+        return self._session
+
+    async def get(self, url: str, *, read: str = "bytes", params: dict = None, headers: dict = None,
+                  timeout: float = None, retries: int = None) -> HttpResponse:
+        """GET ``url`` and read the body as ``bytes``, ``text`` or ``json`` when the status is below 400.
+
+        Retries connection errors, timeouts, 429 and 5xx responses, then
+        returns the last response, or raises the last exception if no
+        attempt got one.
+        """
+        return await self.request("GET", url, read=read, params=params, headers=headers, timeout=timeout, retries=retries)
+
+    async def request(self, method: str, url: str, *, read: str = "bytes", params: dict = None, headers: dict = None,
+                      timeout: float = None, retries: int = None, **kwargs) -> HttpResponse:
+        host = urlsplit(url).hostname or "-"
+        stats = self.hosts.get(host)
+        if stats is None:
+            stats = self.hosts[host] = HostStats()
+        attempts = 1 + (self.retries if retries is None else retries)
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+        # Otherwise leave timeout out: aiohttp reads an explicit None as "no timeout", not the session's HTTP_TIMEOUT
+
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            started = time.perf_counter()
+            stats.requests += 1
+            retry_after = None
+            try:
+                async with self.session.request(method, url, params=params, headers=headers, **kwargs) as resp:
+                    body = None
+                    if resp.status < 400:
+                        if read == "json":
+                            body = await resp.json(content_type=None)
+                        elif read == "text":
+                            body = await resp.text()
+                        else:
+                            body = await resp.read()
+                    elif resp.status == 429:
+                        retry_after = _retry_after(resp.headers.get("Retry-After"))
+                    stats.statuses[resp.status] = stats.statuses.get(resp.status, 0) + 1
+                    response = HttpResponse(resp.status, body, str(resp.url))
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                stats.failures += 1
+                if last:
+                    raise
+                response = None
+            finally:
+                stats.seconds += time.perf_counter() - started
+
+            if response is not None and (response.status not in RETRY_STATUSES or last):
+                return response
+            if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                return response
+            stats.retries += 1
+            delay = retry_after if retry_after is not None else self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        """Per-host request, failure and retry counts with total seconds."""
+        return {
+            host: {"requests": s.requests, "statuses": dict(s.statuses), "failures": s.failures,
+                   "retries": s.retries, "seconds": s.seconds}
+            for host, s in self.hosts.items()
+        }
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
@@ -0,0 +1,234 @@
+"""Streaming import of the legacy JSON data files into SQLite.
+
+The legacy files can hold years of workout history, so they are never loaded
+whole. ``JsonStream`` walks the document incrementally, the record iterators
+turn it into ``(kind, row)`` tuples, and ``import_records`` inserts them in
+bounded chunks with ``executemany``. Each chunk is committed together with a
+checkpoint in ``legacy_import_progress``, so an interrupted import resumes
+after the last committed chunk instead of starting over.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import aiosqlite
+
+IMPORT_CHUNK_SIZE = int(os.getenv("LEGACY_IMPORT_CHUNK_SIZE", 5000))
+# Record kind for entries that cannot be imported; counted, never inserted
+SKIPPED = "skipped"
+
+_WHITESPACE = re.compile(r"\s*")
+_DECODER = json.JSONDecoder()
+
+
+class JsonStream:
+    """Minimal incremental JSON reader over a text file handle.
+
+    Containers are walked with ``iter_object``/``iter_array``; everything else
+    is read with ``value``. The caller must consume each member's value before
+    advancing the iterator.
+    """
+
+    def __init__(self, fh, read_size: int = 1 << 16):
+        self._fh = fh
+        self._read_size = read_size
+        self._buf = ""
+        self._pos = 0
+
+    def _fill(self) -> bool:
+        data = self._fh.read(self._read_size)
+        if not data:
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found or 'end of file'}'")
+        self._pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                val, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # The value continues past the buffered text
+                if self._fill():
+                    continue
+                raise
+            # A number ending exactly at the buffer edge may be truncated
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return val
+
+    def _members(self, close: str):
+        if self.peek() == close:
+            self._pos += 1
+            return
+        while True:
+            yield
+            found = self.peek()
+            self._pos += 1
+            if found == close:
+                return
+            if found != ",":
+                raise ValueError(f"Expected ',' or '{close}' but found '{found or 'end of file'}'")
+
+    def iter_array(self):
+        """Yield once per element; the caller reads the element itself."""
+        self.expect("[")
+        yield from self._members("]")
+
+    def iter_object(self):
+        """Yield each key; the caller reads the member's value itself."""
+        self.expect("{")
+        for _ in self._members("}"):
+            key = self.value()
+            self.expect(":")
+            yield key
+
+
+def iter_connection_records(path):
+    """Yield ("connection", row) tuples from a legacy connection_chart.json."""
+    with open(path, "r", encoding="utf-8") as fh:
+        stream = JsonStream(fh)
+        for _ in stream.iter_array():
+            conn_data = stream.value()
+            u1 = conn_data.get("user1")
+            u2 = conn_data.get("user2")
+            ctype = conn_data.get("connection")
+            if u1 is not None and u2 is not None and ctype is not None:
+                yield "connection", (int(u1), int(u2), str(ctype).lower().strip())
+
+
+def iter_workout_records(path):
+    """Yield ("goal" | "workout" | "warning", row) tuples from a legacy workout_data.json."""
+    with open(path, "r", encoding="utf-8") as fh:
+        stream = JsonStream(fh)
+        for section in stream.iter_object():
+            if section == "user_goals":
+                for uid_str in stream.iter_object():
+                    goal_val = stream.value()
+                    # Unpack list values if they exist, else use int
+                    goal_int = goal_val[0] if isinstance(goal_val, list) else goal_val
+                    yield "goal", (int(uid_str), int(goal_int))
+            elif section == "user_workouts":
+                for uid_str in stream.iter_object():
+                    uid = int(uid_str)
+                    for _ in stream.iter_array():
+                        ts = stream.value()
+                        try:
+                            yield "workout", (uid, int(datetime.fromisoformat(ts).timestamp()))
+                        except (ValueError, TypeError, OverflowError):
+                            # Kept in the stream so resumed imports count positions the same way
+                            yield SKIPPED, (uid, ts)
+            elif section == "pending_reactions":
+                for uid_str in stream.iter_object():
+                    warning_data = stream.value()
+                    msg_id = warning_data.get("message_id")
+                    ts = warning_data.get("timestamp")
+                    if msg_id and ts:
+                        yield "warning", (int(uid_str), int(msg_id), str(ts))
+            else:
+                stream.value()
+
+
+def _next_chunk(records, size: int) -> list:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            break
+    return chunk
+
+
+async def import_records(conn: aiosqlite.Connection, source: str, path: str, records, statements: dict,
+                         chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """Insert streamed records in checkpointed chunks and return per-kind counts.
+
+    ``statements`` maps each record kind to its INSERT statement. Records that
+    a previous, interrupted run already committed are skipped, and ``SKIPPED``
+    records are only counted.
+    """
+    file_size = os.path.getsize(path)
+    async with conn.execute(
+        "SELECT records_done, source_size FROM legacy_import_progress WHERE source = ?;", (source,)
+    ) as cursor:
+        row = await cursor.fetchone()
+    # A different file under the same name starts from scratch
+    skip = row[0] if row and row[1] == file_size else 0
+    if skip:
+        print(f"[Database] Resuming {source} import after {skip} already imported records...")
+
+    counts = defaultdict(int)
+    position = 0
+    imported = 0
+    started = time.perf_counter()
+    last_report = started
+    records = iter(records)
+    while True:
+        # Parse off the event loop so a large file never stalls it
+        chunk = await asyncio.to_thread(_next_chunk, records, chunk_size)
+        if not chunk:
+            break
+        start_index = position
+        position += len(chunk)
+        if position <= skip:
+            continue
+        if start_index < skip:
+            chunk = chunk[skip - start_index:]
+
+        batches = defaultdict(list)
+        for kind, values in chunk:
+            batches[kind].append(values)
+        skipped = len(batches.pop(SKIPPED, ()))
+        counts[SKIPPED] += skipped
+        for kind, rows in batches.items():
+            await conn.executemany(statements[kind], rows)
+            counts[kind] += len(rows)
+        # The checkpoint commits atomically with the rows it covers
+        await conn.execute(
+            "INSERT OR REPLACE INTO legacy_import_progress (source, records_done, source_size, updated_at) VALUES (?, ?, ?, ?);",
+            (source, position, file_size, int(time.time()))
+        )
+        await conn.commit()
+        imported += len(chunk) - skipped
+
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            print(f"[Database] {source}: {imported} records imported ({imported / (now - started):.0f} rows/s)...")
+            last_report = now
+
+    elapsed = time.perf_counter() - started
+    rate = imported / elapsed if elapsed > 0 else 0.0
+    print(f"[Database] {source}: imported {imported} records in {elapsed:.2f}s ({rate:.0f} rows/s).")
+    if counts[SKIPPED]:
+        print(f"[Database] {source}: skipped {counts[SKIPPED]} invalid entries.")
+    return counts
+
+
+async def finish_import(conn: aiosqlite.Connection, source: str, path: str) -> str:
+    """Back up a fully imported legacy file and clear its checkpoint."""
+    backup_path = path + ".bak"
+    os.replace(path, backup_path)
+    await conn.execute("DELETE FROM legacy_import_progress WHERE source = ?;", (source,))
+    await conn.commit()
+    return backup_path
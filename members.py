@@ -0,0 +1,159 @@
+"""Member lookups that work with or without discord.py's member cache.
+
+By default the bot keeps every member of every guild in memory. With
+``LOW_MEMORY_MODE`` on, ``client_options`` turns off member chunking, the
+member cache (except members in voice channels, which the music cog needs) and
+the message cache. The cogs then look members up through ``MemberResolver``:
+the guild's own cache first, then a bounded cache of recently fetched members
+(``MEMBER_CACHE_SIZE`` entries, each kept ``MEMBER_CACHE_TTL`` seconds), then
+Discord.
+
+``MemberResolver.resolve_many`` resolves all the misses of one command
+together: one gateway member query per 100 IDs instead of one REST call per
+member, falling back to concurrent REST lookups if the query fails. Users who
+are no longer in the guild are remembered for ``MEMBER_NEGATIVE_TTL`` seconds
+so charts full of departed users do not ask again on every run.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+import discord
+
+from metrics import cache_counter
+
+LOW_MEMORY_MODE = os.getenv("LOW_MEMORY_MODE", "").strip().lower() in ("1", "true", "yes", "on")
+MEMBER_CACHE_SIZE = int(os.getenv("MEMBER_CACHE_SIZE", 5000))
+MEMBER_CACHE_TTL = float(os.getenv("MEMBER_CACHE_TTL", 600))
+MEMBER_NEGATIVE_TTL = float(os.getenv("MEMBER_NEGATIVE_TTL", 300))
+# Most user IDs a single gateway member query accepts
+QUERY_BATCH = 100
+
+MEMBER_CACHE = cache_counter("members")
+
+_MISSING = object()
+
+
+def client_options() -> dict:
+    """Client keyword arguments for LOW_MEMORY_MODE (empty otherwise)."""
+    if not LOW_MEMORY_MODE:
+        return {}
+    flags = discord.MemberCacheFlags.none()
+    flags.voice = True
+    return {"member_cache_flags": flags, "chunk_guilds_at_startup": False, "max_messages": None}
+
+
+class MemberResolver:
+    """Resolve user IDs to guild members (or users) through a bounded TTL cache."""
+
+    def __init__(self, bot, max_size: int = MEMBER_CACHE_SIZE, ttl: float = MEMBER_CACHE_TTL,
+                 negative_ttl: float = MEMBER_NEGATIVE_TTL):
+        self.bot = bot
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.queries = 0
+        # (guild_id, user_id) -> (expires_at, member or None when not in the guild);
+        # ("user", user_id) -> (expires_at, user) for user_fallback lookups
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key):
+        """The cached value (None for a negative entry), or _MISSING."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put(self, key, member):
+        ttl = self.ttl if member is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, member)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, guild: discord.Guild, user_id: int):
+        """Return the member if it is already in memory, without an API call."""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+        member = self._get((guild.id, user_id))
+        return None if member is _MISSING else member
+
+    async def resolve(self, guild: discord.Guild, user_id: int, user_fallback: bool = False):
+        """Return the guild member for ``user_id``, or None if they are not in the guild.
+
+        With ``user_fallback``, someone who left the guild is returned as a
+        plain ``discord.User`` so they can still be named.
+        """
+        return (await self.resolve_many(guild, (user_id,), user_fallback))[user_id]
+
+    async def resolve_many(self, guild: discord.Guild, user_ids, user_fallback: bool = False) -> dict:
+        """Resolve several IDs with as few requests as possible; returns {user_id: member or None}."""
+        resolved = {}
+        misses = []
+        for user_id in dict.fromkeys(user_ids):
+            member = guild.get_member(user_id)
+            if member is None:
+                member = self._get((guild.id, user_id))
+                MEMBER_CACHE.record(member is not _MISSING)
+                if member is _MISSING:
+                    misses.append(user_id)
+                    continue
+            resolved[user_id] = member
+
+        for start in range(0, len(misses), QUERY_BATCH):
+            batch = misses[start:start + QUERY_BATCH]
+            found = await self._fetch_members(guild, batch)
+            for user_id in batch:
+                member = found.get(user_id)
+                self._put((guild.id, user_id), member)
+                resolved[user_id] = member
+
+        if user_fallback:
+            departed = [user_id for user_id, member in resolved.items() if member is None]
+            users = await asyncio.gather(*(self._user(user_id) for user_id in departed))
+            resolved.update(zip(departed, users))
+        return resolved
+
+    async def _fetch_members(self, guild: discord.Guild, user_ids: list) -> dict:
+        """Look up to QUERY_BATCH members over the gateway, or over REST if the query fails."""
+        self.queries += 1
+        try:
+            members = await guild.query_members(user_ids=user_ids, limit=QUERY_BATCH, cache=False)
+            return {member.id: member for member in members}
+        except (asyncio.TimeoutError, discord.ClientException) as e:
+            print(f"[Members] Gateway member query failed in guild {guild.id} ({e!r}); using the REST API")
+
+        async def fetch(user_id):
+            try:
+                return await guild.fetch_member(user_id)
+            except discord.HTTPException:
+                return None
+
+        members = await asyncio.gather(*(fetch(user_id) for user_id in user_ids))
+        return {user_id: member for user_id, member in zip(user_ids, members) if member is not None}
+
+    async def _user(self, user_id: int):
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            return user
+        key = ("user", user_id)
+        user = self._get(key)
+        if user is not _MISSING:
+            return user
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except discord.HTTPException:
+            user = None
+        self._put(key, user)
+        return user
@@ -0,0 +1,360 @@
+"""Optional Prometheus endpoint for command latencies, gateway, event loop and database health.
+
+Off unless ``METRICS_PORT`` is set. When it is, ``MetricsServer`` serves
+``/metrics`` in the Prometheus text format on ``METRICS_HOST`` (default
+127.0.0.1) and hooks into the command tree: ``interaction_check`` stamps the
+start time, ``on_app_command_completion`` and the tree's error handler record
+the latency histograms and error counters. Discord REST calls are timed with an
+aiohttp trace config that ``bot.py`` only passes when metrics are on.
+
+Everything else (gateway latency and event counts, database statement and
+repository timings, write batches, shared HTTP client requests, cache hit
+counters) is read from the existing stats objects when Prometheus scrapes, so
+with the endpoint off none of this runs.
+"""
+import asyncio
+import os
+import time
+from bisect import bisect_left
+
+import aiohttp
+import discord
+from discord import app_commands
+
+from database import DatabaseManager
+from query_stats import DB_QUERY_STATS, LATENCY_BUCKETS_MS, QUERY_STATS
+from repositories import REPOSITORY_TIMINGS
+from shards import ShardMonitor
+from startup import STARTUP
+
+METRICS_PORT = int(os.getenv("METRICS_PORT") or 0)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_ENABLED = METRICS_PORT > 0
+
+# Histogram bucket upper bounds in seconds; +Inf is added when rendering
+COMMAND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+HTTP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+LOOP_LAG_PROBE_SECONDS = 0.5
+
+
+class Histogram:
+    """Cumulative-on-render bucket counts plus sum and count, Prometheus style."""
+
+    __slots__ = ("bounds", "buckets", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class CacheCounter:
+    """Hit and miss counts for one in-process cache, exported as danbot_cache_*_total."""
+
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+
+CACHES = {}
+
+
+def cache_counter(name: str) -> CacheCounter:
+    """Return the shared counter for the cache called ``name``, creating it on first use."""
+    counter = CACHES.get(name)
+    if counter is None:
+        counter = CACHES[name] = CacheCounter()
+    return counter
+
+
+class HttpStats:
+    """Discord REST request latencies by method and status, fed by an aiohttp trace config."""
+
+    def __init__(self):
+        self.requests = {}  # (method, status) -> Histogram
+        self.failures = {}  # (method, exception name) -> count
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            context.started = time.perf_counter()
+
+        async def on_request_end(session, context, params):
+            key = (params.method, str(params.response.status))
+            histogram = self.requests.get(key)
+            if histogram is None:
+                histogram = self.requests[key] = Histogram(HTTP_BUCKETS)
+            histogram.observe(time.perf_counter() - context.started)
+
+        async def on_request_exception(session, context, params):
+            key = (params.method, type(params.exception).__name__)
+            self.failures[key] = self.failures.get(key, 0) + 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        return trace
+
+
+HTTP_STATS = HttpStats()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Exposition:
+    """Builds one Prometheus text exposition, one metric family at a time."""
+
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name: str, kind: str, help_text: str, samples):
+        """Add a counter or gauge family from (labels, value) pairs; empty families are left out."""
+        samples = list(samples)
+        if not samples:
+            return
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(labels)} {value:g}" if isinstance(value, float) else f"{name}{_labels(labels)} {value}")
+
+    def histograms(self, name: str, help_text: str, series):
+        """Add a histogram family from (labels, bounds, per-bucket counts, sum, count) tuples."""
+        series = list(series)
+        if not series:
+            return
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} histogram")
+        for labels, bounds, buckets, total, count in series:
+            cumulative = 0
+            for bound, bucket in zip(list(bounds) + ["+Inf"], buckets):
+                cumulative += bucket
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                self.lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+            self.lines.append(f"{name}_sum{_labels(labels)} {total:g}")
+            self.lines.append(f"{name}_count{_labels(labels)} {count}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+class MetricsServer:
+    """Collects per-command metrics and serves everything at http://METRICS_HOST:METRICS_PORT/metrics."""
+
+    def __init__(self, bot, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.commands = {}  # command name -> Histogram
+        self.errors = {}  # (command name, error name) -> count
+        self.loop_lag = Histogram(LOOP_LAG_BUCKETS)
+        self.loop_lag_last = 0.0
+        self.shard_monitor = ShardMonitor(bot)
+        self._runner = None
+        self._lag_task = None
+        self._tree_on_error = None
+        self._tree_interaction_check = None
+
+    async def start(self):
+        tree = self.bot.tree
+        self._tree_interaction_check = tree.interaction_check
+        self._tree_on_error = tree.on_error
+        tree.interaction_check = self._interaction_check
+        tree.on_error = self._on_error
+        self.bot.add_listener(self.on_app_command_completion)
+        self.bot.add_listener(self.on_shard_disconnect)
+        if not isinstance(self.bot, discord.AutoShardedClient):
+            self.bot.add_listener(self.on_disconnect)
+
+        # aiohttp.web is only needed with the endpoint on
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._lag_task = asyncio.create_task(self._probe_loop_lag())
+        print(f"[Metrics] Serving Prometheus metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        tree = self.bot.tree
+        if self._tree_on_error is not None:
+            tree.interaction_check = self._tree_interaction_check
+            tree.on_error = self._tree_on_error
+        self.bot.remove_listener(self.on_app_command_completion)
+        self.bot.remove_listener(self.on_shard_disconnect)
+        self.bot.remove_listener(self.on_disconnect)
+
+    # Command tree hooks
+
+    async def _interaction_check(self, interaction) -> bool:
+        interaction.extras["metrics_started"] = time.perf_counter()
+        return await self._tree_interaction_check(interaction)
+
+    def _observe(self, interaction, command) -> None:
+        started = interaction.extras.get("metrics_started")
+        if started is None:
+            return
+        name = command.qualified_name if command is not None else "unknown"
+        histogram = self.commands.get(name)
+        if histogram is None:
+            histogram = self.commands[name] = Histogram(COMMAND_BUCKETS)
+        histogram.observe(time.perf_counter() - started)
+
+    async def on_app_command_completion(self, interaction, command):
+        self._observe(interaction, command)
+
+    async def _on_error(self, interaction, error):
+        command = interaction.command
+        self._observe(interaction, command)
+        cause = error.original if isinstance(error, app_commands.CommandInvokeError) else error
+        key = (command.qualified_name if command is not None else "unknown", type(cause).__name__)
+        self.errors[key] = self.errors.get(key, 0) + 1
+        await self._tree_on_error(interaction, error)
+
+    async def on_shard_disconnect(self, shard_id: int):
+        self.shard_monitor.record_disconnect(shard_id)
+
+    async def on_disconnect(self):
+        self.shard_monitor.record_disconnect(self.bot.shard_id or 0)
+
+    async def _probe_loop_lag(self):
+        """Sleep a fixed interval and record how late the loop woke up."""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + LOOP_LAG_PROBE_SECONDS
+            await asyncio.sleep(LOOP_LAG_PROBE_SECONDS)
+            self.loop_lag_last = max(0.0, loop.time() - expected)
+            self.loop_lag.observe(self.loop_lag_last)
+
+    # Exposition
+
+    async def handle_metrics(self, request):
+        from aiohttp import web
+        return web.Response(text=self.render(), content_type="text/plain", charset="utf-8")
+
+    def render(self) -> str:
+        out = Exposition()
+        out.histograms(
+            "danbot_app_command_duration_seconds", "Time from receiving an application command to its handler returning.",
+            (({"command": name}, h.bounds, h.buckets, h.sum, h.count) for name, h in sorted(self.commands.items())),
+        )
+        out.family(
+            "danbot_app_command_errors_total", "counter", "Application commands that raised, by exception type.",
+            (({"command": command, "error": error}, count) for (command, error), count in sorted(self.errors.items())),
+        )
+
+        shards = self.shard_monitor.sample()
+        out.family(
+            "danbot_gateway_latency_seconds", "gauge", "Heartbeat round trip per shard.",
+            (({"shard": row["shard_id"]}, row["latency_ms"] / 1000) for row in shards if row["latency_ms"] is not None),
+        )
+        out.family("danbot_gateway_events_total", "counter", "Gateway events dispatched per shard.",
+                   (({"shard": row["shard_id"]}, row["events"]) for row in shards))
+        out.family("danbot_gateway_disconnects_total", "counter", "Gateway disconnects per shard.",
+                   (({"shard": row["shard_id"]}, row["disconnects"]) for row in shards))
+        out.family("danbot_guilds", "gauge", "Guilds per shard.", (({"shard": row["shard_id"]}, row["guilds"]) for row in shards))
+
+        out.histograms("danbot_event_loop_lag_seconds", f"How late the event loop wakes from a {LOOP_LAG_PROBE_SECONDS:g}s sleep.",
+                       [({}, self.loop_lag.bounds, self.loop_lag.buckets, self.loop_lag.sum, self.loop_lag.count)])
+        out.family("danbot_event_loop_lag_last_seconds", "gauge", "Event loop lag at the latest probe.", [({}, self.loop_lag_last)])
+        watchdog = getattr(self.bot, "watchdog", None)
+        if watchdog is not None:
+            stalls = {}
+            for (module, _, _), offender in watchdog.offenders.items():
+                count, seconds = stalls.get(module, (0, 0.0))
+                stalls[module] = (count + offender.count, seconds + offender.total_ms / 1000)
+            out.family("danbot_event_loop_stalls_total", "counter", "Event loop stalls over the watchdog threshold, by module blamed.",
+                       (({"module": module}, count) for module, (count, _) in sorted(stalls.items())))
+            out.family("danbot_event_loop_stall_seconds_total", "counter", "Time the event loop was stalled, by module blamed.",
+                       (({"module": module}, seconds) for module, (_, seconds) in sorted(stalls.items())))
+        if STARTUP.ready_after is not None:
+            out.family("danbot_startup_seconds", "gauge", "Time from launch to ready.", [({}, STARTUP.ready_after)])
+
+        if DB_QUERY_STATS:
+            bounds = tuple(b / 1000 for b in LATENCY_BUCKETS_MS)
+            out.histograms(
+                "danbot_db_statement_duration_seconds", "SQLite statement latency by statement template.",
+                (({"sql": sql}, bounds, s.buckets, s.total_ms / 1000, s.calls) for sql, s in QUERY_STATS.statements.items()),
+            )
+        out.family("danbot_repository_calls_total", "counter", "Repository method calls.",
+                   (({"method": name}, s.calls) for name, s in REPOSITORY_TIMINGS.items() if s.calls))
+        out.family("danbot_repository_errors_total", "counter", "Repository method calls that raised.",
+                   (({"method": name}, s.errors) for name, s in REPOSITORY_TIMINGS.items() if s.calls))
+        out.family("danbot_repository_seconds_total", "counter", "Time spent in repository methods.",
+                   (({"method": name}, s.total) for name, s in REPOSITORY_TIMINGS.items() if s.calls))
+
+        writes = DatabaseManager.write_stats()
+        if writes:
+            out.family("danbot_db_write_flushes_total", "counter", "Write coalescer transactions.", [({}, writes["flushes"])])
+            out.family("danbot_db_writes_total", "counter", "Writes committed through the coalescer.", [({}, writes["units"])])
+            out.family("danbot_db_write_failures_total", "counter", "Writes that failed in the coalescer.", [({}, writes["failed_units"])])
+            out.family("danbot_db_write_queue", "gauge", "Writes waiting for the next flush.", [({}, writes["queued"])])
+
+        out.histograms(
+            "danbot_http_request_duration_seconds", "Discord REST request latency by method and status.",
+            (({"method": method, "status": status}, h.bounds, h.buckets, h.sum, h.count)
+             for (method, status), h in sorted(HTTP_STATS.requests.items())),
+        )
+        out.family("danbot_http_request_failures_total", "counter", "Discord REST requests that failed without a response.",
+                   (({"method": method, "error": error}, count) for (method, error), count in sorted(HTTP_STATS.failures.items())))
+
+        http_client = getattr(self.bot, "http_client", None)
+        hosts = http_client.stats() if http_client is not None else {}
+        out.family("danbot_http_client_requests_total", "counter", "Shared HTTP client responses by host and status.",
+                   (({"host": host, "status": status}, count)
+                    for host, s in sorted(hosts.items()) for status, count in sorted(s["statuses"].items())))
+        out.family("danbot_http_client_failures_total", "counter", "Shared HTTP client attempts that failed without a response.",
+                   (({"host": host}, s["failures"]) for host, s in sorted(hosts.items())))
+        out.family("danbot_http_client_retries_total", "counter", "Shared HTTP client retries.",
+                   (({"host": host}, s["retries"]) for host, s in sorted(hosts.items())))
+        out.family("danbot_http_client_seconds_total", "counter", "Time spent in shared HTTP client requests.",
+                   (({"host": host}, s["seconds"]) for host, s in sorted(hosts.items())))
+
+        renderer = getattr(self.bot, "renderer", None)
+        if renderer is not None:
+            r = renderer.stats()
+            out.family("danbot_render_jobs_total", "counter", "Charts rendered, including failed renders.", [({}, r["renders"])])
+            out.family("danbot_render_failures_total", "counter", "Chart renders lost to worker crashes or timeouts.",
+                       [({"reason": "timeout"}, r["timeouts"]), ({"reason": "crash"}, r["crashes"])])
+            out.family("danbot_render_restarts_total", "counter", "Render pool restarts.", [({}, r["restarts"])])
+            out.family("danbot_render_seconds_total", "counter", "Time spent waiting for chart renders.", [({}, r["seconds"])])
+            out.family("danbot_render_workers", "gauge", "Render worker processes (0 when charts are drawn on a thread).", [({}, r["workers"])])
+
+        caches = dict(CACHES)
+        partitions = DatabaseManager.partition_stats()
+        if partitions:
+            caches["db_partitions"] = partitions
+        out.family("danbot_cache_hits_total", "counter", "Cache lookups served from the cache.",
+                   (({"cache": name}, c["hits"] if isinstance(c, dict) else c.hits) for name, c in sorted(caches.items())))
+        out.family("danbot_cache_misses_total", "counter", "Cache lookups that missed.",
+                   (({"cache": name}, c["misses"] if isinstance(c, dict) else c.misses) for name, c in sorted(caches.items())))
+        return out.render()
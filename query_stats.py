@@ -0,0 +1,246 @@
+"""Optional per-statement timing for every SQLite connection the bot opens.
+
+When ``DB_QUERY_STATS`` is enabled, ``database.open_connection`` returns a
+``ProfiledConnection`` instead of a plain aiosqlite connection. Each
+``execute``/``executemany`` is timed (for SELECTs, including fetching the
+rows) and folded into a latency histogram keyed by the statement's template.
+Statements slower than ``DB_SLOW_QUERY_MS`` are logged with their
+``EXPLAIN QUERY PLAN`` and kept in a short slow-query log.
+
+With the setting off, connections are not wrapped at all and nothing here
+runs on the query path.
+"""
+import json
+import os
+import re
+import sqlite3
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Iterable, Optional
+
+import aiosqlite
+from aiosqlite.context import contextmanager
+
+DB_QUERY_STATS = os.getenv("DB_QUERY_STATS", "").strip().lower() in ("1", "true", "yes", "on")
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 100))
+DB_QUERY_STATS_FILE = os.getenv("DB_QUERY_STATS_FILE")
+DB_QUERY_STATS_INTERVAL = int(os.getenv("DB_QUERY_STATS_INTERVAL", 300))
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+# Statements EXPLAIN QUERY PLAN can describe
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+
+def statement_template(sql: str) -> str:
+    """Collapse whitespace and inline literals so equivalent statements share one entry."""
+    return _LITERALS.sub("?", _WHITESPACE.sub(" ", sql).strip())
+
+
+class StatementStats:
+    __slots__ = ("calls", "rows", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, elapsed_ms: float, rows: int):
+        self.calls += 1
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls."""
+        target = fraction * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target and count:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+
+class QueryStats:
+    """Per-template latency histograms plus a bounded log of slow statements."""
+
+    def __init__(self, slow_ms: float = DB_SLOW_QUERY_MS, slow_log_size: int = 100):
+        self.slow_ms = slow_ms
+        self.statements = {}
+        self.slow_log = deque(maxlen=slow_log_size)
+        self._plans = {}
+        self.started = time.time()
+
+    def record(self, template: str, elapsed_ms: float, rows: int):
+        stats = self.statements.get(template)
+        if stats is None:
+            stats = self.statements[template] = StatementStats()
+        stats.record(elapsed_ms, rows)
+
+    def is_slow(self, elapsed_ms: float) -> bool:
+        return elapsed_ms >= self.slow_ms
+
+    def record_slow(self, template: str, elapsed_ms: float, rows: int, plan: Optional[str]):
+        # Only print a template's plan the first time it shows up, or when it changes
+        new_plan = plan is not None and self._plans.get(template) != plan
+        if plan is not None:
+            self._plans[template] = plan
+        self.slow_log.append({
+            "at": time.time(),
+            "ms": round(elapsed_ms, 2),
+            "rows": rows,
+            "sql": template,
+            "plan": plan,
+        })
+        print(f"[Database] Slow query ({elapsed_ms:.1f} ms, {rows} rows): {template}")
+        if new_plan:
+            print(f"[Database]   plan: {plan}")
+
+    def snapshot(self, limit: int = None) -> list:
+        """Return per-template summaries, slowest total time first."""
+        rows = [
+            {
+                "sql": template,
+                "calls": s.calls,
+                "rows": s.rows,
+                "total_ms": round(s.total_ms, 2),
+                "avg_ms": round(s.total_ms / s.calls, 3),
+                "p50_ms": s.percentile(0.50),
+                "p95_ms": s.percentile(0.95),
+                "max_ms": round(s.max_ms, 2),
+                "histogram": dict(zip([f"<={b}" for b in LATENCY_BUCKETS_MS] + ["inf"], s.buckets)),
+            }
+            for template, s in self.statements.items()
+        ]
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def dump(self, path: str):
+        """Write the statement summaries and slow-query log to ``path`` as JSON."""
+        data = {
+            "since": self.started,
+            "written_at": time.time(),
+            "slow_ms": self.slow_ms,
+            "statements": self.snapshot(),
+            "slow_queries": list(self.slow_log),
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2)
+        os.replace(tmp_path, path)
+
+    def reset(self):
+        self.statements.clear()
+        self.slow_log.clear()
+        self._plans.clear()
+        self.started = time.time()
+
+
+QUERY_STATS = QueryStats()
+
+
+class ProfiledCursor(aiosqlite.Cursor):
+    """Cursor that keeps timing while its rows are fetched and records on exhaustion or close."""
+
+    def __init__(self, conn: "ProfiledConnection", cursor: sqlite3.Cursor, sql: str, parameters, elapsed: float):
+        super().__init__(conn, cursor)
+        self._sql = sql
+        self._parameters = parameters
+        self._elapsed = elapsed
+        self._rows = 0
+        self._recorded = False
+
+    async def _timed_fetch(self, fn, *args):
+        start = time.perf_counter()
+        result = await self._execute(fn, *args)
+        self._elapsed += time.perf_counter() - start
+        return result
+
+    async def fetchone(self):
+        row = await self._timed_fetch(self._cursor.fetchone)
+        if row is None:
+            await self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    async def fetchmany(self, size: Optional[int] = None):
+        rows = await self._timed_fetch(self._cursor.fetchmany, *(() if size is None else (size,)))
+        self._rows += len(rows)
+        if not rows:
+            await self._finish()
+        return rows
+
+    async def fetchall(self):
+        rows = await self._timed_fetch(self._cursor.fetchall)
+        self._rows += len(rows)
+        await self._finish()
+        return rows
+
+    async def close(self):
+        await self._finish()
+        await super().close()
+
+    async def _finish(self):
+        if self._recorded:
+            return
+        self._recorded = True
+        await self._conn._record(self._sql, self._parameters, self._elapsed, self._rows)
+
+
+class ProfiledConnection(aiosqlite.Connection):
+    """aiosqlite connection that reports every statement to a QueryStats instance."""
+
+    def __init__(self, database, stats: QueryStats = QUERY_STATS, iter_chunk_size: int = 64, **kwargs):
+        super().__init__(lambda: sqlite3.connect(str(database), **kwargs), iter_chunk_size)
+        self._stats = stats
+
+    @contextmanager
+    async def execute(self, sql: str, parameters: Optional[Iterable[Any]] = None) -> aiosqlite.Cursor:
+        if parameters is None:
+            parameters = []
+        start = time.perf_counter()
+        cursor = await self._execute(self._conn.execute, sql, parameters)
+        elapsed = time.perf_counter() - start
+        if cursor.description is None:
+            # Nothing to fetch, so the statement is complete
+            await self._record(sql, parameters, elapsed, max(cursor.rowcount, 0))
+            return aiosqlite.Cursor(self, cursor)
+        return ProfiledCursor(self, cursor, sql, parameters, elapsed)
+
+    @contextmanager
+    async def executemany(self, sql: str, parameters: Iterable[Iterable[Any]]) -> aiosqlite.Cursor:
+        start = time.perf_counter()
+        cursor = await self._execute(self._conn.executemany, sql, parameters)
+        # The parameter iterable may be exhausted, so slow batches are logged without a plan
+        await self._record(sql, None, time.perf_counter() - start, max(cursor.rowcount, 0))
+        return aiosqlite.Cursor(self, cursor)
+
+    async def _record(self, sql: str, parameters, elapsed: float, rows: int):
+        template = statement_template(sql)
+        elapsed_ms = elapsed * 1000
+        self._stats.record(template, elapsed_ms, rows)
+        if self._stats.is_slow(elapsed_ms):
+            plan = await self._explain(sql, parameters) if parameters is not None else None
+            self._stats.record_slow(template, elapsed_ms, rows, plan)
+
+    async def _explain(self, sql: str, parameters) -> Optional[str]:
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+
+        def explain():
+            rows = self._conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+            return "; ".join(row[-1] for row in rows)
+
+        try:
+            return await self._execute(explain)
+        except sqlite3.Error:
+            return None
@@ -0,0 +1,142 @@
+"""Process pool that draws the charts off the event loop and out of the bot's GIL.
+
+The cogs used to call pyplot through ``asyncio.to_thread``. That held the GIL
+for the whole render and shared pyplot's current-figure state between
+concurrent commands. ``RenderService`` (``bot.renderer``) sends a renderer
+from ``charts`` and its plain-data arguments to one of ``RENDER_WORKERS``
+worker processes and gets PNG bytes back. Each worker imports matplotlib and
+registers the bundled font once, when it starts.
+
+A render that takes longer than ``RENDER_TIMEOUT`` seconds, or a worker that
+dies, gets the pool restarted. A job lost to a crash is retried once on the
+new pool. With ``RENDER_WORKERS=0`` charts are drawn on a thread as before,
+one at a time.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import charts
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", min(2, os.cpu_count() or 1)))
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", 60))
+
+# Only the workers draw, so the bot process itself never needs these when the pool is running
+WORKER_MODULES = ("matplotlib.pyplot", "matplotlib.offsetbox", "wordcloud", "networkx", "scipy.optimize")
+
+
+class RenderError(Exception):
+    """A chart could not be rendered because its worker crashed or timed out."""
+
+
+def _init_worker():
+    charts.warm()
+
+
+def _mp_context():
+    # Forking a process with live threads and sockets is unsafe; forkserver starts workers from a clean process
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class RenderService:
+    """Runs ``charts`` renderers in a pool of worker processes; available as ``bot.renderer``."""
+
+    def __init__(self, workers: int = RENDER_WORKERS, timeout: float = RENDER_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self.renders = 0
+        self.failures = 0
+        # Failed renders by cause; together they make up failures
+        self.crashes = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.seconds = 0.0
+        self._pool = None
+        # pyplot is not thread-safe, so the thread fallback draws one chart at a time
+        self._thread_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def start(self):
+        if self.workers > 0 and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context(), initializer=_init_worker)
+            if not self.restarts:
+                print(f"[Render] Drawing charts in {self.workers} worker process(es)")
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def warm(self):
+        """Start every worker now (they import matplotlib) so the first chart does not wait for it."""
+        if self._pool is not None:
+            await asyncio.gather(*(self._submit(charts.warm) for _ in range(self.workers)), return_exceptions=True)
+        else:
+            await asyncio.to_thread(self._render_locked, charts.warm, (), {})
+
+    async def render(self, renderer, *args, **kwargs) -> bytes:
+        """Run ``renderer(*args, **kwargs)`` (a function from ``charts``) and return its PNG bytes."""
+        started = time.perf_counter()
+        try:
+            if self._pool is None:
+                return await asyncio.to_thread(self._render_locked, renderer, args, kwargs)
+            try:
+                return await self._submit(renderer, *args, **kwargs)
+            except BrokenProcessPool:
+                # The worker died, maybe while drawing someone else's chart; try once more on the fresh pool
+                return await self._submit(renderer, *args, **kwargs)
+        except BrokenProcessPool as e:
+            self.failures += 1
+            self.crashes += 1
+            raise RenderError(f"{renderer.__name__} crashed its worker process") from e
+        except asyncio.TimeoutError as e:
+            self.failures += 1
+            self.timeouts += 1
+            raise RenderError(f"{renderer.__name__} did not finish within {self.timeout:g}s") from e
+        finally:
+            self.renders += 1
+            self.seconds += time.perf_counter() - started
+
+    async def _submit(self, renderer, *args, **kwargs):
+        pool = self._pool
+        if pool is None:
+            # close() ran while this job was waiting, e.g. between a crash and its retry
+            raise RenderError(f"{renderer.__name__} was not rendered because the render pool is closed")
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(pool.submit(renderer, *args, **kwargs)), self.timeout)
+        except BrokenProcessPool:
+            self._restart(pool, "a worker process died")
+            raise
+        except asyncio.TimeoutError:
+            self._restart(pool, f"{renderer.__name__} ran longer than {self.timeout:g}s")
+            raise
+
+    def _render_locked(self, renderer, args, kwargs):
+        with self._thread_lock:
+            return renderer(*args, **kwargs)
+
+    def _restart(self, pool, reason: str):
+        """Replace ``pool``, killing its workers so a stuck render cannot hold one forever."""
+        if pool is not self._pool:
+            # Another job already replaced it
+            return
+        print(f"[Render] Restarting the render pool: {reason}")
+        self.restarts += 1
+        self._pool = None
+        # ProcessPoolExecutor cannot cancel a running job; terminating the worker is the only way
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def stats(self) -> dict:
+        return {"renders": self.renders, "failures": self.failures, "crashes": self.crashes, "timeouts": self.timeouts,
+                "restarts": self.restarts, "seconds": self.seconds, "workers": self.workers if self.running else 0}
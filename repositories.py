@@ -0,0 +1,441 @@
+"""Typed data access for each DanBot subsystem.
+
+Every SQL statement the cogs run lives here as a class constant, so the text
+is identical on every call and each pooled connection's sqlite3 statement
+cache can reuse the prepared statement. Rows come back as small NamedTuples.
+Every repository method is timed; ``repository_stats()`` lists the slowest.
+
+Methods take the guild the data belongs to as ``guild_id``. It only matters in
+partitioned mode (``DB_PARTITION_MODE=guild``), where it picks the guild's own
+database file; ``None`` uses the shared database.
+"""
+import functools
+import time
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+from database import DatabaseManager
+from schema import ACTIVE_HOURS
+
+
+class TimingStats:
+    """Call count and latency totals for one repository method."""
+
+    __slots__ = ("calls", "errors", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float, failed: bool):
+        self.calls += 1
+        self.errors += failed
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+
+REPOSITORY_TIMINGS = {}
+
+
+def timed(func):
+    """Record the latency of a repository coroutine under ``Class.method``."""
+    stats = REPOSITORY_TIMINGS.setdefault(func.__qualname__, TimingStats())
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            stats.record(time.perf_counter() - started, failed)
+
+    return wrapper
+
+
+def repository_stats(limit: int = None) -> list:
+    """Return per-method timings as dicts, slowest total time first."""
+    rows = [
+        {
+            "method": name,
+            "calls": s.calls,
+            "errors": s.errors,
+            "total_ms": s.total * 1000,
+            "avg_ms": s.total / s.calls * 1000 if s.calls else 0.0,
+            "max_ms": s.max * 1000,
+        }
+        for name, s in REPOSITORY_TIMINGS.items()
+        if s.calls
+    ]
+    rows.sort(key=lambda r: r["total_ms"], reverse=True)
+    return rows[:limit] if limit else rows
+
+
+async def _fetchall(sql: str, params=(), guild_id: int = None) -> list:
+    async with await DatabaseManager.get_connection(readonly=True, guild_id=guild_id) as conn:
+        async with conn.execute(sql, params) as cursor:
+            return await cursor.fetchall()
+
+
+async def _fetchone(sql: str, params=(), guild_id: int = None):
+    async with await DatabaseManager.get_connection(readonly=True, guild_id=guild_id) as conn:
+        async with conn.execute(sql, params) as cursor:
+            return await cursor.fetchone()
+
+
+# ---------------------------------------------------------------------------
+# Workout Tracker
+# ---------------------------------------------------------------------------
+
+class WorkoutGoal(NamedTuple):
+    user_id: int
+    goal: int
+
+
+class PendingWarning(NamedTuple):
+    user_id: int
+    message_id: int
+    timestamp: datetime
+
+
+# Local-time Monday on or before a workout's epoch timestamp, as 'YYYY-MM-DD'
+WEEK_OF_TIMESTAMP = "date(timestamp, 'unixepoch', 'localtime', '-6 days', 'weekday 1')"
+
+
+def _epoch(when: datetime) -> int:
+    return int(when.timestamp())
+
+
+class WorkoutRepository:
+    GET_GOAL = "SELECT goal FROM workout_goals WHERE user_id = ?;"
+    SET_GOAL = "INSERT OR REPLACE INTO workout_goals (user_id, goal) VALUES (?, ?);"
+    LIST_GOALS = "SELECT user_id, goal FROM workout_goals;"
+    COUNT_IN_RANGE = "SELECT COUNT(*) FROM workout_history WHERE user_id = ? AND timestamp >= ? AND timestamp < ?;"
+    COUNTS_IN_RANGE = """
+        SELECT user_id, COUNT(*) FROM workout_history
+        WHERE timestamp >= ? AND timestamp < ?
+        GROUP BY user_id;
+    """
+    # Monday (local time) of the week each workout falls in, matching the cog's week boundaries
+    WEEKLY_COUNTS = f"""
+        SELECT {WEEK_OF_TIMESTAMP} AS week, COUNT(*) FROM workout_history
+        WHERE user_id = ?
+        GROUP BY week;
+    """
+    GOALS_AND_WEEKLY_COUNTS = f"""
+        SELECT g.user_id, g.goal, w.week, w.count
+        FROM workout_goals g
+        LEFT JOIN (
+            SELECT user_id, {WEEK_OF_TIMESTAMP} AS week, COUNT(*) AS count
+            FROM workout_history
+            GROUP BY user_id, week
+        ) w ON w.user_id = g.user_id;
+    """
+    LOG_WORKOUT = "INSERT OR IGNORE INTO workout_history (user_id, timestamp) VALUES (?, ?);"
+    DELETE_GOAL = "DELETE FROM workout_goals WHERE user_id = ?;"
+    DELETE_HISTORY = "DELETE FROM workout_history WHERE user_id = ?;"
+    DELETE_WARNING = "DELETE FROM pending_workout_warnings WHERE user_id = ?;"
+    GET_WARNED_USER = "SELECT user_id FROM pending_workout_warnings WHERE message_id = ?;"
+    LIST_WARNINGS = "SELECT user_id, message_id, timestamp FROM pending_workout_warnings;"
+    ADD_WARNING = "INSERT OR REPLACE INTO pending_workout_warnings (user_id, message_id, timestamp) VALUES (?, ?, ?);"
+
+    @classmethod
+    @timed
+    async def get_goal(cls, user_id: int, guild_id: int = None) -> int:
+        """Return the user's weekly goal, or 0 when they are not tracked."""
+        row = await _fetchone(cls.GET_GOAL, (user_id,), guild_id=guild_id)
+        return row[0] if row else 0
+
+    @classmethod
+    @timed
+    async def set_goal(cls, user_id: int, goal: int, guild_id: int = None):
+        await DatabaseManager.write(cls.SET_GOAL, (user_id, goal), guild_id=guild_id)
+
+    @classmethod
+    @timed
+    async def list_goals(cls, guild_id: int = None) -> list:
+        return [WorkoutGoal(*row) for row in await _fetchall(cls.LIST_GOALS, guild_id=guild_id)]
+
+    @classmethod
+    @timed
+    async def count_in_range(cls, user_id: int, start: datetime, end: datetime, guild_id: int = None) -> int:
+        """Count the user's workouts logged in [start, end)."""
+        row = await _fetchone(cls.COUNT_IN_RANGE, (user_id, _epoch(start), _epoch(end)), guild_id=guild_id)
+        return row[0]
+
+    @classmethod
+    @timed
+    async def counts_in_range(cls, start: datetime, end: datetime, guild_id: int = None) -> dict:
+        """Return {user_id: workouts logged in [start, end)} for users with at least one."""
+        return dict(await _fetchall(cls.COUNTS_IN_RANGE, (_epoch(start), _epoch(end)), guild_id=guild_id))
+
+    @classmethod
+    @timed
+    async def weekly_counts(cls, user_id: int, guild_id: int = None) -> dict:
+        """Return {week start date: workouts that week} for every week the user logged one."""
+        rows = await _fetchall(cls.WEEKLY_COUNTS, (user_id,), guild_id=guild_id)
+        return {date.fromisoformat(week): count for week, count in rows}
+
+    @classmethod
+    @timed
+    async def goals_and_weekly_counts(cls, guild_id: int = None) -> dict:
+        """Return {user_id: (goal, {week start date: count})} for every tracked user in one query."""
+        result = {}
+        for user_id, goal, week, count in await _fetchall(cls.GOALS_AND_WEEKLY_COUNTS, guild_id=guild_id):
+            _, weeks = result.setdefault(user_id, (goal, {}))
+            if week is not None:
+                weeks[date.fromisoformat(week)] = count
+        return result
+
+    @classmethod
+    @timed
+    async def log_workout(cls, user_id: int, when: datetime, guild_id: int = None):
+        await DatabaseManager.write(cls.LOG_WORKOUT, (user_id, _epoch(when)), guild_id=guild_id)
+
+    @classmethod
+    @timed
+    async def remove_user(cls, user_id: int, guild_id: int = None) -> bool:
+        """Drop the user's goal, history and pending warning; return whether they were tracked."""
+        removed_goals, _, _ = await DatabaseManager.write_many([
+            (cls.DELETE_GOAL, (user_id,)),
+            (cls.DELETE_HISTORY, (user_id,)),
+            (cls.DELETE_WARNING, (user_id,)),
+        ], guild_id=guild_id)
+        return removed_goals > 0
+
+    @classmethod
+    @timed
+    async def get_warned_user(cls, message_id: int, guild_id: int = None) -> Optional[int]:
+        """Return the user a warning message was sent to, if it is still pending."""
+        row = await _fetchone(cls.GET_WARNED_USER, (message_id,), guild_id=guild_id)
+        return row[0] if row else None
+
+    @classmethod
+    @timed
+    async def list_warnings(cls, guild_id: int = None) -> list:
+        rows = await _fetchall(cls.LIST_WARNINGS, guild_id=guild_id)
+        return [PendingWarning(uid, msg_id, datetime.fromisoformat(ts)) for uid, msg_id, ts in rows]
+
+    @classmethod
+    @timed
+    async def add_warning(cls, user_id: int, message_id: int, when: datetime, guild_id: int = None):
+        await DatabaseManager.write(cls.ADD_WARNING, (user_id, message_id, when.isoformat()), guild_id=guild_id)
+
+    @classmethod
+    @timed
+    async def clear_warning(cls, user_id: int, guild_id: int = None):
+        await DatabaseManager.write(cls.DELETE_WARNING, (user_id,), guild_id=guild_id)
+
+
+# ---------------------------------------------------------------------------
+# Birthdays
+# ---------------------------------------------------------------------------
+
+class Birthday(NamedTuple):
+    user_id: int
+    username: str
+    birthday: str  # MM-DD
+
+
+class BirthdayRepository:
+    SET_BIRTHDAY = "INSERT OR REPLACE INTO birthdays (user_id, username, birthday) VALUES (?, ?, ?);"
+    GET_BIRTHDAY = "SELECT birthday FROM birthdays WHERE user_id = ?;"
+    LIST_BIRTHDAYS = "SELECT user_id, username, birthday FROM birthdays ORDER BY birthday;"
+    BIRTHDAYS_ON = "SELECT user_id, username, birthday FROM birthdays WHERE birthday IN (?, ?);"
+
+    @classmethod
+    @timed
+    async def set_birthday(cls, user_id: int, username: str, birthday: str, guild_id: int = None):
+        await DatabaseManager.write(cls.SET_BIRTHDAY, (user_id, username, birthday), guild_id=guild_id)
+
+    @classmethod
+    @timed
+    async def get_birthday(cls, user_id: int, guild_id: int = None) -> Optional[str]:
+        row = await _fetchone(cls.GET_BIRTHDAY, (user_id,), guild_id=guild_id)
+        return row[0] if row else None
+
+    @classmethod
+    @timed
+    async def list_birthdays(cls, guild_id: int = None) -> list:
+        """Return every saved birthday ordered by date."""
+        return [Birthday(*row) for row in await _fetchall(cls.LIST_BIRTHDAYS, guild_id=guild_id)]
+
+    @classmethod
+    @timed
+    async def birthdays_on(cls, first: str, second: str, guild_id: int = None) -> list:
+        """Return the birthdays falling on either of two MM-DD dates (an index lookup, not a scan)."""
+        return [Birthday(*row) for row in await _fetchall(cls.BIRTHDAYS_ON, (first, second), guild_id=guild_id)]
+
+
+# ---------------------------------------------------------------------------
+# Connection Chart
+# ---------------------------------------------------------------------------
+
+class UserConnection(NamedTuple):
+    user1_id: int
+    user2_id: int
+    connection: str
+
+
+class ConnectionRepository:
+    ADD = "INSERT OR IGNORE INTO connections (user1_id, user2_id, connection) VALUES (?, ?, ?);"
+    REMOVE = "DELETE FROM connections WHERE ((user1_id = ? AND user2_id = ?) OR (user1_id = ? AND user2_id = ?)) AND connection = ?;"
+    LIST_ALL = "SELECT user1_id, user2_id, connection FROM connections;"
+
+    @classmethod
+    @timed
+    async def add(cls, user1_id: int, user2_id: int, connection: str, guild_id: int = None):
+        await DatabaseManager.write(cls.ADD, (user1_id, user2_id, connection), guild_id=guild_id)
+
+    @classmethod
+    @timed
+    async def remove(cls, user1_id: int, user2_id: int, connection: str, guild_id: int = None) -> bool:
+        """Remove the connection in either direction; return whether one existed."""
+        removed = await DatabaseManager.write(cls.REMOVE, (user1_id, user2_id, user2_id, user1_id, connection), guild_id=guild_id)
+        return removed > 0
+
+    @classmethod
+    @timed
+    async def list_all(cls, guild_id: int = None) -> list:
+        return [UserConnection(*row) for row in await _fetchall(cls.LIST_ALL, guild_id=guild_id)]
+
+
+# ---------------------------------------------------------------------------
+# Server Wrapped
+# ---------------------------------------------------------------------------
+
+def sum_active_hours(blobs) -> list:
+    """Sum packed hourly histograms into 24 guild-wide totals with one NumPy reduction."""
+    buf = b"".join(b for b in blobs if b and len(b) == ACTIVE_HOURS.size)
+    if not buf:
+        return [0] * 24
+    import numpy as np  # deferred so importing the repositories stays cheap at startup
+    totals = np.frombuffer(buf, dtype="<i4").reshape(-1, 24).sum(axis=0, dtype=np.int64)
+    return totals.tolist()
+
+
+class WrappedMetric(NamedTuple):
+    user_id: int
+    message_count: int
+    word_count: int
+    active_hours: bytes  # 24 hourly counts, packed with schema.pack_active_hours
+    reaction_count: int
+
+
+class WrappedMessage(NamedTuple):
+    message_id: int
+    channel_id: int
+    author_id: int
+    value: int  # reaction count or content length
+
+
+class WrappedRepository:
+    LAST_SCRAPED = "SELECT last_scraped FROM server_wrapped_cache_status WHERE guild_id = ? AND year = ?;"
+    METRICS = """
+        SELECT user_id, message_count, word_count, active_hours, reaction_count
+        FROM server_wrapped_metrics WHERE guild_id = ? AND year = ?;
+    """
+    TOP_WORDS = "SELECT word, count FROM server_wrapped_word_freq WHERE guild_id = ? AND year = ? ORDER BY count DESC LIMIT ?;"
+    MOST_REACTED = """
+        SELECT message_id, channel_id, author_id, reaction_count FROM server_wrapped_most_reacted
+        WHERE guild_id = ? AND year = ?
+        ORDER BY reaction_count DESC LIMIT ?;
+    """
+    LONGEST = """
+        SELECT message_id, channel_id, author_id, content_length FROM server_wrapped_longest_messages
+        WHERE guild_id = ? AND year = ?
+        ORDER BY content_length DESC LIMIT ?;
+    """
+    CLEAR_METRICS = "DELETE FROM server_wrapped_metrics WHERE guild_id = ? AND year = ?;"
+    CLEAR_WORDS = "DELETE FROM server_wrapped_word_freq WHERE guild_id = ? AND year = ?;"
+    CLEAR_MOST_REACTED = "DELETE FROM server_wrapped_most_reacted WHERE guild_id = ? AND year = ?;"
+    CLEAR_LONGEST = "DELETE FROM server_wrapped_longest_messages WHERE guild_id = ? AND year = ?;"
+    INSERT_METRIC = """
+        INSERT INTO server_wrapped_metrics (guild_id, user_id, year, message_count, word_count, active_hours, reaction_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
+    """
+    INSERT_WORD = "INSERT INTO server_wrapped_word_freq (guild_id, year, word, count) VALUES (?, ?, ?, ?);"
+    INSERT_MOST_REACTED = """
+        INSERT INTO server_wrapped_most_reacted (guild_id, year, message_id, channel_id, author_id, reaction_count)
+        VALUES (?, ?, ?, ?, ?, ?);
+    """
+    INSERT_LONGEST = """
+        INSERT INTO server_wrapped_longest_messages (guild_id, year, message_id, channel_id, author_id, content_length)
+        VALUES (?, ?, ?, ?, ?, ?);
+    """
+    MARK_SCRAPED = "INSERT OR REPLACE INTO server_wrapped_cache_status (guild_id, year, last_scraped) VALUES (?, ?, ?);"
+
+    @classmethod
+    @timed
+    async def last_scraped(cls, guild_id: int, year: int) -> Optional[datetime]:
+        row = await _fetchone(cls.LAST_SCRAPED, (guild_id, year), guild_id=guild_id)
+        return datetime.fromisoformat(row[0]) if row else None
+
+    @classmethod
+    @timed
+    async def metrics(cls, guild_id: int, year: int) -> list:
+        """Return every member's metrics for the guild and year in one query."""
+        return [WrappedMetric(*row) for row in await _fetchall(cls.METRICS, (guild_id, year), guild_id=guild_id)]
+
+    @classmethod
+    @timed
+    async def top_words(cls, guild_id: int, year: int, limit: int = 1000) -> dict:
+        return dict(await _fetchall(cls.TOP_WORDS, (guild_id, year, limit), guild_id=guild_id))
+
+    @classmethod
+    @timed
+    async def most_reacted(cls, guild_id: int, year: int, limit: int = 5) -> list:
+        return [WrappedMessage(*row) for row in await _fetchall(cls.MOST_REACTED, (guild_id, year, limit), guild_id=guild_id)]
+
+    @classmethod
+    @timed
+    async def longest_messages(cls, guild_id: int, year: int, limit: int = 5) -> list:
+        return [WrappedMessage(*row) for row in await _fetchall(cls.LONGEST, (guild_id, year, limit), guild_id=guild_id)]
+
+    @classmethod
+    @timed
+    async def replace_year(cls, guild_id: int, year: int, metrics: list, words: list, most_reacted: list, longest: list):
+        """Atomically replace a guild's cached statistics for one year.
+
+        ``metrics`` holds WrappedMetric rows, ``words`` (word, count) pairs and
+        the message lists WrappedMessage rows.
+        """
+        key = (guild_id, year)
+        async with await DatabaseManager.get_connection(guild_id=guild_id) as conn:
+            for clear in (cls.CLEAR_METRICS, cls.CLEAR_WORDS, cls.CLEAR_MOST_REACTED, cls.CLEAR_LONGEST):
+                await conn.execute(clear, key)
+            await conn.executemany(cls.INSERT_METRIC, [
+                (guild_id, m.user_id, year, m.message_count, m.word_count, m.active_hours, m.reaction_count)
+                for m in metrics
+            ])
+            await conn.executemany(cls.INSERT_WORD, [(guild_id, year, word, count) for word, count in words])
+            await conn.executemany(cls.INSERT_MOST_REACTED, [(guild_id, year, *m) for m in most_reacted])
+            await conn.executemany(cls.INSERT_LONGEST, [(guild_id, year, *m) for m in longest])
+            await conn.execute(cls.MARK_SCRAPED, (guild_id, year, datetime.now().isoformat()))
+            await conn.commit()
+
+
+# ---------------------------------------------------------------------------
+# Bot state
+# ---------------------------------------------------------------------------
+
+class BotStateRepository:
+    """Small key-value settings the bot keeps across restarts (always in the shared database)."""
+
+    GET = "SELECT value FROM bot_state WHERE key = ?;"
+    SET = "INSERT OR REPLACE INTO bot_state (key, value, updated_at) VALUES (?, ?, ?);"
+
+    @classmethod
+    @timed
+    async def get(cls, key: str) -> Optional[str]:
+        row = await _fetchone(cls.GET, (key,))
+        return row[0] if row else None
+
+    @classmethod
+    @timed
+    async def set(cls, key: str, value: str):
+        await DatabaseManager.write(cls.SET, (key, value, int(time.time())))
@@ -0,0 +1,319 @@
+"""Versioned schema migrations for the DanBot SQLite database.
+
+Every table used by the bot and its cogs is created here. Migrations are
+applied in order, all pending ones inside a single transaction, and each
+applied version is recorded in the ``schema_version`` table.
+
+A migration step is either a SQL string or an ``async def step(conn)``
+callable for changes SQLite cannot express in one statement, such as
+changing a column's type (see ``rebuild_table``).
+"""
+import json
+import struct
+import time
+from datetime import datetime
+
+import aiosqlite
+
+
+async def rebuild_table(conn: aiosqlite.Connection, table: str, create_sql: str, select_sql: str, indexes=()):
+    """Recreate ``table`` with a new definition and copy its rows across.
+
+    SQLite cannot alter a column's type in place, so the table is rebuilt:
+    ``create_sql`` must create ``{table}__new`` and ``select_sql`` must produce
+    its rows from the old table. Indexes on the old table are dropped with it
+    and have to be recreated through ``indexes``.
+    """
+    await conn.execute(create_sql)
+    await conn.execute(f"INSERT INTO {table}__new {select_sql};")
+    await conn.execute(f"DROP TABLE {table};")
+    await conn.execute(f"ALTER TABLE {table}__new RENAME TO {table};")
+    for index_sql in indexes:
+        await conn.execute(index_sql)
+
+
+# server_wrapped_metrics.active_hours: 24 little-endian int32 hourly buckets (96 bytes)
+ACTIVE_HOURS = struct.Struct("<24i")
+
+
+def pack_active_hours(hours) -> bytes:
+    return ACTIVE_HOURS.pack(*hours)
+
+
+def _iso_to_epoch(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (ValueError, TypeError, OverflowError):
+        # Unparseable timestamps never counted towards a goal, so drop them
+        return None
+
+
+async def _workout_history_to_epoch(conn: aiosqlite.Connection):
+    """Convert workout_history timestamps from ISO text to integer epoch seconds."""
+    # Parsed in Python so naive (local) and offset-aware strings both convert correctly
+    await conn.create_function("iso_to_epoch", 1, _iso_to_epoch, deterministic=True)
+    async with conn.execute(
+        "SELECT COUNT(*) FROM workout_history WHERE timestamp IS NOT NULL AND iso_to_epoch(timestamp) IS NULL"
+    ) as cursor:
+        skipped = (await cursor.fetchone())[0]
+    if skipped:
+        print(f"[Database] Dropping {skipped} workout_history row(s) with an unreadable timestamp")
+    await rebuild_table(
+        conn, "workout_history",
+        """
+        CREATE TABLE workout_history__new (
+            user_id INTEGER NOT NULL,
+            timestamp INTEGER NOT NULL, -- Unix epoch seconds
+            PRIMARY KEY (user_id, timestamp)
+        );
+        """,
+        # Sub-second duplicates collapse onto the same epoch second
+        "SELECT DISTINCT user_id, iso_to_epoch(timestamp) FROM workout_history WHERE iso_to_epoch(timestamp) IS NOT NULL",
+        indexes=[
+            # Week-wide counts across all users; per-user ranges use the primary key
+            "CREATE INDEX IF NOT EXISTS idx_workout_history_time ON workout_history (timestamp, user_id);",
+        ],
+    )
+
+
+def _json_hours_to_blob(value):
+    if value is None or isinstance(value, bytes):
+        return value
+    try:
+        hours = json.loads(value)
+        return pack_active_hours(hours[:24] + [0] * (24 - len(hours)))
+    except (ValueError, TypeError, struct.error):
+        # Unreadable histograms were skipped by /server_wrapped before, so drop them
+        return None
+
+
+async def _wrapped_hours_to_blob(conn: aiosqlite.Connection):
+    """Convert server_wrapped_metrics.active_hours from JSON text to packed int32 blobs."""
+    await conn.create_function("json_hours_to_blob", 1, _json_hours_to_blob, deterministic=True)
+    await rebuild_table(
+        conn, "server_wrapped_metrics",
+        """
+        CREATE TABLE server_wrapped_metrics__new (
+            guild_id INTEGER,
+            user_id INTEGER,
+            year INTEGER,
+            message_count INTEGER DEFAULT 0,
+            word_count INTEGER DEFAULT 0,
+            active_hours BLOB, -- 24 hourly buckets packed as little-endian int32 (see ACTIVE_HOURS)
+            reaction_count INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id, year)
+        );
+        """,
+        """
+        SELECT guild_id, user_id, year, message_count, word_count, json_hours_to_blob(active_hours), reaction_count
+        FROM server_wrapped_metrics
+        """,
+        indexes=[
+            "CREATE INDEX IF NOT EXISTS idx_wrapped_metrics_guild_year ON server_wrapped_metrics (guild_id, year);",
+        ],
+    )
+
+
+# (version, description, steps)
+SCHEMA_MIGRATIONS = [
+    (1, "initial schema", [
+        # Birthdays
+        """
+        CREATE TABLE IF NOT EXISTS birthdays (
+            user_id INTEGER,
+            username TEXT,
+            birthday TEXT,
+            PRIMARY KEY (user_id, username)
+        );
+        """,
+        # Connection Chart
+        """
+        CREATE TABLE IF NOT EXISTS connections (
+            user1_id INTEGER,
+            user2_id INTEGER,
+            connection TEXT,
+            PRIMARY KEY (user1_id, user2_id, connection)
+        );
+        """,
+        # Workout Tracker goals, history and pending warnings
+        """
+        CREATE TABLE IF NOT EXISTS workout_goals (
+            user_id INTEGER PRIMARY KEY,
+            goal INTEGER NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS workout_history (
+            user_id INTEGER,
+            timestamp TEXT,
+            PRIMARY KEY (user_id, timestamp)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pending_workout_warnings (
+            user_id INTEGER PRIMARY KEY,
+            message_id INTEGER NOT NULL,
+            timestamp TEXT NOT NULL
+        );
+        """,
+        # Server Wrapped aggregated metrics, word frequencies, top messages and cache status
+        """
+        CREATE TABLE IF NOT EXISTS server_wrapped_metrics (
+            guild_id INTEGER,
+            user_id INTEGER,
+            year INTEGER,
+            message_count INTEGER DEFAULT 0,
+            word_count INTEGER DEFAULT 0,
+            active_hours TEXT, -- Stored as a JSON array string representing 24 hourly buckets
+            reaction_count INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id, year)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS server_wrapped_word_freq (
+            guild_id INTEGER,
+            year INTEGER,
+            word TEXT,
+            count INTEGER,
+            PRIMARY KEY (guild_id, year, word)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS server_wrapped_most_reacted (
+            guild_id INTEGER,
+            year INTEGER,
+            message_id INTEGER,
+            channel_id INTEGER,
+            author_id INTEGER,
+            reaction_count INTEGER,
+            PRIMARY KEY (guild_id, year, message_id)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS server_wrapped_longest_messages (
+            guild_id INTEGER,
+            year INTEGER,
+            message_id INTEGER,
+            channel_id INTEGER,
+            author_id INTEGER,
+            content_length INTEGER,
+            PRIMARY KEY (guild_id, year, message_id)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS server_wrapped_cache_status (
+            guild_id INTEGER,
+            year INTEGER,
+            last_scraped TEXT,
+            PRIMARY KEY (guild_id, year)
+        );
+        """,
+        # Wordle Stats cache (to avoid crawling channel history repeatedly)
+        """
+        CREATE TABLE IF NOT EXISTS wordle_stats_cache (
+            message_id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            timestamp TEXT,
+            score TEXT, -- 1-6 or X
+            group_streak INTEGER
+        );
+        """,
+    ]),
+    (2, "indexes for per-guild and reverse lookups", [
+        # removeconnection matches the pair in both directions
+        "CREATE INDEX IF NOT EXISTS idx_connections_user2 ON connections (user2_id, user1_id);",
+        # list_birthdays sorts by date and the daily reminder matches on it
+        "CREATE INDEX IF NOT EXISTS idx_birthdays_birthday ON birthdays (birthday);",
+        # AcknowledgeWorkoutButton looks warnings up by message
+        "CREATE INDEX IF NOT EXISTS idx_pending_warnings_message ON pending_workout_warnings (message_id);",
+        # /server_wrapped reads every metric row of one guild and year
+        "CREATE INDEX IF NOT EXISTS idx_wrapped_metrics_guild_year ON server_wrapped_metrics (guild_id, year);",
+        "CREATE INDEX IF NOT EXISTS idx_wrapped_word_freq_rank ON server_wrapped_word_freq (guild_id, year, count DESC);",
+        "CREATE INDEX IF NOT EXISTS idx_wordle_cache_user ON wordle_stats_cache (user_id);",
+    ]),
+    (3, "checkpoints for resumable legacy JSON imports", [
+        """
+        CREATE TABLE IF NOT EXISTS legacy_import_progress (
+            source TEXT PRIMARY KEY,
+            records_done INTEGER NOT NULL,
+            source_size INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        );
+        """,
+    ]),
+    (4, "integer epoch timestamps for workout_history", [
+        _workout_history_to_epoch,
+    ]),
+    (5, "packed binary hourly histograms for server_wrapped_metrics", [
+        _wrapped_hours_to_blob,
+    ]),
+    (6, "catalog of per-guild partition files", [
+        """
+        CREATE TABLE IF NOT EXISTS guild_partitions (
+            guild_id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        );
+        """,
+    ]),
+    (7, "key-value store for bot-level state", [
+        """
+        CREATE TABLE IF NOT EXISTS bot_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at INTEGER NOT NULL
+        );
+        """,
+    ]),
+]
+
+LATEST_SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+
+async def get_schema_version(conn: aiosqlite.Connection) -> int:
+    """Return the highest applied schema version, or 0 for a fresh database."""
+    try:
+        async with conn.execute("SELECT MAX(version) FROM schema_version;") as cursor:
+            row = await cursor.fetchone()
+    except aiosqlite.OperationalError:
+        # schema_version does not exist yet
+        return 0
+    return row[0] or 0
+
+
+async def apply_migrations(conn: aiosqlite.Connection) -> list:
+    """Apply every pending migration in one transaction and return the applied versions."""
+    current = await get_schema_version(conn)
+    pending = [m for m in SCHEMA_MIGRATIONS if m[0] > current]
+    if not pending:
+        return []
+
+    await conn.execute("BEGIN IMMEDIATE;")
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at INTEGER NOT NULL
+            );
+        """)
+        # Another process (a second shard) may have migrated while this one waited for the lock
+        current = await get_schema_version(conn)
+        pending = [m for m in SCHEMA_MIGRATIONS if m[0] > current]
+        for version, description, steps in pending:
+            for step in steps:
+                if callable(step):
+                    await step(conn)
+                else:
+                    await conn.execute(step)
+            await conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?);",
+                (version, description, int(time.time()))
+            )
+        await conn.commit()
+    except Exception:
+        await conn.rollback()
+        raise
+    return [m[0] for m in pending]
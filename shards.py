@@ -0,0 +1,129 @@
+"""Optional gateway sharding and which guilds this process is responsible for.
+
+Sharding is off unless ``SHARD_COUNT`` is set: ``auto`` lets Discord pick the
+count and runs every shard in this process, a number fixes it. With a number,
+``SHARD_IDS`` (comma-separated) limits this process to some shards so several
+processes can split the load; they share the same database.
+
+Background jobs that must run once per deployment use ``is_primary`` (the
+process running shard 0), and jobs that post to a configured channel use
+``owns_channel``, so nothing is sent twice when shards are split.
+``ShardMonitor`` reports per-shard latency and gateway event rates.
+"""
+import os
+import time
+
+import discord
+
+SHARD_COUNT = os.getenv("SHARD_COUNT", "").strip().lower() or None
+SHARD_IDS = os.getenv("SHARD_IDS", "").strip() or None
+SHARD_STATS_INTERVAL = int(os.getenv("SHARD_STATS_INTERVAL", 300))
+SHARDED = SHARD_COUNT is not None
+
+
+def shard_options() -> dict:
+    """Constructor keyword arguments for commands.AutoShardedBot from SHARD_COUNT and SHARD_IDS."""
+    if not SHARDED:
+        return {}
+    if SHARD_COUNT == "auto":
+        if SHARD_IDS:
+            raise RuntimeError("SHARD_IDS needs a numeric SHARD_COUNT, not 'auto'.")
+        return {}
+    count = int(SHARD_COUNT)
+    if count < 1:
+        raise RuntimeError("SHARD_COUNT must be at least 1.")
+    options = {"shard_count": count}
+    if SHARD_IDS:
+        ids = sorted({int(i) for i in SHARD_IDS.split(",") if i.strip()})
+        if not ids or ids[0] < 0 or ids[-1] >= count:
+            raise RuntimeError(f"SHARD_IDS must be between 0 and {count - 1}.")
+        options["shard_ids"] = ids
+    return options
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """The shard Discord routes a guild's events to."""
+    return (guild_id >> 22) % shard_count
+
+
+def runs_all_shards(bot) -> bool:
+    """Whether this process sees every guild (not sharded, or running all shards itself)."""
+    return bot.shard_count is None or getattr(bot, "shard_ids", None) is None
+
+
+def owns_guild(bot, guild_id: int) -> bool:
+    if runs_all_shards(bot) or guild_id is None:
+        return True
+    return shard_for_guild(guild_id, bot.shard_count) in bot.shard_ids
+
+
+def is_primary(bot) -> bool:
+    """Whether this process runs deployment-wide jobs (backups, retention): the one running shard 0."""
+    return runs_all_shards(bot) or 0 in bot.shard_ids
+
+
+async def owns_channel(bot, channel_id: int) -> bool:
+    """Whether this process handles the guild of ``channel_id``.
+
+    A channel that cannot be resolved (or a DM channel) belongs to the
+    primary process, so the caller's error handling still runs exactly once.
+    """
+    if runs_all_shards(bot):
+        return True
+    try:
+        channel = bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
+    except discord.HTTPException:
+        return is_primary(bot)
+    guild = getattr(channel, "guild", None)
+    return owns_guild(bot, guild.id) if guild else is_primary(bot)
+
+
+class ShardMonitor:
+    """Per-shard heartbeat latency and gateway event rates for the shards this process runs.
+
+    Event counts come from each gateway connection's sequence number, which
+    Discord increments for every dispatched event, so nothing runs per event.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.disconnects = {}
+        self._last = {}  # shard_id -> (monotonic time, sequence)
+        self._totals = {}
+
+    def _websockets(self) -> dict:
+        if isinstance(self.bot, discord.AutoShardedClient):
+            return {shard_id: self.bot._get_websocket(shard_id=shard_id) for shard_id in self.bot.shards}
+        return {self.bot.shard_id or 0: self.bot.ws}
+
+    def record_disconnect(self, shard_id: int):
+        self.disconnects[shard_id] = self.disconnects.get(shard_id, 0) + 1
+
+    def sample(self, update: bool = True) -> list:
+        """Return one dict per shard; event rates cover the time since the previous updating sample."""
+        now = time.monotonic()
+        guilds = {}
+        for guild in self.bot.guilds:
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+
+        rows = []
+        for shard_id, ws in sorted(self._websockets().items()):
+            sequence = (ws.sequence or 0) if ws is not None else 0
+            last_time, last_sequence = self._last.get(shard_id, (None, 0))
+            # A new gateway session starts counting again from 1
+            events = sequence - last_sequence if sequence >= last_sequence else sequence
+            rate = events / (now - last_time) if last_time is not None and now > last_time else None
+            if update:
+                self._last[shard_id] = (now, sequence)
+                self._totals[shard_id] = self._totals.get(shard_id, 0) + events
+            latency = ws.latency if ws is not None else float("inf")
+            rows.append({
+                "shard_id": shard_id,
+                "latency_ms": round(latency * 1000, 1) if latency != float("inf") else None,
+                "events": self._totals.get(shard_id, 0) + (0 if update else events),
+                "events_per_s": round(rate, 2) if rate is not None else None,
+                "guilds": guilds.get(shard_id, 0),
+                "disconnects": self.disconnects.get(shard_id, 0),
+                "connected": ws is not None and ws.open,
+            })
+        return rows
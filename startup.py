@@ -0,0 +1,86 @@
+"""Startup timing and deferred loading of the heavy plotting and media libraries.
+
+``STARTUP`` records how long each phase of a cold start takes (imports,
+database setup, every cog, command sync) so ``bot.py`` can log where the time
+to ready went. Cogs import matplotlib, numpy, PIL, wordcloud, networkx and
+yt_dlp inside the functions that use them instead of at module level;
+``prewarm_imports`` loads them on a worker thread once the bot is ready so the
+first command that needs one does not pay for the import.
+"""
+import asyncio
+import importlib
+import os
+import time
+from contextlib import contextmanager
+
+PREWARM_IMPORTS = os.getenv("PREWARM_IMPORTS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# Imported lazily by the cogs; scipy backs networkx's kamada_kawai_layout
+HEAVY_MODULES = (
+    "numpy",
+    "matplotlib.pyplot",
+    "matplotlib.offsetbox",
+    "PIL.Image",
+    "wordcloud",
+    "networkx",
+    "scipy.optimize",
+    "yt_dlp",
+)
+
+
+class StartupProfiler:
+    """Wall-clock duration of each named startup phase, measured from process start."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.ready_after = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def mark_ready(self) -> float:
+        """Record the time to ready the first time it is called and return it."""
+        if self.ready_after is None:
+            self.ready_after = time.perf_counter() - self.started
+        return self.ready_after
+
+    def report(self) -> dict:
+        return {
+            "ready_s": round(self.ready_after, 4) if self.ready_after is not None else None,
+            "phases": [{"name": name, "seconds": round(seconds, 4)} for name, seconds in self.phases],
+        }
+
+    def summary(self, top: int = 8) -> str:
+        slowest = sorted(self.phases, key=lambda p: p[1], reverse=True)[:top]
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in slowest)
+
+
+STARTUP = StartupProfiler()
+
+
+def pyplot():
+    """Import matplotlib with the non-interactive Agg backend and return pyplot."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+async def prewarm_imports(modules=HEAVY_MODULES) -> float:
+    """Import ``modules`` one at a time on a worker thread and return the seconds spent."""
+    start = time.perf_counter()
+    for name in modules:
+        try:
+            if name == "matplotlib.pyplot":
+                await asyncio.to_thread(pyplot)
+            else:
+                await asyncio.to_thread(importlib.import_module, name)
+        except ImportError as e:
+            print(f"[Startup] Could not pre-import {name}: {e}")
+    return time.perf_counter() - start
@@ -0,0 +1,177 @@
+"""Event loop stall detector that names the cog and function that blocked the loop.
+
+A heartbeat coroutine stamps the time every ``LOOP_STALL_INTERVAL`` seconds. A
+daemon thread watches the stamp; once it is more than
+``LOOP_STALL_THRESHOLD_MS`` old the loop is stuck in one callback, so the
+thread grabs the loop thread's current stack and keeps the innermost frame
+that belongs to the bot's own code. When the heartbeat runs again it logs the
+stall with its length and culprit, and adds it to the offender table that
+``LoopWatchdog.summary`` reports every ``LOOP_STALL_SUMMARY_MINUTES``.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+LOOP_STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", 250))
+LOOP_STALL_SUMMARY_MINUTES = float(os.getenv("LOOP_STALL_SUMMARY_MINUTES", 60))
+LOOP_STALL_INTERVAL = 0.05
+
+ROOT = Path(__file__).resolve().parent
+
+
+def attribute(frame) -> tuple:
+    """Return (module, function, location, stack lines) for the innermost frame of the bot's own code.
+
+    ``module`` is the dotted module of that frame, e.g. ``cogs.connectionchart``
+    or ``repositories``. A stack without any of the bot's code (a library
+    callback) is reported as ``-`` with the innermost library frame.
+    """
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    own = [f for f in frames if _is_own(f.f_code.co_filename)]
+    culprit = own[-1] if own else frames[-1]
+    module = ".".join(_relative(culprit.f_code.co_filename).removesuffix(".py").split(os.sep)) if own else "-"
+    location = f"{_relative(culprit.f_code.co_filename)}:{culprit.f_lineno}"
+    lines = [f"{_relative(f.f_code.co_filename)}:{f.f_lineno} in {f.f_code.co_qualname}" for f in (own or frames)[-5:]]
+    return module, culprit.f_code.co_qualname, location, lines
+
+
+def _is_own(filename: str) -> bool:
+    # Skips pseudo-files such as "<frozen importlib._bootstrap>"
+    if not os.path.isabs(filename):
+        return False
+    try:
+        path = Path(filename).resolve()
+    except (OSError, ValueError):
+        return False
+    return path.is_relative_to(ROOT) and "site-packages" not in path.parts and path != Path(__file__).resolve()
+
+
+def _relative(filename: str) -> str:
+    try:
+        return str(Path(filename).resolve().relative_to(ROOT))
+    except ValueError:
+        return filename
+
+
+class Offender:
+    __slots__ = ("count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class LoopWatchdog:
+    """Detects event loop stalls longer than ``threshold_ms`` and attributes them to the code that caused them."""
+
+    def __init__(self, threshold_ms: float = LOOP_STALL_THRESHOLD_MS, summary_minutes: float = LOOP_STALL_SUMMARY_MINUTES,
+                 interval: float = LOOP_STALL_INTERVAL):
+        self.threshold = threshold_ms / 1000
+        self.summary_interval = summary_minutes * 60
+        self.interval = interval
+        self.offenders = {}  # (module, function, location) -> Offender
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._beat = 0
+        self._beat_at = time.monotonic()
+        self._captured = {}  # beat number -> attribution
+        self._loop_thread = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._tasks = []
+        self._reported_stalls = 0
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self._beat_at = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        self._tasks = [asyncio.create_task(self._heartbeat())]
+        if self.summary_interval > 0:
+            self._tasks.append(asyncio.create_task(self._summaries()))
+        print(f"[Watchdog] Logging event loop stalls over {self.threshold * 1000:g} ms")
+
+    def stop(self):
+        self._stop.set()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _heartbeat(self):
+        while True:
+            self._beat += 1
+            self._beat_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - self._beat_at - self.interval
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                self.record(lag, self._captured.pop(self._beat, None))
+            self._captured.clear()
+
+    def _watch(self):
+        """Watchdog thread: capture the loop thread's stack once per stall."""
+        poll = min(self.interval, self.threshold / 4)
+        while not self._stop.wait(poll):
+            beat = self._beat
+            if beat in self._captured or time.monotonic() - self._beat_at - self.interval < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None and beat == self._beat:
+                self._captured[beat] = attribute(frame)
+            del frame
+
+    def record(self, lag: float, attribution):
+        """Log one stall and add it to the offender table."""
+        self.stalls += 1
+        module, function, location, lines = attribution or ("-", "unknown", "-", [])
+        key = (module, function, location)
+        offender = self.offenders.get(key)
+        first = offender is None
+        if first:
+            offender = self.offenders[key] = Offender()
+        ms = lag * 1000
+        offender.count += 1
+        offender.total_ms += ms
+        offender.max_ms = max(offender.max_ms, ms)
+        print(f"[Watchdog] Event loop blocked for {ms:.0f} ms in {module}: {function} ({location})")
+        if first and lines:
+            # The full stack only the first time a culprit shows up
+            for line in lines:
+                print(f"[Watchdog]   {line}")
+
+    def top(self, limit: int = 5) -> list:
+        """Worst offenders by total blocked time, as dicts."""
+        rows = [
+            {"module": module, "function": function, "location": location, "count": o.count,
+             "total_ms": round(o.total_ms, 1), "max_ms": round(o.max_ms, 1)}
+            for (module, function, location), o in self.offenders.items()
+        ]
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def summary(self, limit: int = 5) -> str:
+        lines = [f"{self.stalls} stall(s) over {self.threshold * 1000:g} ms since startup, worst first:"]
+        for row in self.top(limit):
+            lines.append(
+                f"  {row['total_ms']:>9.0f} ms total {row['count']:>5}x  max {row['max_ms']:>7.0f} ms  "
+                f"{row['module']}: {row['function']} ({row['location']})"
+            )
+        return "\n".join(lines)
+
+    async def _summaries(self):
+        while True:
+            await asyncio.sleep(self.summary_interval)
+            # Quiet periods stay quiet
+            if self.stalls != self._reported_stalls:
+                self._reported_stalls = self.stalls
+                for line in self.summary().splitlines():
+                    print(f"[Watchdog] {line}")